@@ -1,12 +1,28 @@
 import google.generativeai as genai
 from fastapi import APIRouter, HTTPException, UploadFile, File
-import pypdf
-import docx
-import io
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+import asyncio
 import json
+import os
+import tempfile
+import zipfile
+from functools import lru_cache
+from typing import BinaryIO, List
 
 # Import our new API key
-from app.core.config import FIR_ANALYZER_API_KEY
+from app.core.config import (
+    FIR_ANALYZER_API_KEY,
+    FIR_UPLOAD_MAX_BYTES,
+    FIR_BATCH_MAX_FILES,
+    FIR_BATCH_MAX_BYTES,
+    FIR_BATCH_MAX_CONCURRENCY,
+    NER_PREEXTRACT_ENABLED,
+)
+from app.core import llm_gateway
+from app.utils import docx_parser, ner_extractor, pdf_parser, similarity_checker, text_cleaner
+from app.utils.uploads import spooled_file, too_large_message
+from app.utils.text_cache import cached_extract
 
 # --- Model Configuration ---
 if not FIR_ANALYZER_API_KEY:
@@ -63,6 +79,34 @@ analyzer_model = genai.GenerativeModel(
     generation_config=generation_config,
     system_instruction=ANALYZER_SYSTEM_PROMPT
 )
+ANALYZER_CACHE_SCOPE = llm_gateway.cache_scope("gemini-2.5-flash", ANALYZER_SYSTEM_PROMPT, generation_config)
+
+# --- Focused Extraction (fields the local extractor could not resolve) ---
+NOT_PRESENT = "data is not present in the file"
+
+FOCUSED_SYSTEM_PROMPT = """
+You are an AI assistant that extracts key details from an Indian First Information Report (FIR) or related police document.
+The user will provide the relevant excerpts of the text; "[...]" marks text that was left out.
+Your task is to find only the pieces of information in the provided schema.
+You MUST respond *only* with a single, valid JSON object that adheres to the provided schema.
+Do not add any conversational text.
+If you cannot find information for a field, return the string "data is not present in the file".
+For the 'witnesses' field, return an array of names. If no witnesses are mentioned, return an empty array [].
+"""
+
+@lru_cache(maxsize=256)
+def focused_model(fields: tuple):
+    """The analyzer model, asked only for `fields` (ANALYSIS_SCHEMA fields in schema order)."""
+    schema = {
+        "type": "OBJECT",
+        "properties": {field: ANALYSIS_SCHEMA["properties"][field] for field in fields},
+        "required": list(fields),
+    }
+    return genai.GenerativeModel(
+        model_name="gemini-2.5-flash",
+        generation_config={**generation_config, "response_schema": schema},
+        system_instruction=FOCUSED_SYSTEM_PROMPT
+    )
 
 # --- API Configuration ---
 router = APIRouter(
@@ -71,28 +115,99 @@ router = APIRouter(
 )
 
 # --- Helper functions for file reading ---
-def extract_text_from_pdf(file_stream: io.BytesIO) -> str:
+def extract_text_from_pdf(file_stream: BinaryIO) -> str:
     try:
-        reader = pypdf.PdfReader(file_stream)
-        text = ""
-        for page in reader.pages:
-            text += page.extract_text() or ""
-        return text
+        return cached_extract(file_stream, "pdf", pdf_parser.extract_text)
     except Exception as e:
         print(f"Error reading PDF: {e}")
         raise HTTPException(status_code=400, detail=f"Could not read PDF. File may be corrupt or encrypted: {e}")
 
-def extract_text_from_docx(file_stream: io.BytesIO) -> str:
+def extract_text_from_docx(file_stream: BinaryIO) -> str:
     try:
-        document = docx.Document(file_stream)
-        text = ""
-        for para in document.paragraphs:
-            text += para.text + "\n"
-        return text
+        return cached_extract(file_stream, "docx", docx_parser.extract_text)
     except Exception as e:
         print(f"Error reading DOCX: {e}")
         raise HTTPException(status_code=400, detail=f"Could not read DOCX file: {e}")
 
+DOCX_CONTENT_TYPE = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+# Zip members carry no content type; map them by extension
+EXTENSION_CONTENT_TYPES = {".pdf": "application/pdf", ".docx": DOCX_CONTENT_TYPE, ".txt": "text/plain"}
+
+def read_document(content_type: str, file_stream: BinaryIO) -> str:
+    """Extracts and cleans the text of one uploaded document (blocking). Raises HTTPException 400 on bad input."""
+    if content_type == "application/pdf":
+        document_text = extract_text_from_pdf(file_stream)
+    elif content_type == DOCX_CONTENT_TYPE:
+        document_text = extract_text_from_docx(file_stream)
+    elif content_type == "text/plain":
+        document_text = file_stream.read().decode("utf-8")
+    else:
+        raise HTTPException(status_code=400, detail="Invalid file type. Please upload a PDF, DOCX, or TXT file.")
+
+    document_text = text_cleaner.clean(document_text)
+    if not document_text.strip():
+        raise HTTPException(status_code=400, detail="Uploaded file is empty or text could not be extracted.")
+    return document_text
+
+async def analyze_text(document_text: str) -> dict:
+    """
+    Returns the ANALYSIS_SCHEMA JSON for FIR text. Fields the local extractor
+    resolves are not asked of Gemini, which only sees the text around the rest
+    (and is skipped when none are left). Temperature 0, so repeats are cached,
+    and a near-duplicate upload of an analysed FIR (same FIR number, station
+    and filing date) reuses its result.
+    """
+    try:
+        cached = await llm_gateway.get_cached(ANALYZER_CACHE_SCOPE, document_text)
+        if cached is not None:
+            return cached
+
+        fields = ANALYSIS_SCHEMA["required"]
+        found = await run_in_threadpool(ner_extractor.extract, document_text)
+        # Reuse only the analysis of the same FIR (number, station, filing date)
+        key = ner_extractor.identity(found)
+        signature, match = await run_in_threadpool(
+            similarity_checker.lookup, similarity_checker.fir_analyses, document_text, key
+        )
+        if match is not None:
+            print(f"[analyzer] reusing the analysis of a {match[1]:.0%} similar FIR")
+            if NER_PREEXTRACT_ENABLED:
+                # What this text states outright wins over the stored analysis
+                return {**match[0], **ner_extractor.resolve(found, fields)}
+            return match[0]
+
+        if NER_PREEXTRACT_ENABLED:
+            resolved, missing, prompt_text = await run_in_threadpool(ner_extractor.prepare, document_text, fields, found)
+        else:
+            resolved, missing, prompt_text = {}, fields, document_text
+
+        if not missing:
+            print("[analyzer] all fields resolved locally; skipping the model")
+            json_response = resolved
+        else:
+            # Nothing resolved and nothing cut: the full-text request, as before
+            model = analyzer_model if len(missing) == len(fields) and prompt_text == document_text else focused_model(tuple(missing))
+            response = await llm_gateway.send_message(model, prompt_text)
+            
+            if not response.candidates:
+                raise HTTPException(status_code=400, detail="Response was blocked by safety filters.")
+            
+            answer = json.loads(response.text)
+            json_response = {
+                field: resolved[field] if field in resolved else answer.get(field, [] if field == "witnesses" else NOT_PRESENT)
+                for field in fields
+            }
+        await llm_gateway.store_cached(ANALYZER_CACHE_SCOPE, document_text, json_response)
+        similarity_checker.remember(similarity_checker.fir_analyses, signature, json_response, key)
+        
+        return json_response
+
+    except Exception as e:
+        if isinstance(e, HTTPException):
+            raise e
+        print(f"An error occurred with Gemini: {e}")
+        raise HTTPException(status_code=500, detail=f"Error processing document with AI: {str(e)}")
+
 # --- Main API Endpoint ---
 @router.post("/analyze-fir")
 async def handle_fir_analysis(file: UploadFile = File(...)):
@@ -103,23 +218,12 @@ async def handle_fir_analysis(file: UploadFile = File(...)):
     
     # 1. Check file type and extract text
     try:
-        contents = await file.read()
-        if not contents:
+        if not file.size:
             raise HTTPException(status_code=400, detail="The uploaded file is empty.")
         
-        file_stream = io.BytesIO(contents)
-        
-        if file.content_type == "application/pdf":
-            document_text = extract_text_from_pdf(file_stream)
-        elif file.content_type == "application/vnd.openxmlformats-officedocument.wordprocessingml.document":
-            document_text = extract_text_from_docx(file_stream)
-        elif file.content_type == "text/plain":
-            document_text = contents.decode("utf-8")
-        else:
-            raise HTTPException(status_code=400, detail="Invalid file type. Please upload a PDF, DOCX, or TXT file.")
-
-        if not document_text.strip():
-            raise HTTPException(status_code=400, detail="Uploaded file is empty or text could not be extracted.")
+        # Already spooled to memory/disk by the multipart parser; read it in place
+        file_stream = spooled_file(file, FIR_UPLOAD_MAX_BYTES)
+        document_text = await run_in_threadpool(read_document, file.content_type, file_stream)
             
     except Exception as e:
         if isinstance(e, HTTPException):
@@ -128,19 +232,130 @@ async def handle_fir_analysis(file: UploadFile = File(...)):
         raise HTTPException(status_code=500, detail=f"Error reading file: {str(e)}")
 
     # 2. Send text to Gemini for structured JSON
+    return await analyze_text(document_text)
+
+# --- Batch Endpoint ---
+def _content_type(filename: str, content_type: str = None) -> str:
+    """The declared type if it is one we read, else the type implied by the extension."""
+    if content_type in EXTENSION_CONTENT_TYPES.values():
+        return content_type
+    return EXTENSION_CONTENT_TYPES.get(os.path.splitext(filename or "")[1].lower(), content_type)
+
+def _is_zip(file: UploadFile) -> bool:
+    return file.content_type in ("application/zip", "application/x-zip-compressed") or (
+        (file.filename or "").lower().endswith(".zip")
+    )
+
+def _expand_zip(file: UploadFile) -> list:
+    """
+    Unpacks a zip upload into (filename, content_type, stream, error) items.
+    Members are copied into spooled temp files with the single-upload size
+    cap enforced on the bytes actually read, so a zip bomb stops early.
+    """
+    items = []
     try:
-        chat_session = analyzer_model.start_chat()
-        response = chat_session.send_message(document_text)
-        
-        if not response.candidates:
-            raise HTTPException(status_code=400, detail="Response was blocked by safety filters.")
-        
-        json_response = json.loads(response.text)
-        
-        return json_response
+        archive = zipfile.ZipFile(spooled_file(file, FIR_BATCH_MAX_BYTES))
+    except zipfile.BadZipFile as e:
+        return [(file.filename, None, None, HTTPException(status_code=400, detail=f"Could not read zip file: {e}"))]
+    with archive:
+        for info in archive.infolist():
+            if info.is_dir() or os.path.basename(info.filename).startswith("."):
+                continue
+            name = f"{file.filename}/{info.filename}"
+            content_type = _content_type(info.filename)
+            if content_type is None:
+                items.append((name, None, None, HTTPException(status_code=400, detail="Invalid file type. Please upload a PDF, DOCX, or TXT file.")))
+                continue
+            stream = tempfile.SpooledTemporaryFile(max_size=1024 * 1024)
+            try:
+                remaining = FIR_UPLOAD_MAX_BYTES + 1
+                with archive.open(info) as member:
+                    while remaining > 0:
+                        block = member.read(min(1024 * 1024, remaining))
+                        if not block:
+                            break
+                        stream.write(block)
+                        remaining -= len(block)
+                too_large = remaining <= 0
+            except (zipfile.BadZipFile, RuntimeError, OSError) as e:
+                stream.close()
+                items.append((name, None, None, HTTPException(status_code=400, detail=f"Could not read zip member: {e}")))
+                continue
+            if too_large:
+                stream.close()
+                items.append((name, None, None, HTTPException(status_code=413, detail=too_large_message(FIR_UPLOAD_MAX_BYTES))))
+                continue
+            stream.seek(0)
+            items.append((name, content_type, stream, None))
+    return items
 
+def _close_items(items: list):
+    for _, _, stream, _ in items:
+        if stream is not None:
+            stream.close()
+
+def _ndjson(event: dict) -> bytes:
+    return (json.dumps(event) + "\n").encode("utf-8")
+
+async def _analyze_batch_item(index: int, filename: str, content_type: str, stream: BinaryIO, semaphore: asyncio.Semaphore) -> dict:
+    try:
+        document_text = await run_in_threadpool(read_document, content_type, stream)
+        async with semaphore:
+            analysis = await analyze_text(document_text)
+        return {"type": "result", "index": index, "filename": filename, "analysis": analysis}
     except Exception as e:
-        if isinstance(e, HTTPException):
-            raise e
-        print(f"An error occurred with Gemini: {e}")
-        raise HTTPException(status_code=500, detail=f"Error processing document with AI: {str(e)}")
\ No newline at end of file
+        status_code = e.status_code if isinstance(e, HTTPException) else 500
+        detail = e.detail if isinstance(e, HTTPException) else f"Error reading file: {str(e)}"
+        print(f"Batch FIR analysis failed for {filename}: {detail}")
+        return {"type": "error", "index": index, "filename": filename, "status_code": status_code, "detail": detail}
+
+async def _stream_batch_events(items: list):
+    semaphore = asyncio.Semaphore(FIR_BATCH_MAX_CONCURRENCY)
+    tasks = []
+    failed = 0
+    for index, (filename, content_type, stream, error) in enumerate(items):
+        if error is not None:
+            failed += 1
+            yield _ndjson({"type": "error", "index": index, "filename": filename, "status_code": error.status_code, "detail": error.detail})
+        else:
+            tasks.append(asyncio.create_task(_analyze_batch_item(index, filename, content_type, stream, semaphore)))
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            event = await next_done
+            failed += event["type"] == "error"
+            yield _ndjson(event)
+    finally:
+        # The client went away mid-stream: stop the remaining work
+        for task in tasks:
+            task.cancel()
+        _close_items(items)
+    yield _ndjson({"type": "done", "total": len(items), "succeeded": len(items) - failed, "failed": failed})
+
+@router.post("/analyze-fir-batch")
+async def handle_fir_batch_analysis(files: List[UploadFile] = File(...)):
+    """
+    Accepts many PDF, DOCX, or TXT files (zips of them are unpacked) and
+    streams newline-delimited JSON as each one finishes, in completion order:
+    {"type": "result", "index", "filename", "analysis": <ANALYSIS_SCHEMA>} or
+    {"type": "error", "index", "filename", "status_code", "detail"}, then
+    {"type": "done", "total", "succeeded", "failed"}.
+    """
+    items = []
+    for file in files:
+        if _is_zip(file):
+            items.extend(await run_in_threadpool(_expand_zip, file))
+        elif not file.size:
+            items.append((file.filename, None, None, HTTPException(status_code=400, detail="The uploaded file is empty.")))
+        elif file.size > FIR_UPLOAD_MAX_BYTES:
+            items.append((file.filename, None, None, HTTPException(status_code=413, detail=too_large_message(FIR_UPLOAD_MAX_BYTES))))
+        else:
+            items.append((file.filename, _content_type(file.filename, file.content_type), spooled_file(file, FIR_UPLOAD_MAX_BYTES), None))
+        if len(items) > FIR_BATCH_MAX_FILES:
+            _close_items(items)
+            raise HTTPException(status_code=413, detail=f"Too many files. A batch may contain at most {FIR_BATCH_MAX_FILES} documents.")
+
+    return StreamingResponse(
+        _stream_batch_events(items),
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -15,8 +15,8 @@ from app.schemas import (
     UpdatePasswordRequest,
     UserUpdateProfile
 )
-from app.core.security import hash_password, verify_password
-from app.core.database import get_db_connection
+from app.core.security import hash_password_async, verify_password_async, needs_rehash
+from app.services import user_repository
 
 conf = ConnectionConfig(
     MAIL_USERNAME=os.getenv("MAIL_USERNAME"),
@@ -36,22 +36,12 @@ router = APIRouter(prefix="/api/auth", tags=["Auth"])
 # 1. SIGN UP
 # --------------------------------------------------------------------------
 @router.post("/signup", response_model=UserOut)
-def create_user(user: UserCreate):
-    hashed_pw = hash_password(user.password)
-    db_conn = None
-    cursor = None
+async def create_user(user: UserCreate):
+    hashed_pw = await hash_password_async(user.password)
     try:
-        db_conn = get_db_connection()
-        if db_conn is None:
-            raise HTTPException(status_code=500, detail="Database connection failed.")
-        cursor = db_conn.cursor(dictionary=True)
-        
-        # Added profile_pic (defaulting to NULL for new signups)
-        query = "INSERT INTO users (name, email, hashed_password, gender, phone_number, profile_pic) VALUES (%s, %s, %s, %s, %s, %s)"
-        cursor.execute(query, (user.name, user.email, hashed_pw, user.gender, user.phone_number, None))
-        db_conn.commit()
-        
-        new_user_id = cursor.lastrowid
+        new_user_id = await user_repository.create_user(
+            user.name, user.email, hashed_pw, user.gender, user.phone_number
+        )
         return {
             "id": new_user_id, "name": user.name, "email": user.email, 
             "gender": user.gender, "phone_number": user.phone_number, "profile_pic": None
@@ -62,57 +52,42 @@ def create_user(user: UserCreate):
             raise HTTPException(status_code=400, detail="Email already registered.")
         else:
             raise HTTPException(status_code=500, detail=f"Database error: {err.msg}")
-    finally:
-        if cursor: cursor.close()
-        if db_conn: db_conn.close()
 
 # --------------------------------------------------------------------------
 # 2. LOGIN
 # --------------------------------------------------------------------------
 @router.post("/login", response_model=UserOut)
-def login_user(form_data: UserLogin):
-    db_conn = None
-    cursor = None
+async def login_user(form_data: UserLogin):
     try:
-        db_conn = get_db_connection()
-        if db_conn is None:
-            raise HTTPException(status_code=500, detail="Database connection failed.")
-        cursor = db_conn.cursor(dictionary=True)
-        
-        query = "SELECT * FROM users WHERE email = %s"
-        cursor.execute(query, (form_data.email,))
-        user = cursor.fetchone()
+        user = await user_repository.get_login_by_email(form_data.email)
 
-        if user is None or not verify_password(form_data.password, user["hashed_password"]):
+        if user is None or not await verify_password_async(form_data.password, user["hashed_password"]):
             raise HTTPException(status_code=401, detail="Incorrect email or password.")
 
+        # The work factor changed since this hash was made: upgrade it now that we have the password
+        if needs_rehash(user["hashed_password"]):
+            try:
+                new_hashed_pw = await hash_password_async(form_data.password)
+                await user_repository.set_password(user['id'], new_hashed_pw)
+            except mysql.connector.Error as err:
+                print(f"Password rehash failed for user {user['id']}: {err}")
+
         return UserOut(**user)
     except mysql.connector.Error as err:
         raise HTTPException(status_code=500, detail=f"Database error: {err.msg}")
-    finally:
-        if cursor: cursor.close()
-        if db_conn: db_conn.close()
 
 # --------------------------------------------------------------------------
 # 3. FORGOT PASSWORD
 # --------------------------------------------------------------------------
 @router.post("/forgot-password")
 async def forgot_password(request: ForgotPasswordRequest):
-    db_conn = None
-    cursor = None
     try:
-        db_conn = get_db_connection()
-        if db_conn is None:
-            raise HTTPException(status_code=500, detail="Database connection failed.")
-        cursor = db_conn.cursor(dictionary=True)
-        cursor.execute("SELECT * FROM users WHERE email = %s", (request.email,))
-        user = cursor.fetchone()
+        user = await user_repository.get_id_by_email(request.email)
         if not user:
             return {"message": "If that email exists, we have sent a reset link."}
         token = secrets.token_urlsafe(32)
         expires = datetime.now() + timedelta(minutes=15)
-        cursor.execute("UPDATE users SET reset_token = %s, reset_token_expires = %s WHERE id = %s", (token, expires, user['id']))
-        db_conn.commit()
+        await user_repository.set_reset_token(user['id'], token, expires)
         
         reset_link = f"http://localhost:5173/reset-password?token={token}"
         html = f"<p>Hello {user['name']},</p><p>Click here to reset: <a href='{reset_link}'>Reset Password</a></p>"
@@ -123,103 +98,58 @@ async def forgot_password(request: ForgotPasswordRequest):
     except Exception as e:
         print(f"Error: {e}")
         raise HTTPException(status_code=500, detail="Failed to send email.")
-    finally:
-        if cursor: cursor.close()
-        if db_conn: db_conn.close()
 
 # --------------------------------------------------------------------------
 # 4. RESET PASSWORD
 # --------------------------------------------------------------------------
 @router.post("/reset-password")
 async def reset_password(request: ResetPasswordRequest):
-    db_conn = None
-    cursor = None
     try:
-        db_conn = get_db_connection()
-        if db_conn is None:
-            raise HTTPException(status_code=500, detail="Database connection failed.")
-        cursor = db_conn.cursor(dictionary=True)
-        cursor.execute("SELECT * FROM users WHERE reset_token = %s AND reset_token_expires > NOW()", (request.token,))
-        user = cursor.fetchone()
+        user = await user_repository.get_by_reset_token(request.token)
         if not user:
             raise HTTPException(status_code=400, detail="Invalid or expired token.")
-        new_hashed_pw = hash_password(request.new_password)
-        cursor.execute("UPDATE users SET hashed_password = %s, reset_token = NULL, reset_token_expires = NULL WHERE id = %s", (new_hashed_pw, user['id']))
-        db_conn.commit()
+        new_hashed_pw = await hash_password_async(request.new_password)
+        await user_repository.set_password(user['id'], new_hashed_pw, clear_reset_token=True)
         return {"message": "Password updated successfully."}
     except mysql.connector.Error as err:
         raise HTTPException(status_code=500, detail=f"Database error: {err.msg}")
-    finally:
-        if cursor: cursor.close()
-        if db_conn: db_conn.close()
 
 # --------------------------------------------------------------------------
 # 5. UPDATE PASSWORD
 # --------------------------------------------------------------------------
 @router.put("/update-password")
-def update_password(request: UpdatePasswordRequest):
-    db_conn = None
-    cursor = None
+async def update_password(request: UpdatePasswordRequest):
     try:
-        db_conn = get_db_connection()
-        if db_conn is None:
-            raise HTTPException(status_code=500, detail="Database connection failed.")
-        cursor = db_conn.cursor(dictionary=True)
-        cursor.execute("SELECT * FROM users WHERE email = %s", (request.email,))
-        user = cursor.fetchone()
+        user = await user_repository.get_login_by_email(request.email)
         if not user:
             raise HTTPException(status_code=404, detail="User not found.")
-        if not verify_password(request.current_password, user['hashed_password']):
+        if not await verify_password_async(request.current_password, user['hashed_password']):
             raise HTTPException(status_code=401, detail="Incorrect current password.")
-        new_hashed_pw = hash_password(request.new_password)
-        cursor.execute("UPDATE users SET hashed_password = %s WHERE id = %s", (new_hashed_pw, user['id']))
-        db_conn.commit()
+        new_hashed_pw = await hash_password_async(request.new_password)
+        await user_repository.set_password(user['id'], new_hashed_pw)
         return {"message": "Password updated successfully."}
     except mysql.connector.Error as err:
         raise HTTPException(status_code=500, detail=f"Database error: {err.msg}")
-    finally:
-        if cursor: cursor.close()
-        if db_conn: db_conn.close()
 
 # --------------------------------------------------------------------------
 # 6. UPDATE PROFILE
 # --------------------------------------------------------------------------
 @router.put("/update-profile", response_model=UserOut)
-def update_user_profile(profile_data: UserUpdateProfile):
-    db_conn = None
-    cursor = None
+async def update_user_profile(profile_data: UserUpdateProfile):
     try:
-        db_conn = get_db_connection()
-        if db_conn is None:
-            raise HTTPException(status_code=500, detail="Database connection failed.")
-        cursor = db_conn.cursor(dictionary=True)
-
-        cursor.execute("SELECT * FROM users WHERE email = %s", (profile_data.email,))
-        user = cursor.fetchone()
+        user = await user_repository.get_id_by_email(profile_data.email)
         if not user:
             raise HTTPException(status_code=404, detail="User not found.")
 
         # Update Name, Gender, Phone AND Profile Pic
-        update_query = """
-            UPDATE users 
-            SET name = %s, gender = %s, phone_number = %s, profile_pic = %s
-            WHERE email = %s
-        """
-        cursor.execute(update_query, (
+        updated_user = await user_repository.update_profile(
+            profile_data.email,
             profile_data.name, 
             profile_data.gender, 
             profile_data.phone_number, 
             profile_data.profile_pic, # Pass the Base64 string
-            profile_data.email
-        ))
-        db_conn.commit()
-        
-        cursor.execute("SELECT * FROM users WHERE email = %s", (profile_data.email,))
-        updated_user = cursor.fetchone()
+        )
         return UserOut(**updated_user)
 
     except mysql.connector.Error as err:
         raise HTTPException(status_code=500, detail=f"Database error: {err.msg}")
-    finally:
-        if cursor: cursor.close()
-        if db_conn: db_conn.close()
\ No newline at end of file
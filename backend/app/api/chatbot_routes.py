@@ -1,10 +1,16 @@
 import google.generativeai as genai
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
+import json
 import re
 
 # Import our API key from the new config file
 from app.core.config import GOOGLE_API_KEY
+from app.core import llm_gateway
+from app.services import chat_history, conversation_context
+from app.utils import embeddings
 
 # --- Model Configuration ---
 if not GOOGLE_API_KEY:
@@ -63,6 +69,32 @@ router = APIRouter(
 
 class ChatQuery(BaseModel):
     query: str
+    # With both set, earlier turns of this session are loaded server-side and
+    # the new turn is saved; without them every query stands alone.
+    user_id: int | None = None
+    session_id: str | None = None
+
+    def has_session(self) -> bool:
+        return self.user_id is not None and bool(self.session_id)
+
+
+async def _session_history(chat_query: ChatQuery) -> list:
+    if not chat_query.has_session():
+        return []
+    return await conversation_context.build_history(chat_query.user_id, chat_query.session_id)
+
+
+async def _grounded_query(chat_query: ChatQuery) -> tuple:
+    """The prompt with locally retrieved passages prepended, and their sources."""
+    passages = await run_in_threadpool(embeddings.retrieve, chat_query.query)
+    sources = [{"title": passage["title"], "source": passage["source"]} for passage in passages]
+    return embeddings.grounded_prompt(chat_query.query, passages), sources
+
+
+def _save_turn(chat_query: ChatQuery, answer: str, relevant_law: str):
+    if chat_query.has_session():
+        chat_history.record_turn(chat_query.user_id, chat_query.session_id, chat_query.query, answer, relevant_law)
+
 
 @router.post("/query")
 async def handle_chat_query(chat_query: ChatQuery):
@@ -70,8 +102,9 @@ async def handle_chat_query(chat_query: ChatQuery):
     Handles a user's legal query by sending it to the Gemini AI model.
     """
     try:
-        chat_session = model.start_chat()
-        response = chat_session.send_message(chat_query.query)
+        history = await _session_history(chat_query)
+        prompt, sources = await _grounded_query(chat_query)
+        response = await llm_gateway.send_message(model, prompt, history=history)
 
         if not response.candidates:
              return {
@@ -94,13 +127,17 @@ async def handle_chat_query(chat_query: ChatQuery):
                 relevant_law = law_match.group(1).strip()
                 ai_text = re.sub(r"Relevant Law: (.*)", "", ai_text, flags=re.IGNORECASE).strip()
 
+            # Saved without the disclaimer, which would only cost prompt tokens later
+            _save_turn(chat_query, ai_text, relevant_law)
+
             if relevant_law.lower() != "factual inquiry":
                 ai_text += LEGAL_DISCLAIMER
         
         return {
             "user_query": chat_query.query,
             "ai_response": ai_text,
-            "relevant_law": relevant_law
+            "relevant_law": relevant_law,
+            "sources": sources
         }
         
     except Exception as e:
@@ -114,4 +151,153 @@ async def handle_chat_query(chat_query: ChatQuery):
                 "relevant_law": "Safety Filter"
             }
             
-        raise HTTPException(status_code=500, detail=f"Error communicating with AI: {error_message}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Error communicating with AI: {error_message}")
+
+
+# --- Streaming Variant ---
+SAFETY_BLOCK_MESSAGE = "I'm sorry, my response was blocked for safety reasons. Please rephrase your query."
+RELEVANT_LAW_RE = re.compile(r"^\s*Relevant Law: (.*)$", re.IGNORECASE | re.DOTALL)
+_RELEVANT_LAW_PREFIX = "relevant law:"
+
+
+class RelevantLawFilter:
+    """
+    Passes streamed text through line by line, holding back only a line that
+    could turn out to be the `Relevant Law:` line, which is captured instead of
+    being forwarded. Any other partial line is released as soon as it can no
+    longer match, so tokens reach the client without waiting for newlines.
+    """
+
+    def __init__(self):
+        self.relevant_law = None
+        self._pending = ""
+        self._line_released = False  # current line already proven not to be the law line
+
+    def feed(self, text: str) -> str:
+        self._pending += text
+        out = []
+        while self._pending:
+            newline = self._pending.find("\n")
+            if self._line_released:
+                if newline == -1:
+                    out.append(self._pending)
+                    self._pending = ""
+                    break
+                out.append(self._pending[:newline + 1])
+                self._pending = self._pending[newline + 1:]
+                self._line_released = False
+                continue
+
+            line = self._pending if newline == -1 else self._pending[:newline]
+            if self._capture(line):
+                if newline == -1:
+                    break  # keep buffering until the law line is complete
+                self._pending = self._pending[newline + 1:]
+                continue
+
+            probe = line.lstrip().lower()
+            if newline == -1 and _RELEVANT_LAW_PREFIX.startswith(probe):
+                break  # too short to decide yet
+            self._line_released = True
+        return "".join(out)
+
+    def _capture(self, line: str) -> bool:
+        match = RELEVANT_LAW_RE.match(line)
+        if match:
+            self.relevant_law = match.group(1).strip()
+        return bool(match)
+
+    def flush(self) -> str:
+        rest, self._pending = self._pending, ""
+        if not self._line_released and self._capture(rest):
+            return ""
+        return rest
+
+
+def _ndjson(event: dict) -> bytes:
+    return (json.dumps(event) + "\n").encode("utf-8")
+
+
+async def _stream_chat_events(chat_query: ChatQuery):
+    query = chat_query.query
+    law_filter = RelevantLawFilter()
+    blocked_reason = None
+    answer = []
+    sources = []
+    try:
+        history = await _session_history(chat_query)
+        prompt, sources = await _grounded_query(chat_query)
+        async for chunk in llm_gateway.stream_message(model, prompt, history=history):
+            if not chunk.candidates:
+                blocked_reason = "Safety Filter"
+                break
+            candidate = chunk.candidates[0]
+            if candidate.finish_reason.value not in (0, 1):  # 0 == unspecified (mid-stream), 1 == "STOP"
+                blocked_reason = candidate.finish_reason.name
+            text = "".join(part.text for part in candidate.content.parts)
+            visible = law_filter.feed(text)
+            if visible:
+                answer.append(visible)
+                yield _ndjson({"type": "token", "text": visible})
+            if blocked_reason:
+                break
+    except Exception as e:
+        error_message = str(e)
+        print(f"An error occurred: {error_message}")
+        if "Invalid operation" in error_message:
+            blocked_reason = "Safety Filter"
+        else:
+            yield _ndjson({"type": "error", "detail": f"Error communicating with AI: {error_message}"})
+            return
+
+    if blocked_reason:
+        yield _ndjson({"type": "token", "text": "\n\n" + SAFETY_BLOCK_MESSAGE})
+        yield _ndjson({"type": "done", "user_query": query, "relevant_law": "Safety Filter Block"})
+        return
+
+    tail = law_filter.flush()
+    if tail:
+        answer.append(tail)
+        yield _ndjson({"type": "token", "text": tail})
+
+    relevant_law = law_filter.relevant_law or "See response"
+    _save_turn(chat_query, "".join(answer).strip(), relevant_law)
+    if relevant_law.lower() != "factual inquiry":
+        yield _ndjson({"type": "token", "text": LEGAL_DISCLAIMER})
+    yield _ndjson({"type": "done", "user_query": query, "relevant_law": relevant_law, "sources": sources})
+
+
+@router.post("/query-stream")
+async def handle_chat_query_stream(chat_query: ChatQuery):
+    """
+    Streaming version of /query. Returns newline-delimited JSON events:
+    {"type": "token", "text": ...} as the answer arrives, then a final
+    {"type": "done", "relevant_law": ..., "sources": [...]}, where sources are
+    the locally retrieved passages. The disclaimer is streamed last.
+    """
+    return StreamingResponse(
+        _stream_chat_events(chat_query),
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+# --- Session History ---
+@router.get("/history")
+async def get_chat_history(
+    user_id: int,
+    session_id: str,
+    limit: int = Query(20, ge=1, le=100),
+    before: str | None = None,
+):
+    """
+    Returns a session's turns newest first, `limit` at a time. Pass the
+    response's `next_cursor` as `before` to fetch the next older page.
+    """
+    try:
+        return await chat_history.get_page(user_id, session_id, limit, before)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid history cursor.")
+    except Exception as e:
+        print(f"Error loading chat history: {e}")
+        raise HTTPException(status_code=500, detail="Could not load chat history.")
@@ -1,31 +1,12 @@
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel, Field
 from typing import List, Literal, Union
-from docxtpl import DocxTemplate
-import docx2pdf
-import os
-import re
 from datetime import date
-import time
 
 # Import our API keys from the config file
 from app.core.config import DOCUMENT_GENERATOR_API_KEY, RENT_SALE_API_KEY, LEASE_DEED_API_KEY
-
-# --- File Path Configuration ---
-BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-APP_DIR = os.path.dirname(BASE_DIR)
-TEMPLATE_DIR = os.path.join(APP_DIR, "templates")
-OUTPUT_DIR = os.path.join(APP_DIR, "static/outputs")
-os.makedirs(OUTPUT_DIR, exist_ok=True)
-
-# --- Template Loader ---
-def get_template(template_name):
-    """ Loads a DocxTemplate from disk. """
-    template_path = os.path.join(TEMPLATE_DIR, template_name)
-    if not os.path.exists(template_path):
-        print(f"Template file not found at: {template_path}")
-        return None
-    return DocxTemplate(template_path)
+from app.core.jobs import submit_job
+from app.utils.file_generator import get_template, sanitize_filename, generate_and_save_files, render_file_response
 
 # --- API Configuration ---
 router = APIRouter(
@@ -147,33 +128,32 @@ class LeaseDeedRequest(BaseModel):
     registration_borne_by: str = Field(..., min_length=1)
     jurisdiction_city: str = Field(..., min_length=1)
 
-# Helper function
-def sanitize_filename(text):
-    text = re.sub(r'[^\w\s-]', '', text).strip()
-    text = re.sub(r'[-\s]+', '-', text)
-    return text
-
 # --- ENDPOINT 1: GENERATE NDA ---
 @router.post("/generate-nda")
-def handle_nda_generation(request: NDARequest):
+def handle_nda_generation(request: NDARequest, background: bool = False, output: Literal["link", "docx", "pdf"] = "link"):
     try:
         doc = get_template("nda_template.docx")
         if doc is None:
             raise HTTPException(status_code=500, detail="NDA template file not found on server.")
         context = request.dict()
         context['agreement_date'] = date.today().strftime("%B %d, %Y")
-        timestamp = int(time.time())
         disclosing_safe = sanitize_filename(request.disclosing_party.name)
-        base_filename = f"nda_{disclosing_safe}_{timestamp}"
+        base_filename = f"nda_{disclosing_safe}"
+        if output != "link":
+            return render_file_response(doc, context, base_filename, output)
+        if background:
+            return submit_job(generate_and_save_files, doc, context, base_filename)
         return generate_and_save_files(doc, context, base_filename)
     except Exception as e:
+        if isinstance(e, HTTPException):
+            raise e
         print(f"An error occurred: {e}")
         raise HTTPException(status_code=500, detail=f"Error generating NDA: {str(e)}")
 
 
 # --- ENDPOINT 2: GENERATE AFFIDAVIT ---
 @router.post("/generate-affidavit")
-def handle_affidavit_generation(request: AffidavitRequest):
+def handle_affidavit_generation(request: AffidavitRequest, background: bool = False, output: Literal["link", "docx", "pdf"] = "link"):
     try:
         doc = get_template("affidavit_template.docx")
         if doc is None:
@@ -182,35 +162,45 @@ def handle_affidavit_generation(request: AffidavitRequest):
         context = request.dict()
         context['verification_date'] = current_date_str
         context['agreement_date'] = current_date_str 
-        timestamp = int(time.time())
         deponent_safe = sanitize_filename(request.deponent_full_name)
-        base_filename = f"affidavit_{deponent_safe}_{timestamp}"
+        base_filename = f"affidavit_{deponent_safe}"
+        if output != "link":
+            return render_file_response(doc, context, base_filename, output)
+        if background:
+            return submit_job(generate_and_save_files, doc, context, base_filename)
         return generate_and_save_files(doc, context, base_filename)
     except Exception as e:
+        if isinstance(e, HTTPException):
+            raise e
         print(f"An error occurred: {e}")
         raise HTTPException(status_code=500, detail=f"Error generating Affidavit: {str(e)}")
 
 # --- ENDPOINT 3: GENERATE RENT AGREEMENT ---
 @router.post("/generate-rent-agreement")
-def handle_rent_agreement_generation(request: RentAgreementRequest):
+def handle_rent_agreement_generation(request: RentAgreementRequest, background: bool = False, output: Literal["link", "docx", "pdf"] = "link"):
     try:
         doc = get_template("rent_agreement_template.docx")
         if doc is None:
             raise HTTPException(status_code=500, detail="Rent Agreement template file not found on server.")
         context = request.dict()
         context['agreement_date'] = date.today().strftime("%B %d, %Y")
-        timestamp = int(time.time())
         landlord_safe = sanitize_filename(request.landlord_full_name)
         tenant_safe = sanitize_filename(request.tenant_full_name)
-        base_filename = f"rent_{landlord_safe}_x_{tenant_safe}_{timestamp}"
+        base_filename = f"rent_{landlord_safe}_x_{tenant_safe}"
+        if output != "link":
+            return render_file_response(doc, context, base_filename, output)
+        if background:
+            return submit_job(generate_and_save_files, doc, context, base_filename)
         return generate_and_save_files(doc, context, base_filename)
     except Exception as e:
+        if isinstance(e, HTTPException):
+            raise e
         print(f"An error occurred: {e}")
         raise HTTPException(status_code=500, detail=f"Error generating Rent Agreement: {str(e)}")
 
 # --- ENDPOINT 4: GENERATE SALE DEED ---
 @router.post("/generate-sale-deed")
-def handle_sale_deed_generation(request: SaleDeedRequest):
+def handle_sale_deed_generation(request: SaleDeedRequest, background: bool = False, output: Literal["link", "docx", "pdf"] = "link"):
     try:
         doc = get_template("sale_deed_template.docx")
         if doc is None:
@@ -219,18 +209,23 @@ def handle_sale_deed_generation(request: SaleDeedRequest):
         context['execution_date'] = date.today().strftime("%B %d, %Y")
         if context['payment_reference'] is None:
             context['payment_reference'] = "N/A"
-        timestamp = int(time.time())
         seller_safe = sanitize_filename(request.seller_full_name)
         buyer_safe = sanitize_filename(request.buyer_full_name)
-        base_filename = f"sale_deed_{seller_safe}_x_{buyer_safe}_{timestamp}"
+        base_filename = f"sale_deed_{seller_safe}_x_{buyer_safe}"
+        if output != "link":
+            return render_file_response(doc, context, base_filename, output)
+        if background:
+            return submit_job(generate_and_save_files, doc, context, base_filename)
         return generate_and_save_files(doc, context, base_filename)
     except Exception as e:
+        if isinstance(e, HTTPException):
+            raise e
         print(f"An error occurred: {e}")
         raise HTTPException(status_code=500, detail=f"Error generating Sale Deed: {str(e)}")
 
 # --- ENDPOINT 5: GENERATE LEASE DEED (FIXED) ---
 @router.post("/generate-lease-deed")
-def handle_lease_deed_generation(request: LeaseDeedRequest):
+def handle_lease_deed_generation(request: LeaseDeedRequest, background: bool = False, output: Literal["link", "docx", "pdf"] = "link"):
     """ Generates a .docx and .pdf for a Lease Deed. """
     try:
         template_name = "lease_deed_template.docx"
@@ -247,40 +242,17 @@ def handle_lease_deed_generation(request: LeaseDeedRequest):
             context['payment_reference'] = "N/A" # Or just an empty string ""
         # --- END OF FIX ---
         
-        timestamp = int(time.time())
         lessor_safe = sanitize_filename(request.lessor_full_name)
         lessee_safe = sanitize_filename(request.lessee_full_name)
-        base_filename = f"lease_deed_{lessor_safe}_x_{lessee_safe}_{timestamp}"
-        
+        base_filename = f"lease_deed_{lessor_safe}_x_{lessee_safe}"
+        if output != "link":
+            return render_file_response(doc, context, base_filename, output)
+        if background:
+            return submit_job(generate_and_save_files, doc, context, base_filename)
         return generate_and_save_files(doc, context, base_filename)
 
     except Exception as e:
+        if isinstance(e, HTTPException):
+            raise e
         print(f"An error occurred: {e}")
-        raise HTTPException(status_code=500, detail=f"Error generating Lease Deed: {str(e)}")
-
-
-# --- Helper function for file generation ---
-def generate_and_save_files(doc: DocxTemplate, context: dict, base_filename: str):
-    """
-    Renders, saves, and converts a doc template.
-    Returns a dictionary of download links.
-    """
-    output_docx_name = f"{base_filename}.docx"
-    output_pdf_name = f"{base_filename}.pdf"
-    output_docx_path = os.path.join(OUTPUT_DIR, output_docx_name)
-    output_pdf_path = os.path.join(OUTPUT_DIR, output_pdf_name)
-
-    doc.render(context)
-    doc.save(output_docx_path)
-    
-    pdf_url = None
-    try:
-        docx2pdf.convert(output_docx_path, output_pdf_path)
-        pdf_url = f"/static/outputs/{output_pdf_name}"
-    except Exception as pdf_error:
-        print(f"Warning: PDF conversion failed: {pdf_error}")
-
-    return {
-        "docx_url": f"/static/outputs/{output_docx_name}",
-        "pdf_url": pdf_url
-    }
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Error generating Lease Deed: {str(e)}")
\ No newline at end of file
@@ -1,23 +1,20 @@
 import google.generativeai as genai
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel, Field
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Literal
 import json
 import os
-import uuid
-from docxtpl import DocxTemplate
-from docx2pdf import convert
 # --- 1. NEW IMPORTS ---
 from fastapi.responses import FileResponse
-from starlette.background import BackgroundTask
+from fastapi.concurrency import run_in_threadpool
 
 # Import the API key
 from app.core.config import FAQ_BUILDER_API_KEY
-
-# --- Define Paths ---
-APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-TEMPLATE_DIR = os.path.join(APP_DIR, "templates")
-OUTPUT_DIR = os.path.join(APP_DIR, "static", "outputs")
+from app.core import llm_gateway
+from app.utils import file_manager
+from app.utils.file_manager import OUTPUT_DIR
+from app.utils.file_generator import get_template, sanitize_filename, render_file_response, render_to_bytes, content_disposition
+from app.utils.pdf_converter import convert_bytes_to_pdf
 
 # --- Model Configuration ---
 if not FAQ_BUILDER_API_KEY:
@@ -76,6 +73,7 @@ faq_model = genai.GenerativeModel(
     generation_config=generation_config_faq,
     system_instruction=FAQ_SYSTEM_PROMPT
 )
+FAQ_CACHE_SCOPE = llm_gateway.cache_scope("gemini-2.5-flash", FAQ_SYSTEM_PROMPT, generation_config_faq)
 
 # --- Pydantic Request Model (for AI) ---
 class FAQRequest(BaseModel):
@@ -85,11 +83,14 @@ class FAQRequest(BaseModel):
 async def handle_generate_faq(request: FAQRequest):
     try:
         user_prompt = f"Please generate 5-7 FAQs for the following legal topic in India: {request.topic}"
-        chat_session = faq_model.start_chat()
-        response = chat_session.send_message(user_prompt)
+        cached = await llm_gateway.get_cached(FAQ_CACHE_SCOPE, user_prompt)
+        if cached is not None:
+            return cached
+        response = await llm_gateway.send_message(faq_model, user_prompt)
         if not response.candidates:
             raise HTTPException(status_code=400, detail="Response was blocked by safety filters.")
         json_response = json.loads(response.text)
+        await llm_gateway.store_cached(FAQ_CACHE_SCOPE, user_prompt, json_response)
         return json_response
     except Exception as e:
         if isinstance(e, HTTPException): raise e
@@ -111,27 +112,35 @@ class FAQDownloadRequest(BaseModel):
     faqs: List[FAQItem]
 
 @router.post("/download-pdf")
-async def handle_download_faq_pdf(request: FAQDownloadRequest):
-    """Accepts topic & FAQs, generates a PDF, saves it, and returns a URL the client can fetch."""
+async def handle_download_faq_pdf(request: FAQDownloadRequest, output: Literal["link", "pdf", "docx"] = "link"):
+    """
+    Accepts topic & FAQs and generates a PDF. By default it is saved and a URL the
+    client can fetch is returned; with output=pdf (or docx) the file is rendered in
+    memory and streamed straight back without touching the disk.
+    """
     try:
-        doc = DocxTemplate(os.path.join(TEMPLATE_DIR, "faq_template.docx"))
+        doc = get_template("faq_template.docx")
+        if doc is None:
+            raise HTTPException(status_code=500, detail="FAQ template file not found on server.")
 
         context = {
             "topic": request.topic,
             "faqs": [faq.dict() for faq in request.faqs]
         }
 
-        unique_id = str(uuid.uuid4())
-        user_filename = f"FAQ_{request.topic.replace(' ', '_')}_{unique_id[:6]}.pdf"
+        if output != "link":
+            base_filename = f"FAQ_{sanitize_filename(request.topic)}"
+            return await run_in_threadpool(render_file_response, doc, context, base_filename, output)
 
-        docx_path = os.path.join(OUTPUT_DIR, f"{unique_id}.docx")
+        # The id is a content hash, so the same topic + FAQs reuses one stored PDF
+        unique_id = file_manager.content_key(doc.template_file, context)[:32]
+        user_filename = f"FAQ_{request.topic.replace(' ', '_')}_{unique_id[:6]}.pdf"
         pdf_path = os.path.join(OUTPUT_DIR, f"{unique_id}.pdf")
 
-        doc.render(context)
-        doc.save(docx_path)
-
-        convert(docx_path)  # generates PDF
-        os.remove(docx_path)
+        if not file_manager.reuse(pdf_path):
+            # Render and convert in memory (pooled engine, off the event loop); only the PDF is stored
+            pdf_bytes = await run_in_threadpool(lambda: convert_bytes_to_pdf(render_to_bytes(doc, context)))
+            await run_in_threadpool(file_manager.write_bytes, pdf_path, pdf_bytes)
 
         # Return a stable URL pointing to a download endpoint that sets attachment headers
         download_url = f"/api/v1/faq/download/{unique_id}"
@@ -149,7 +158,7 @@ async def handle_download_faq_pdf(request: FAQDownloadRequest):
 async def serve_faq_pdf(file_id: str):
     """Serves the generated FAQ PDF as an attachment so the browser downloads instead of previewing."""
     pdf_path = os.path.join(OUTPUT_DIR, f"{file_id}.pdf")
-    if not os.path.exists(pdf_path):
+    if not file_manager.touch(pdf_path):
         raise HTTPException(status_code=404, detail="File not found")
 
     user_filename = f"FAQ_{file_id}.pdf"
@@ -157,5 +166,5 @@ async def serve_faq_pdf(file_id: str):
         path=pdf_path,
         filename=user_filename,
         media_type="application/pdf",
-        headers={"Content-Disposition": f"attachment; filename={user_filename}"}
+        headers={"Content-Disposition": content_disposition(user_filename)}
     )
\ No newline at end of file
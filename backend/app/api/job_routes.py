@@ -0,0 +1,21 @@
+from fastapi import APIRouter, HTTPException
+
+from app.core.jobs import job_manager
+
+# --- API Configuration ---
+router = APIRouter(
+    prefix="/api/v1/jobs",
+    tags=["Jobs"]
+)
+
+@router.get("/{job_id}")
+async def get_job_status(job_id: str):
+    """
+    Returns the status of a background document job. Once the status is
+    "done", `result` holds the same payload the synchronous endpoint returns
+    (e.g. docx_url and pdf_url).
+    """
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found or expired.")
+    return job.to_dict()
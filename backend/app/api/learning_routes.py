@@ -7,6 +7,7 @@ import json
 # Import the API keys
 # We now import a specific key for the research tool as requested
 from app.core.config import LEARNING_HUB_API_KEY, LEGAL_RESEARCH_API_KEY
+from app.core import llm_gateway
 
 # --- API Router ---
 router = APIRouter(
@@ -95,6 +96,9 @@ simplifier_model = genai.GenerativeModel(
     generation_config=generation_config_simplifier,
     system_instruction=SIMPLIFIER_SYSTEM_PROMPT
 )
+SIMPLIFIER_CACHE_SCOPE = llm_gateway.cache_scope(
+    "gemini-2.5-flash", SIMPLIFIER_SYSTEM_PROMPT, generation_config_simplifier
+)
 
 # --- Pydantic Request Model for Tool 1 ---
 class BareActRequest(BaseModel):
@@ -104,11 +108,14 @@ class BareActRequest(BaseModel):
 async def handle_simplify_bare_act(request: BareActRequest):
     try:
         user_prompt = f"Please simplify and explain this section: {request.section}"
-        chat_session = simplifier_model.start_chat()
-        response = chat_session.send_message(user_prompt)
+        cached = await llm_gateway.get_cached(SIMPLIFIER_CACHE_SCOPE, user_prompt)
+        if cached is not None:
+            return cached
+        response = await llm_gateway.send_message(simplifier_model, user_prompt)
         if not response.candidates:
             raise HTTPException(status_code=400, detail="Response was blocked by safety filters.")
         json_response = json.loads(response.text)
+        await llm_gateway.store_cached(SIMPLIFIER_CACHE_SCOPE, user_prompt, json_response)
         return json_response
     except Exception as e:
         if isinstance(e, HTTPException): raise e
@@ -184,8 +191,7 @@ class AnswerEvaluationRequest(BaseModel):
 async def handle_evaluate_answer(request: AnswerEvaluationRequest):
     try:
         user_prompt = f"Question: {request.question}\n\nStudent's Answer: {request.answer}"
-        chat_session = evaluator_model.start_chat()
-        response = chat_session.send_message(user_prompt)
+        response = await llm_gateway.send_message(evaluator_model, user_prompt)
         if not response.candidates:
             raise HTTPException(status_code=400, detail="Response was blocked by safety filters.")
         json_response = json.loads(response.text)
@@ -287,6 +293,9 @@ generation_config_researcher = {
 # --- AI Model for Tool 3 ---
 # Note: We don't instantiate the model globally here because we need to switch keys.
 # We will instantiate it inside the request handler.
+RESEARCHER_CACHE_SCOPE = llm_gateway.cache_scope(
+    "gemini-2.5-flash", RESEARCHER_SYSTEM_PROMPT, generation_config_researcher
+)
 
 # --- Pydantic Request Model for Tool 3 ---
 class ResearchRequest(BaseModel):
@@ -311,13 +320,17 @@ async def handle_research_topic(request: ResearchRequest):
         
         user_prompt = f"Please generate a complete set of notes for the following legal topic: {request.topic}"
         
-        chat_session = researcher_model.start_chat()
-        response = chat_session.send_message(user_prompt)
+        cached = await llm_gateway.get_cached(RESEARCHER_CACHE_SCOPE, user_prompt)
+        if cached is not None:
+            return cached
+        
+        response = await llm_gateway.send_message(researcher_model, user_prompt)
         
         if not response.candidates:
             raise HTTPException(status_code=400, detail="Response was blocked by safety filters.")
         
         json_response = json.loads(response.text)
+        await llm_gateway.store_cached(RESEARCHER_CACHE_SCOPE, user_prompt, json_response)
         return json_response
 
     except Exception as e:
@@ -1,74 +1,23 @@
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel, Field
-from docxtpl import DocxTemplate
-import docx2pdf
-import os
-import re
+from typing import Literal
 from datetime import date
-import time
 
 # Import our new API key
 from app.core.config import LEGAL_NOTICE_API_KEY
+from app.core.jobs import submit_job
+from app.utils.file_generator import get_template, sanitize_filename, generate_and_save_files, render_file_response
 
 # --- Model Configuration ---
 if not LEGAL_NOTICE_API_KEY:
     print("Warning: LEGAL_NOTICE_API_KEY is not set.")
 
-# --- File Path Configuration (Local to this file) ---
-BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-APP_DIR = os.path.dirname(BASE_DIR)
-TEMPLATE_DIR = os.path.join(APP_DIR, "templates")
-OUTPUT_DIR = os.path.join(APP_DIR, "static/outputs")
-os.makedirs(OUTPUT_DIR, exist_ok=True)
-
 # --- API Configuration ---
 router = APIRouter(
     prefix="/api/v1/notice",
     tags=["LegalNoticeGenerator"]
 )
 
-# --- Helper functions (Standalone) ---
-def get_template(template_name):
-    """ Loads a DocxTemplate from disk. """
-    template_path = os.path.join(TEMPLATE_DIR, template_name)
-    if not os.path.exists(template_path):
-        print(f"Template file not found at: {template_path}")
-        return None
-    return DocxTemplate(template_path)
-
-def sanitize_filename(text):
-    text = re.sub(r'[^\w\s-]', '', text).strip()
-    text = re.sub(r'[-\s]+', '-', text)
-    return text
-
-def generate_and_save_files(doc: DocxTemplate, context: dict, base_filename: str):
-    """
-    Renders, saves, and converts a doc template.
-    Returns a dictionary of download links.
-    """
-    timestamp = int(time.time())
-    unique_filename = f"{base_filename}_{timestamp}"
-
-    output_docx_name = f"{unique_filename}.docx"
-    output_pdf_name = f"{unique_filename}.pdf"
-    output_docx_path = os.path.join(OUTPUT_DIR, output_docx_name)
-    output_pdf_path = os.path.join(OUTPUT_DIR, output_pdf_name)
-
-    doc.render(context)
-    doc.save(output_docx_path)
-    
-    pdf_url = None
-    try:
-        docx2pdf.convert(output_docx_path, output_pdf_path)
-        pdf_url = f"/static/outputs/{output_pdf_name}"
-    except Exception as pdf_error:
-        print(f"Warning: PDF conversion failed: {pdf_error}")
-
-    return {
-        "docx_url": f"/static/outputs/{output_docx_name}",
-        "pdf_url": pdf_url
-    }
-
 # --- Pydantic Model for the Unpaid Salary Notice ---
 class UnpaidSalaryNoticeRequest(BaseModel):
     recipient_name: str = Field(..., min_length=1)
@@ -106,7 +55,7 @@ class LoanRepaymentNoticeRequest(BaseModel):
 
 # --- API Endpoint 1 ---
 @router.post("/generate-unpaid-salary-notice")
-def handle_salary_notice_generation(request: UnpaidSalaryNoticeRequest):
+def handle_salary_notice_generation(request: UnpaidSalaryNoticeRequest, background: bool = False, output: Literal["link", "docx", "pdf"] = "link"):
     """
     Generates a .docx and .pdf for an Unpaid Salary Legal Notice.
     """
@@ -121,16 +70,21 @@ def handle_salary_notice_generation(request: UnpaidSalaryNoticeRequest):
         sender_safe = sanitize_filename(request.sender_name)
         recipient_safe = sanitize_filename(request.recipient_name)
         base_filename = f"notice_{sender_safe}_to_{recipient_safe}"
-        
+        if output != "link":
+            return render_file_response(doc, context, base_filename, output)
+        if background:
+            return submit_job(generate_and_save_files, doc, context, base_filename)
         return generate_and_save_files(doc, context, base_filename)
 
     except Exception as e:
+        if isinstance(e, HTTPException):
+            raise e
         print(f"An error occurred: {e}")
         raise HTTPException(status_code=500, detail=f"Error generating legal notice: {str(e)}")
 
 # --- NEW API Endpoint 2 ---
 @router.post("/generate-loan-repayment-notice")
-def handle_loan_notice_generation(request: LoanRepaymentNoticeRequest):
+def handle_loan_notice_generation(request: LoanRepaymentNoticeRequest, background: bool = False, output: Literal["link", "docx", "pdf"] = "link"):
     """
     Generates a .docx and .pdf for a Loan Repayment Legal Notice.
     """
@@ -145,9 +99,14 @@ def handle_loan_notice_generation(request: LoanRepaymentNoticeRequest):
         lender_safe = sanitize_filename(request.lender_name)
         borrower_safe = sanitize_filename(request.borrower_name)
         base_filename = f"notice_{lender_safe}_to_{borrower_safe}"
-        
+        if output != "link":
+            return render_file_response(doc, context, base_filename, output)
+        if background:
+            return submit_job(generate_and_save_files, doc, context, base_filename)
         return generate_and_save_files(doc, context, base_filename)
 
     except Exception as e:
+        if isinstance(e, HTTPException):
+            raise e
         print(f"An error occurred: {e}")
         raise HTTPException(status_code=500, detail=f"Error generating legal notice: {str(e)}")
\ No newline at end of file
@@ -1,17 +1,25 @@
 import google.generativeai as genai
 from fastapi import APIRouter, HTTPException, UploadFile, File
-import pypdf
-import docx
-import io
+from fastapi.concurrency import run_in_threadpool
+import asyncio
 import json
-from datetime import date
-from docxtpl import DocxTemplate
-import docx2pdf
-import os
 import re
-import time
+from typing import BinaryIO
 
-from app.core.config import CASE_SUMMARIZER_API_KEY
+from app.core.config import (
+    CASE_SUMMARIZER_API_KEY,
+    SUMMARIZER_UPLOAD_MAX_BYTES,
+    SUMMARY_CHUNK_CHARS,
+    SUMMARY_MAX_CONCURRENCY,
+    SUMMARY_MAX_CHARS,
+)
+from app.core import llm_gateway
+from app.core.jobs import submit_job
+from app.utils import docx_parser, pdf_parser, similarity_checker, text_cleaner
+from app.utils.uploads import spooled_file
+from app.utils.text_cache import cached_extract
+from app.utils.text_chunker import split_text
+from app.utils.file_generator import get_template, sanitize_filename, generate_and_save_files
 
 if not CASE_SUMMARIZER_API_KEY:
     raise HTTPException(status_code=500, detail="Case Summarizer API Key not found.")
@@ -85,17 +93,30 @@ summarizer_model = genai.GenerativeModel(
     system_instruction=SUMMARIZER_SYSTEM_PROMPT
 )
 
+# --- PROMPT FOR ONE PART OF A LONG JUDGMENT ---
+CHUNK_SYSTEM_PROMPT = """
+You are an expert legal AI. You are given ONE PART of a long Indian court judgment, split into consecutive parts.
+Extract only the details required by the JSON schema that appear IN THIS PART.
+
+**INSTRUCTIONS:**
+1. Leave a field as an empty string "" (or an empty list) if this part does not state it. Do not guess or infer from general knowledge.
+2. **Sections Invoked:** List the Acts and Sections mentioned in this part, separated by commas.
+3. **Legal Issues:** List the issues framed or argued in this part.
+4. **Final Judgment:** Fill this only if this part contains the court's operative order or final decision; summarise it concisely.
+5. **Format:** Return ONLY valid JSON. No markdown.
+"""
+
+chunk_model = genai.GenerativeModel(
+    model_name="gemini-2.5-flash",
+    generation_config=generation_config,
+    system_instruction=CHUNK_SYSTEM_PROMPT
+)
+
 router = APIRouter(
     prefix="/api/v1/summarizer",
     tags=["CaseSummarizer"]
 )
 
-BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-APP_DIR = os.path.dirname(BASE_DIR)
-TEMPLATE_DIR = os.path.join(APP_DIR, "templates")
-OUTPUT_DIR = os.path.join(APP_DIR, "static/outputs")
-os.makedirs(OUTPUT_DIR, exist_ok=True)
-
 def get_default_schema_dict():
     return {
         "case_title_info": {
@@ -112,101 +133,150 @@ def get_default_schema_dict():
         "final_judgment": ""
     }
 
-# --- Helpers (Unchanged) ---
-def get_template(template_name):
-    template_path = os.path.join(TEMPLATE_DIR, template_name)
-    if not os.path.exists(template_path): return None
-    return DocxTemplate(template_path)
-
-def sanitize_filename(text):
-    text = re.sub(r'[^\w\s-]', '', text).strip()
-    text = re.sub(r'[-\s]+', '-', text)
-    return text
-
-def generate_and_save_files(doc: DocxTemplate, context: dict, base_filename: str):
-    timestamp = int(time.time())
-    unique_filename = f"{base_filename}_{timestamp}"
-    output_docx_name = f"{unique_filename}.docx"
-    output_pdf_name = f"{unique_filename}.pdf"
-    output_docx_path = os.path.join(OUTPUT_DIR, output_docx_name)
-    output_pdf_path = os.path.join(OUTPUT_DIR, output_pdf_name)
-
-    doc.render(context)
-    doc.save(output_docx_path)
-    try:
-        docx2pdf.convert(output_docx_path, output_pdf_path)
-        pdf_url = f"/static/outputs/{output_pdf_name}"
-    except Exception as pdf_error:
-        print(f"Warning: PDF conversion failed: {pdf_error}")
-        pdf_url = None
-
-    return {
-        "docx_url": f"/static/outputs/{output_docx_name}",
-        "pdf_url": pdf_url
-    }
+# Judgments longer than this are truncated before they are summarised
+MAX_CHARS = SUMMARY_MAX_CHARS
 
-def extract_text_from_pdf(file_stream: io.BytesIO) -> str:
+def extract_text_from_pdf(file_stream: BinaryIO) -> str:
     try:
-        reader = pypdf.PdfReader(file_stream)
-        text = ""
-        for page in reader.pages: text += page.extract_text() or ""
-        return text.replace('\x00', '')
+        # Stop reading pages once the text would be truncated anyway
+        return cached_extract(
+            file_stream, "pdf", lambda f: pdf_parser.extract_text(f, max_chars=MAX_CHARS), max_chars=MAX_CHARS
+        )
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"PDF Error: {e}")
 
-def extract_text_from_docx(file_stream: io.BytesIO) -> str:
+def extract_text_from_docx(file_stream: BinaryIO) -> str:
     try:
-        document = docx.Document(file_stream)
-        text = ""
-        for para in document.paragraphs: text += para.text + "\n"
-        return text.replace('\x00', '')
+        return cached_extract(file_stream, "docx", docx_parser.extract_text).replace('\x00', '')
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"DOCX Error: {e}")
 
-@router.post("/upload-and-summarize")
-async def handle_summarize_upload(file: UploadFile = File(...)):
-    print("[summarizer] request start")
-    try:
-        contents = await file.read()
-        if not contents:
-            raise HTTPException(status_code=400, detail="Empty file.")
-        
-        file_stream = io.BytesIO(contents)
-        if file.content_type == "application/pdf":
-            print("[summarizer] reading pdf")
-            document_text = extract_text_from_pdf(file_stream)
-        elif "wordprocessingml" in file.content_type:
-            print("[summarizer] reading docx")
-            document_text = extract_text_from_docx(file_stream)
-        elif "text" in file.content_type:
-            print("[summarizer] reading text")
-            document_text = contents.decode("utf-8").replace('\x00', '')
-        else:
-            raise HTTPException(status_code=400, detail="Invalid file type.")
+async def _extract_json(model, content: str) -> dict:
+    response = await llm_gateway.send_message(model, content)
+    if not response.candidates:
+        raise HTTPException(status_code=400, detail="Blocked by safety filters.")
+    return json.loads(response.text)
 
-        if not document_text.strip():
-            raise HTTPException(status_code=400, detail="Extracted text is empty.")
-    except Exception as e:
-        print(f"File read error: {e}")
-        raise HTTPException(status_code=500, detail=f"File Error: {str(e)}")
+def _split_items(value) -> list:
+    """A list field, or a comma/semicolon separated string, as a list of items."""
+    if isinstance(value, list):
+        return [str(item).strip() for item in value if str(item).strip()]
+    return [item.strip() for item in re.split(r"[;,\n]", value or "") if item.strip()]
 
-    MAX_CHARS = 400000 
-    if len(document_text) > MAX_CHARS:
-        print(f"[summarizer] truncating text from {len(document_text)} chars")
-        document_text = document_text[:MAX_CHARS]
+def _unique(items: list) -> list:
+    seen = set()
+    unique = []
+    for item in items:
+        key = " ".join(item.lower().split())
+        if key not in seen:
+            seen.add(key)
+            unique.append(item)
+    return unique
+
+def merge_partial_summaries(partials: list) -> dict:
+    """
+    Reduces per-chunk JSON (in document order) to one get_default_schema_dict()
+    summary: header fields take the first value found, since titles, parties
+    and dates lead the judgment; sections and issues are unioned; the final
+    judgment comes from the last chunk that states one (the operative order
+    is at the end).
+    """
+    merged = get_default_schema_dict()
+    for group in ("case_title_info", "parties_involved", "dates"):
+        for field in merged[group]:
+            for partial in partials:
+                value = (partial.get(group) or {}).get(field)
+                if isinstance(value, str) and value.strip():
+                    merged[group][field] = value.strip()
+                    break
+    merged["sections_invoked"] = ", ".join(
+        _unique([item for partial in partials for item in _split_items(partial.get("sections_invoked"))])
+    )
+    merged["legal_issues"] = _unique(
+        [item for partial in partials for item in _split_items(partial.get("legal_issues"))]
+    )
+    for partial in reversed(partials):
+        value = partial.get("final_judgment")
+        if isinstance(value, str) and value.strip():
+            merged["final_judgment"] = value.strip()
+            break
+    return merged
 
+# --- Judgment Identity ---
+# Judgments on a common question share most of their text; only a summary of
+# the same case (case type and number, parties) may be reused for another upload.
+IDENTITY_HEADER_CHARS = 5000
+_CASE_NUMBER_RE = re.compile(
+    r"(?i)(?P<type>[A-Za-z.()]+(?:[ \t]+[A-Za-z.()]+){0,3})[ \t]*\bNos?\.?[ \t]*[:\-]?[ \t]*"
+    r"(?P<number>\d{1,6}(?:[ \t]*(?:of|/)[ \t]*(?:19|20)\d{2}))"
+)
+_VERSUS_RE = re.compile(r"(?i)\b(?:versus|vs\.?|v/s)(?!\w)")
+
+def _normalise(value: str) -> str:
+    return re.sub(r"\W+", " ", value).strip().lower()
+
+def judgment_identity(text: str):
+    """(case numbers, first party, second party) from the judgment's header, or None without a case number."""
+    header = text[:IDENTITY_HEADER_CHARS]
+    numbers = sorted({
+        _normalise(f"{match.group('type')} {match.group('number')}") for match in _CASE_NUMBER_RE.finditer(header)
+    })
+    if not numbers:
+        return None
+    parties = (None, None)
+    versus = _VERSUS_RE.search(header)
+    if versus:
+        before = [line for line in header[:versus.start()].split("\n") if line.strip()]
+        after = [line for line in header[versus.end():].split("\n") if line.strip()]
+        parties = (_normalise(before[-1]) if before else None, _normalise(after[0]) if after else None)
+    return (tuple(numbers), *parties)
+
+async def _summarize_chunks(chunks: list) -> dict:
+    """Map step over the chunks with bounded concurrency, then the merge."""
+    semaphore = asyncio.Semaphore(SUMMARY_MAX_CONCURRENCY)
+
+    async def summarize_chunk(index: int, chunk: str) -> dict:
+        async with semaphore:
+            return await _extract_json(chunk_model, f"[Part {index + 1} of {len(chunks)}]\n\n{chunk}")
+
+    partials = await asyncio.gather(*(summarize_chunk(i, chunk) for i, chunk in enumerate(chunks)))
+    return merge_partial_summaries(partials)
+
+async def summarize_text(document_text: str) -> dict:
+    """
+    Returns the parsed JSON summary of the judgment. Text within one chunk is
+    summarised in a single call; longer judgments go through the chunked
+    map-reduce so the whole document is covered. A near-duplicate upload of
+    a judgment summarised earlier (same case number and parties) reuses that
+    summary.
+    """
     try:
-        print("[summarizer] calling model")
-        chat_session = summarizer_model.start_chat()
-        response = chat_session.send_message(document_text)
-        if not response.candidates:
-            raise HTTPException(status_code=400, detail="Blocked by safety filters.")
-        json_response = json.loads(response.text)
+        key = judgment_identity(document_text)
+        signature, match = await run_in_threadpool(
+            similarity_checker.lookup, similarity_checker.judgment_summaries, document_text, key
+        )
+        if match is not None:
+            print(f"[summarizer] reusing the summary of a {match[1]:.0%} similar judgment")
+            return match[0]
+
+        chunks = split_text(document_text, SUMMARY_CHUNK_CHARS)
+        if len(chunks) <= 1:
+            print("[summarizer] calling model")
+            json_response = await _extract_json(summarizer_model, document_text)
+        else:
+            print(f"[summarizer] summarising {len(chunks)} chunks")
+            json_response = await _summarize_chunks(chunks)
         print("[summarizer] model response ok")
+        similarity_checker.remember(similarity_checker.judgment_summaries, signature, json_response, key)
+        return json_response
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"AI Error: {e}")
         raise HTTPException(status_code=500, detail=f"AI Error: {str(e)}")
 
+def render_summary(json_response: dict) -> dict:
+    """Merges the AI JSON over the default schema and renders the summary DOCX/PDF."""
     try:
         doc = get_template("summary_template.docx")
         if doc is None: raise HTTPException(status_code=500, detail="Template not found.")
@@ -256,3 +326,45 @@ async def handle_summarize_upload(file: UploadFile = File(...)):
     except Exception as e:
         print(f"Gen Error: {e}")
         raise HTTPException(status_code=500, detail=f"Gen Error: {str(e)}")
+
+async def summarize_and_render(document_text: str) -> dict:
+    json_response = await summarize_text(document_text)
+    return await run_in_threadpool(render_summary, json_response)
+
+@router.post("/upload-and-summarize")
+async def handle_summarize_upload(file: UploadFile = File(...), background: bool = False):
+    print("[summarizer] request start")
+    try:
+        if not file.size:
+            raise HTTPException(status_code=400, detail="Empty file.")
+        
+        file_stream = spooled_file(file, SUMMARIZER_UPLOAD_MAX_BYTES)
+        if file.content_type == "application/pdf":
+            print("[summarizer] reading pdf")
+            document_text = await run_in_threadpool(extract_text_from_pdf, file_stream)
+        elif "wordprocessingml" in file.content_type:
+            print("[summarizer] reading docx")
+            document_text = await run_in_threadpool(extract_text_from_docx, file_stream)
+        elif "text" in file.content_type:
+            print("[summarizer] reading text")
+            document_text = file_stream.read().decode("utf-8").replace('\x00', '')
+        else:
+            raise HTTPException(status_code=400, detail="Invalid file type.")
+
+        document_text = await run_in_threadpool(text_cleaner.clean, document_text)
+        if not document_text.strip():
+            raise HTTPException(status_code=400, detail="Extracted text is empty.")
+    except Exception as e:
+        if isinstance(e, HTTPException):
+            raise e
+        print(f"File read error: {e}")
+        raise HTTPException(status_code=500, detail=f"File Error: {str(e)}")
+
+    if len(document_text) > MAX_CHARS:
+        print(f"[summarizer] truncating text from {len(document_text)} chars")
+        document_text = document_text[:MAX_CHARS]
+
+    # The model call and rendering can take a while; optionally run them as a job
+    if background:
+        return submit_job(summarize_and_render, document_text)
+    return await summarize_and_render(document_text)
@@ -37,6 +37,145 @@ LEARNING_HUB_API_KEY = _get_api_key("LEARNING_HUB_API_KEY")
 # Tool 3 (Research Assistant)
 LEGAL_RESEARCH_API_KEY = _get_api_key("LEGAL_RESEARCH_API_KEY")
 
+# --- LLM Gateway Tuning ---
+# Max model calls in flight per worker process, and the per-call timeout (seconds).
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "64"))
+LLM_REQUEST_TIMEOUT = float(os.getenv("LLM_REQUEST_TIMEOUT", "120"))
+
+# --- Shared HTTP Client (Gemini REST calls) ---
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+HTTP_MAX_KEEPALIVE = int(os.getenv("HTTP_MAX_KEEPALIVE", "20"))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "30"))
+HTTP2_ENABLED = os.getenv("HTTP2_ENABLED", "true").lower() in ("1", "true", "yes")
+# Per-route read timeouts (seconds)
+CHATBOT_HTTP_TIMEOUT = float(os.getenv("CHATBOT_HTTP_TIMEOUT", "30"))
+DRAFTING_HTTP_TIMEOUT = float(os.getenv("DRAFTING_HTTP_TIMEOUT", "60"))
+
+# --- LLM Response Cache (deterministic endpoints) ---
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "1024"))
+LLM_CACHE_TTL = float(os.getenv("LLM_CACHE_TTL", "86400"))
+# Optional SQLite tier; leave unset to keep the cache in memory only.
+LLM_CACHE_DB_PATH = os.getenv("LLM_CACHE_DB_PATH")
+LLM_CACHE_DB_MAX_ENTRIES = int(os.getenv("LLM_CACHE_DB_MAX_ENTRIES", "50000"))
+
+# --- PDF Conversion Engine ---
+# "auto" uses a unoserver (headless LibreOffice) pool when the binary is on PATH,
+# docx2pdf (MS Word) on Windows/macOS, and disables PDF output otherwise.
+PDF_ENGINE = os.getenv("PDF_ENGINE", "auto").lower()
+PDF_WORKERS = int(os.getenv("PDF_WORKERS", str(min(4, os.cpu_count() or 1))))
+PDF_WORKER_BASE_PORT = int(os.getenv("PDF_WORKER_BASE_PORT", "0"))  # 0: free ports per app process
+PDF_CONVERT_TIMEOUT = float(os.getenv("PDF_CONVERT_TIMEOUT", "60"))
+UNOSERVER_BIN = os.getenv("UNOSERVER_BIN", "unoserver")
+
+# --- PDF Text Extraction ---
+# PDFs with at least PDF_PARSE_PARALLEL_MIN_PAGES pages are split into runs of
+# PDF_PARSE_PAGES_PER_TASK pages and extracted across PDF_PARSE_WORKERS processes.
+PDF_PARSE_WORKERS = int(os.getenv("PDF_PARSE_WORKERS", str(os.cpu_count() or 1)))
+PDF_PARSE_PAGES_PER_TASK = int(os.getenv("PDF_PARSE_PAGES_PER_TASK", "16"))
+PDF_PARSE_PARALLEL_MIN_PAGES = int(os.getenv("PDF_PARSE_PARALLEL_MIN_PAGES", "32"))
+
+# --- Local Retrieval (chatbot grounding) ---
+# scripts/generate_embeddings.py builds the index; without one the chatbot
+# answers ungrounded. RETRIEVAL_NPROBE clusters are scanned per query, and a
+# newly published index is picked up within RETRIEVAL_RELOAD_INTERVAL.
+EMBEDDINGS_INDEX_DIR = os.getenv(
+    "EMBEDDINGS_INDEX_DIR", os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "data", "embeddings")
+)
+RETRIEVAL_ENABLED = os.getenv("RETRIEVAL_ENABLED", "true").lower() in ("1", "true", "yes")
+RETRIEVAL_TOP_K = int(os.getenv("RETRIEVAL_TOP_K", "4"))
+RETRIEVAL_NPROBE = int(os.getenv("RETRIEVAL_NPROBE", "16"))
+RETRIEVAL_MIN_SCORE = float(os.getenv("RETRIEVAL_MIN_SCORE", "0.05"))
+RETRIEVAL_RELOAD_INTERVAL = float(os.getenv("RETRIEVAL_RELOAD_INTERVAL", "30"))  # seconds between checks for a new index
+
+# --- Chunked Judgment Summarization ---
+# Judgments longer than SUMMARY_CHUNK_CHARS are split on page/paragraph
+# boundaries and summarised chunk by chunk, SUMMARY_MAX_CONCURRENCY chunks at a
+# time per request. Text past SUMMARY_MAX_CHARS is not read.
+SUMMARY_CHUNK_CHARS = int(os.getenv("SUMMARY_CHUNK_CHARS", "80000"))
+SUMMARY_MAX_CONCURRENCY = int(os.getenv("SUMMARY_MAX_CONCURRENCY", "4"))
+SUMMARY_MAX_CHARS = int(os.getenv("SUMMARY_MAX_CHARS", "2000000"))
+
+# --- Extracted Text Cache ---
+# Text parsed from uploaded PDF/DOCX files, keyed by the SHA-256 of the bytes.
+TEXT_CACHE_ENABLED = os.getenv("TEXT_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+TEXT_CACHE_DIR = os.getenv(
+    "TEXT_CACHE_DIR", os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "cache", "extracted_text")
+)
+TEXT_CACHE_MAX_BYTES = int(os.getenv("TEXT_CACHE_MAX_BYTES", str(512 * 1024 ** 2)))
+
+# --- Extracted Text Cleaning ---
+# Page headers/footers, page numbers, hyphenation breaks and extra whitespace
+# are stripped from uploaded documents before they reach the model.
+TEXT_CLEANING_ENABLED = os.getenv("TEXT_CLEANING_ENABLED", "true").lower() in ("1", "true", "yes")
+
+# --- Upload Limits ---
+# Request bodies over these sizes are refused with 413 while still arriving.
+FIR_UPLOAD_MAX_BYTES = int(os.getenv("FIR_UPLOAD_MAX_BYTES", str(10 * 1024 ** 2)))
+SUMMARIZER_UPLOAD_MAX_BYTES = int(os.getenv("SUMMARIZER_UPLOAD_MAX_BYTES", str(50 * 1024 ** 2)))
+
+# --- Batch FIR Analysis ---
+# One batch request (files and/or zips) may carry FIR_BATCH_MAX_FILES documents
+# in FIR_BATCH_MAX_BYTES; FIR_BATCH_MAX_CONCURRENCY model calls run at a time.
+FIR_BATCH_MAX_FILES = int(os.getenv("FIR_BATCH_MAX_FILES", "50"))
+FIR_BATCH_MAX_BYTES = int(os.getenv("FIR_BATCH_MAX_BYTES", str(100 * 1024 ** 2)))
+FIR_BATCH_MAX_CONCURRENCY = int(os.getenv("FIR_BATCH_MAX_CONCURRENCY", "8"))
+
+# --- Near-Duplicate Reuse ---
+# A FIR or judgment whose text is at least NEAR_DUPLICATE_THRESHOLD similar
+# (estimated Jaccard similarity of word 5-grams) to one this worker already
+# analysed or summarised reuses that result instead of calling the model.
+# Each endpoint remembers its last NEAR_DUPLICATE_MAX_ENTRIES documents.
+NEAR_DUPLICATE_ENABLED = os.getenv("NEAR_DUPLICATE_ENABLED", "true").lower() in ("1", "true", "yes")
+NEAR_DUPLICATE_THRESHOLD = float(os.getenv("NEAR_DUPLICATE_THRESHOLD", "0.95"))
+NEAR_DUPLICATE_MAX_ENTRIES = int(os.getenv("NEAR_DUPLICATE_MAX_ENTRIES", "10000"))
+
+# --- Local FIR Field Extraction ---
+# FIR fields found locally with at least NER_MIN_CONFIDENCE are not asked of the
+# model, which only gets NER_WINDOW_CHARS-sized windows around the cues of the
+# remaining fields. NER_POLICE_STATIONS_FILE is an optional gazetteer, one
+# station name per line.
+NER_PREEXTRACT_ENABLED = os.getenv("NER_PREEXTRACT_ENABLED", "true").lower() in ("1", "true", "yes")
+NER_MIN_CONFIDENCE = float(os.getenv("NER_MIN_CONFIDENCE", "0.8"))
+NER_WINDOW_CHARS = int(os.getenv("NER_WINDOW_CHARS", "600"))
+NER_POLICE_STATIONS_FILE = os.getenv("NER_POLICE_STATIONS_FILE")
+
+# --- Background Document Jobs ---
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+JOB_QUEUE_DEPTH = int(os.getenv("JOB_QUEUE_DEPTH", "100"))
+JOB_RESULT_TTL = float(os.getenv("JOB_RESULT_TTL", "3600"))
+
+# --- Generated File Lifecycle (static/outputs) ---
+OUTPUT_MAX_AGE = float(os.getenv("OUTPUT_MAX_AGE", str(7 * 24 * 3600)))  # seconds since last use
+OUTPUT_MAX_BYTES = int(os.getenv("OUTPUT_MAX_BYTES", str(2 * 1024 ** 3)))
+OUTPUT_SWEEP_INTERVAL = float(os.getenv("OUTPUT_SWEEP_INTERVAL", "600"))
+
+# --- MySQL Connection Pool ---
+# DB_POOL_SIZE caps the open connections of each pool (blocking and asyncio),
+# per worker process; further callers wait up to DB_POOL_TIMEOUT.
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "10"))  # seconds to wait for a free connection
+DB_POOL_RECYCLE = float(os.getenv("DB_POOL_RECYCLE", "1800"))  # reconnect connections older than this
+
+# --- Password Hashing ---
+# Raising BCRYPT_ROUNDS upgrades existing hashes as users log in.
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+BCRYPT_WORKERS = int(os.getenv("BCRYPT_WORKERS", str(os.cpu_count() or 1)))
+
+# --- Chat History ---
+# The last CHAT_HISTORY_MAX_TURNS turns are sent back to the model verbatim;
+# older turns are folded into a running summary every CHAT_SUMMARY_EVERY turns.
+# Summary plus verbatim turns never exceed CHAT_HISTORY_TOKEN_BUDGET (estimated)
+# tokens. New turns are written in batches.
+CHAT_HISTORY_MAX_TURNS = int(os.getenv("CHAT_HISTORY_MAX_TURNS", "10"))
+CHAT_HISTORY_TOKEN_BUDGET = int(os.getenv("CHAT_HISTORY_TOKEN_BUDGET", "3000"))
+CHAT_HISTORY_BATCH_SIZE = int(os.getenv("CHAT_HISTORY_BATCH_SIZE", "50"))
+CHAT_HISTORY_FLUSH_INTERVAL = float(os.getenv("CHAT_HISTORY_FLUSH_INTERVAL", "1"))
+CHAT_SUMMARY_ENABLED = os.getenv("CHAT_SUMMARY_ENABLED", "true").lower() in ("1", "true", "yes")
+CHAT_SUMMARY_EVERY = int(os.getenv("CHAT_SUMMARY_EVERY", "4"))
+CHAT_SUMMARY_MAX_TOKENS = int(os.getenv("CHAT_SUMMARY_MAX_TOKENS", "400"))
+CHAT_SUMMARY_CACHE_ENTRIES = int(os.getenv("CHAT_SUMMARY_CACHE_ENTRIES", "10000"))
+
 
 def _warn_missing(name, value):
     if not value:
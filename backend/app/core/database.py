@@ -1,21 +1,322 @@
+import asyncio
 import mysql.connector
+import mysql.connector.aio
+from mysql.connector import pooling
+from contextlib import asynccontextmanager
 import os
+import threading
+import time
 from dotenv import load_dotenv
 
 # Load .env file (it's in the 'backend' folder, one level up from 'app')
 APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 load_dotenv(os.path.join(APP_DIR, '.env'))
 
+from app.core.config import DB_POOL_SIZE, DB_POOL_TIMEOUT, DB_POOL_RECYCLE
+
+# --- Connection Pool ---
+# Opening a MySQL connection costs a TCP handshake, TLS/auth exchange and
+# session setup, which used to be paid on every signup, login and reset. Routes
+# now borrow a connection from a shared pool; `conn.close()` hands it back
+# (rolled back, with its session reset) instead of tearing it down, so callers
+# are unchanged. On checkout the pool pings the connection and reconnects it
+# if the server dropped it, and connections older than DB_POOL_RECYCLE are
+# reopened so they never hit the server's wait_timeout mid-request. Callers
+# that find the pool exhausted wait on a condition for a returned connection.
+class PooledConnection:
+    """A borrowed connection; `close()` returns it to the pool."""
+
+    def __init__(self, pool, cnx):
+        self._pool = pool
+        self._cnx = cnx
+
+    def __getattr__(self, name):
+        return getattr(self._cnx, name)
+
+    def close(self):
+        if self._cnx is not None:
+            cnx, self._cnx = self._cnx, None
+            self._pool.put(cnx)
+
+
+class ConnectionPool:
+    """Up to `size` blocking connections, health-checked and recycled on checkout."""
+
+    def __init__(self, size: int, timeout: float, recycle: float):
+        self.size = size
+        self.timeout = timeout
+        self.recycle = recycle
+        self._available = threading.Condition()
+        self._idle = []  # [(connection, opened_at)], most recently returned last
+        self._opened_at = {}  # id(checked-out connection) -> time it was (re)connected
+        self._open = 0
+        self._closed = False
+
+    def get(self) -> PooledConnection:
+        deadline = time.monotonic() + self.timeout
+        with self._available:
+            while not self._idle and self._open >= self.size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise pooling.PoolError("Timed out waiting for a database connection.")
+                _stats["waits"] += 1
+                self._available.wait(remaining)
+            if self._idle:
+                cnx, opened_at = self._idle.pop()
+            else:
+                cnx, opened_at = None, None
+                self._open += 1
+        # Connect and health-check outside the lock
+        try:
+            now = time.monotonic()
+            if cnx is None:
+                cnx = mysql.connector.connect(**_db_config())
+                opened_at = now
+            elif now - opened_at > self.recycle:
+                cnx.reconnect()
+                opened_at = now
+                _stats["recycled"] += 1
+            else:
+                cnx.ping(reconnect=True, attempts=1)
+        except BaseException:
+            self._release_slot()
+            raise
+        self._opened_at[id(cnx)] = opened_at
+        _stats["checkouts"] += 1
+        return PooledConnection(self, cnx)
+
+    def put(self, cnx):
+        if not self._closed:
+            try:
+                # Ends any open transaction, so the next borrower never reads
+                # from a stale REPEATABLE READ snapshot
+                cnx.reset_session()
+            except mysql.connector.Error:
+                pass
+            else:
+                with self._available:
+                    self._idle.append((cnx, self._opened_at.pop(id(cnx))))
+                    self._available.notify()
+                return
+        self._opened_at.pop(id(cnx), None)
+        try:
+            cnx.close()
+        except mysql.connector.Error:
+            pass
+        self._release_slot()
+
+    def _release_slot(self):
+        with self._available:
+            self._open -= 1
+            self._available.notify()
+
+    def close(self):
+        with self._available:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._open -= len(idle)
+        for cnx, _ in idle:
+            try:
+                cnx.close()
+            except mysql.connector.Error:
+                pass
+
+
+_pool = None
+_pool_lock = threading.Lock()
+_stats = {"checkouts": 0, "waits": 0, "recycled": 0, "errors": 0}
+
+
+def _db_config() -> dict:
+    return {
+        "user": os.getenv('DB_USER'),
+        "password": os.getenv('DB_PASSWORD'),
+        "host": os.getenv('DB_HOST'),
+        "database": os.getenv('DB_NAME'),
+    }
+
+
+def _get_pool() -> ConnectionPool:
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool(max(1, DB_POOL_SIZE), DB_POOL_TIMEOUT, DB_POOL_RECYCLE)
+    return _pool
+
+
 def get_db_connection():
-    """Establishes a connection to the MySQL database."""
+    """Borrows a connection from the MySQL pool. Call `close()` to return it."""
     try:
-        conn = mysql.connector.connect(
-            user=os.getenv('DB_USER'),
-            password=os.getenv('DB_PASSWORD'),
-            host=os.getenv('DB_HOST'),
-            database=os.getenv('DB_NAME')
-        )
-        return conn
+        return _get_pool().get()
     except mysql.connector.Error as err:
+        _stats["errors"] += 1
         print(f"Error connecting to database: {err}")
-        return None
\ No newline at end of file
+        return None
+
+
+def close_pool():
+    """Closes idle pooled connections (called on app shutdown)."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+            _pool = None
+
+
+def pool_stats() -> dict:
+    return {
+        "size": _pool.size if _pool is not None else 0,
+        "recycle_seconds": DB_POOL_RECYCLE,
+        **_stats,
+        "async": _async_pool.stats() if _async_pool is not None else None,
+    }
+
+
+# --- Async Connection Pool ---
+# The same idea for async handlers, on mysql-connector's asyncio driver, so a
+# query suspends the handler instead of blocking the event loop. Each pooled
+# connection keeps its prepared statements, so hot lookups are parsed by the
+# server once per connection rather than once per request. Connections run in
+# autocommit mode: a pooled connection left inside an implicit transaction
+# would keep serving reads from its old REPEATABLE READ snapshot and miss rows
+# committed since (a login right after signup, a reset right after the token
+# was issued).
+class AsyncConnection:
+    """A pooled asyncio connection plus its cache of prepared cursors."""
+
+    def __init__(self, cnx):
+        self.cnx = cnx
+        self.opened_at = time.monotonic()
+        self._prepared = {}
+
+    async def fetch_all(self, query: str, params: tuple = (), prepared: bool = False) -> list:
+        """Runs a SELECT and returns all rows as dicts."""
+        if prepared:
+            # Cursors are cached by the query string; re-executing the same
+            # string skips COM_STMT_PREPARE and only sends the parameters.
+            cursor = self._prepared.get(query)
+            if cursor is None:
+                cursor = await self.cnx.cursor(prepared=True, dictionary=True)
+                self._prepared[query] = cursor
+            await cursor.execute(query, params)
+            return await cursor.fetchall()
+        cursor = await self.cnx.cursor(dictionary=True)
+        try:
+            await cursor.execute(query, params)
+            return await cursor.fetchall()
+        finally:
+            await cursor.close()
+
+    async def fetch_one(self, query: str, params: tuple = (), prepared: bool = False):
+        """Runs a SELECT and returns the first row as a dict, or None."""
+        rows = await self.fetch_all(query, params, prepared)
+        return rows[0] if rows else None
+
+    async def execute(self, query: str, params: tuple = ()) -> int:
+        """Runs a write and commits it. Returns the cursor's lastrowid."""
+        cursor = await self.cnx.cursor()
+        try:
+            await cursor.execute(query, params)
+            await self.cnx.commit()
+            return cursor.lastrowid
+        finally:
+            await cursor.close()
+
+    async def execute_many(self, query: str, rows: list):
+        """Runs one write for many parameter rows (a multi-row INSERT) and commits."""
+        cursor = await self.cnx.cursor()
+        try:
+            await cursor.executemany(query, rows)
+            await self.cnx.commit()
+        finally:
+            await cursor.close()
+
+    async def close(self):
+        try:
+            await self.cnx.close()
+        except Exception:
+            pass
+
+
+class AsyncConnectionPool:
+    """Up to `size` asyncio connections, health-checked and recycled on checkout."""
+
+    def __init__(self, size: int, timeout: float, recycle: float):
+        self.size = size
+        self.timeout = timeout
+        self.recycle = recycle
+        self.loop = asyncio.get_running_loop()
+        self._slots = asyncio.Semaphore(size)
+        self._idle = asyncio.LifoQueue()
+        self._stats = {"checkouts": 0, "opened": 0, "recycled": 0, "discarded": 0}
+
+    async def _open(self) -> AsyncConnection:
+        cnx = await mysql.connector.aio.connect(**_db_config(), autocommit=True)
+        self._stats["opened"] += 1
+        return AsyncConnection(cnx)
+
+    async def _checkout(self) -> AsyncConnection:
+        while not self._idle.empty():
+            conn = self._idle.get_nowait()
+            if time.monotonic() - conn.opened_at > self.recycle:
+                self._stats["recycled"] += 1
+            elif await conn.cnx.is_connected():
+                return conn
+            else:
+                self._stats["discarded"] += 1
+            await conn.close()
+        return await self._open()
+
+    @asynccontextmanager
+    async def connection(self):
+        try:
+            await asyncio.wait_for(self._slots.acquire(), self.timeout)
+        except asyncio.TimeoutError:
+            raise mysql.connector.errors.PoolError("Timed out waiting for a database connection.")
+        conn = None
+        try:
+            conn = await self._checkout()
+            self._stats["checkouts"] += 1
+            yield conn
+        except BaseException:
+            # Roll back whatever the failed request left open; drop the
+            # connection if even that fails.
+            if conn is not None:
+                try:
+                    await conn.cnx.rollback()
+                except Exception:
+                    await conn.close()
+                    self._stats["discarded"] += 1
+                    conn = None
+            raise
+        finally:
+            if conn is not None:
+                self._idle.put_nowait(conn)
+            self._slots.release()
+
+    async def close(self):
+        while not self._idle.empty():
+            await self._idle.get_nowait().close()
+
+    def stats(self) -> dict:
+        return {"size": self.size, "idle": self._idle.qsize(), **self._stats}
+
+
+_async_pool = None
+
+
+def get_async_pool() -> AsyncConnectionPool:
+    """The async pool for the running event loop (connections cannot cross loops)."""
+    global _async_pool
+    if _async_pool is None or _async_pool.loop is not asyncio.get_running_loop():
+        _async_pool = AsyncConnectionPool(max(1, DB_POOL_SIZE), DB_POOL_TIMEOUT, DB_POOL_RECYCLE)
+    return _async_pool
+
+
+async def close_async_pool():
+    """Closes idle async connections (called on app shutdown)."""
+    global _async_pool
+    if _async_pool is not None:
+        await _async_pool.close()
+        _async_pool = None
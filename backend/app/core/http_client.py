@@ -0,0 +1,73 @@
+import httpx
+
+from app.core.config import (
+    HTTP_MAX_CONNECTIONS,
+    HTTP_MAX_KEEPALIVE,
+    HTTP_KEEPALIVE_EXPIRY,
+    HTTP2_ENABLED,
+    CHATBOT_HTTP_TIMEOUT,
+    DRAFTING_HTTP_TIMEOUT,
+)
+
+# --- App-Lifetime HTTP Client ---
+# One pooled client for all Gemini REST calls, so requests reuse warm
+# TCP/TLS connections (and multiplex over HTTP/2) instead of paying a fresh
+# handshake each time. It is opened and closed by the lifespan hooks in main.py.
+
+# --- Per-Route Timeouts ---
+CHATBOT_TIMEOUT = httpx.Timeout(CHATBOT_HTTP_TIMEOUT, connect=5.0)
+DRAFTING_TIMEOUT = httpx.Timeout(DRAFTING_HTTP_TIMEOUT, connect=5.0)
+
+_client: httpx.AsyncClient | None = None
+
+
+def _http2_available() -> bool:
+    """HTTP/2 needs the optional 'h2' package (installed via httpx[http2])."""
+    if not HTTP2_ENABLED:
+        return False
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        print("Warning: 'h2' is not installed; the shared HTTP client will use HTTP/1.1.")
+        return False
+
+
+def _build_client() -> httpx.AsyncClient:
+    limits = httpx.Limits(
+        max_connections=HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=HTTP_MAX_KEEPALIVE,
+        keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+    )
+    return httpx.AsyncClient(
+        http2=_http2_available(),
+        limits=limits,
+        timeout=httpx.Timeout(60.0, connect=5.0),
+        headers={"Content-Type": "application/json"},
+    )
+
+
+async def start_http_client():
+    """Creates the shared client. Called once from the app's startup hook."""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = _build_client()
+
+
+async def close_http_client():
+    """Closes the shared client and its pooled connections on shutdown."""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """
+    Returns the shared client. Falls back to creating it lazily so services
+    still work when used outside the FastAPI app (scripts, benchmarks).
+    """
+    global _client
+    if _client is None or _client.is_closed:
+        _client = _build_client()
+    return _client
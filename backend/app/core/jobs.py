@@ -0,0 +1,168 @@
+import asyncio
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse
+
+from app.core.config import JOB_WORKERS, JOB_QUEUE_DEPTH, JOB_RESULT_TTL
+
+# --- Background Job Executor ---
+# Document endpoints can hand their render/save/PDF work to this executor and
+# return a job id straight away; clients poll GET /api/v1/jobs/{id}. A fixed
+# number of worker threads drain the queue, and admission is capped at
+# workers + queue depth so a burst is refused with 503 instead of piling up.
+# Coroutine jobs run as tasks on the app's event loop instead of holding a
+# worker thread while they wait; at most `workers` of them run at once.
+#
+# Jobs live in this process's memory: run the app as a single worker process
+# (or route each client's polls back to the same worker), otherwise a poll
+# that lands on another worker gets 404.
+
+
+class JobQueueFull(Exception):
+    pass
+
+
+class Job:
+    def __init__(self):
+        self.id = uuid.uuid4().hex
+        self.status = "queued"
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.finished_at = None
+
+    def to_dict(self) -> dict:
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "result": self.result,
+            "error": self.error,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class JobManager:
+    def __init__(self, workers: int, queue_depth: int, result_ttl: float):
+        self.workers = workers
+        self.queue_depth = queue_depth
+        self.result_ttl = result_ttl
+        self._slots = threading.BoundedSemaphore(workers + queue_depth)
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._executor = None
+        self._loop = None
+        self._async_slots = None
+        self._tasks = set()
+
+    def start(self, loop=None):
+        """Creates the worker pool. `loop` runs coroutine jobs (the app's event loop)."""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="job")
+        if loop is not None and loop is not self._loop:
+            self._loop = loop
+            self._async_slots = asyncio.Semaphore(self.workers)
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        for task in list(self._tasks):
+            task.cancel()
+
+    def submit(self, fn, *args) -> Job:
+        """
+        Queues `fn(*args)`. Coroutine functions must be submitted from the
+        app's event loop and run there as tasks; the rest go to the threads.
+        """
+        if not self._slots.acquire(blocking=False):
+            raise JobQueueFull()
+        job = Job()
+        try:
+            if asyncio.iscoroutinefunction(fn):
+                self.start(asyncio.get_running_loop())
+                task = self._loop.create_task(self._run_async(job, fn, args))
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+            else:
+                self.start(self._loop)
+                self._executor.submit(self._run, job, fn, args)
+        except BaseException:
+            self._slots.release()
+            raise
+        self._prune()
+        with self._lock:
+            self._jobs[job.id] = job
+        return job
+
+    def _run(self, job: Job, fn, args):
+        job.status = "running"
+        try:
+            job.result = fn(*args)
+            job.status = "done"
+        except Exception as e:
+            self._fail(job, e)
+        finally:
+            job.finished_at = time.time()
+            self._slots.release()
+
+    async def _run_async(self, job: Job, fn, args):
+        try:
+            async with self._async_slots:
+                job.status = "running"
+                job.result = await fn(*args)
+                job.status = "done"
+        except Exception as e:
+            self._fail(job, e)
+        finally:
+            job.finished_at = time.time()
+            self._slots.release()
+
+    def _fail(self, job: Job, e: Exception):
+        if isinstance(e, HTTPException):
+            job.error = e.detail
+        else:
+            print(f"Job {job.id} failed: {e}")
+            job.error = str(e)
+        job.status = "failed"
+
+    def get(self, job_id: str):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _prune(self):
+        cutoff = time.time() - self.result_ttl
+        with self._lock:
+            expired = [
+                job_id for job_id, job in self._jobs.items()
+                if job.finished_at is not None and job.finished_at < cutoff
+            ]
+            for job_id in expired:
+                del self._jobs[job_id]
+
+    def stats(self) -> dict:
+        with self._lock:
+            jobs = list(self._jobs.values())
+        counts = {"queued": 0, "running": 0, "done": 0, "failed": 0}
+        for job in jobs:
+            counts[job.status] += 1
+        return {"workers": self.workers, "queue_depth": self.queue_depth, **counts}
+
+
+job_manager = JobManager(JOB_WORKERS, JOB_QUEUE_DEPTH, JOB_RESULT_TTL)
+
+
+def submit_job(fn, *args) -> JSONResponse:
+    """Queues a job and returns the 202 response routes hand back to the client."""
+    try:
+        job = job_manager.submit(fn, *args)
+    except JobQueueFull:
+        raise HTTPException(status_code=503, detail="Server is busy generating documents. Please retry shortly.")
+    return JSONResponse(
+        status_code=202,
+        content={"job_id": job.id, "status": "queued", "status_url": f"/api/v1/jobs/{job.id}"},
+    )
@@ -0,0 +1,83 @@
+import asyncio
+
+from app.core.cache import LRUCache, SQLiteCache, TieredCache, make_key, normalize_text
+from app.core.config import (
+    LLM_MAX_CONCURRENCY,
+    LLM_REQUEST_TIMEOUT,
+    LLM_CACHE_ENABLED,
+    LLM_CACHE_MAX_ENTRIES,
+    LLM_CACHE_TTL,
+    LLM_CACHE_DB_PATH,
+    LLM_CACHE_DB_MAX_ENTRIES,
+)
+
+# --- Shared Async Gateway for Gemini Calls ---
+# Every route used to call the blocking `chat_session.send_message(...)` straight
+# from an `async def` handler, which froze the whole event loop for the length of
+# the model call. All model traffic now goes through here instead: we use the
+# SDK's native async API, and a semaphore caps how many calls one worker keeps
+# in flight so a burst of users cannot exhaust sockets or quota.
+_semaphore = asyncio.Semaphore(LLM_MAX_CONCURRENCY)
+
+# --- Response Cache for Deterministic Endpoints ---
+response_cache = TieredCache(
+    "llm_responses",
+    LRUCache(LLM_CACHE_MAX_ENTRIES, LLM_CACHE_TTL),
+    SQLiteCache(LLM_CACHE_DB_PATH, LLM_CACHE_DB_MAX_ENTRIES, LLM_CACHE_TTL) if LLM_CACHE_DB_PATH else None,
+)
+
+
+async def send_message(model, content, history=None):
+    """
+    Sends `content` to `model` in a fresh chat session without blocking the loop.
+    Returns the SDK response object, exactly like `chat_session.send_message`.
+    """
+    async with _semaphore:
+        chat_session = model.start_chat(history=history or [])
+        try:
+            return await asyncio.wait_for(
+                chat_session.send_message_async(content),
+                timeout=LLM_REQUEST_TIMEOUT,
+            )
+        except asyncio.TimeoutError:
+            raise TimeoutError(f"Model call timed out after {LLM_REQUEST_TIMEOUT:.0f} seconds.")
+
+
+async def stream_message(model, content, history=None):
+    """
+    Like `send_message`, but yields response chunks as the model produces them.
+    The timeout applies to the wait for the first chunk.
+    """
+    async with _semaphore:
+        chat_session = model.start_chat(history=history or [])
+        try:
+            response = await asyncio.wait_for(
+                chat_session.send_message_async(content, stream=True),
+                timeout=LLM_REQUEST_TIMEOUT,
+            )
+        except asyncio.TimeoutError:
+            raise TimeoutError(f"Model call timed out after {LLM_REQUEST_TIMEOUT:.0f} seconds.")
+        async for chunk in response:
+            yield chunk
+
+
+def cache_scope(model_name: str, system_instruction: str, generation_config: dict) -> str:
+    """
+    Cache namespace for one model setup. Build it from the same values passed
+    to `genai.GenerativeModel`: everything that changes the answer (model name,
+    system prompt, generation config with temperature and schema) is in it.
+    """
+    return make_key(model_name, system_instruction, generation_config)
+
+
+async def get_cached(scope: str, content: str):
+    """Returns a previously stored parsed response for this scope + input, or None."""
+    if not LLM_CACHE_ENABLED:
+        return None
+    return await response_cache.get_async(make_key(scope, normalize_text(content)))
+
+
+async def store_cached(scope: str, content: str, value):
+    """Stores a parsed (JSON-serialisable) response for this scope + input."""
+    if LLM_CACHE_ENABLED:
+        await response_cache.set_async(make_key(scope, normalize_text(content)), value)
@@ -0,0 +1,138 @@
+import mysql.connector
+
+from app.core.database import _db_config
+
+# --- Versioned Schema Migrations ---
+# Each migration runs once, in version order, and is recorded in
+# `schema_migrations`. Steps also check information_schema before changing
+# anything, so a database that was created by the old create_tables.py or
+# patched by hand is brought to the same schema without errors.
+# Append new migrations to the end of MIGRATIONS; never edit an applied one.
+
+
+def _column_exists(cursor, table: str, column: str) -> bool:
+    cursor.execute(
+        "SELECT 1 FROM information_schema.columns "
+        "WHERE table_schema = DATABASE() AND table_name = %s AND column_name = %s",
+        (table, column),
+    )
+    return cursor.fetchone() is not None
+
+
+def _index_exists(cursor, table: str, index: str) -> bool:
+    cursor.execute(
+        "SELECT 1 FROM information_schema.statistics "
+        "WHERE table_schema = DATABASE() AND table_name = %s AND index_name = %s",
+        (table, index),
+    )
+    return cursor.fetchone() is not None
+
+
+def _add_column(cursor, table: str, column: str, definition: str):
+    if not _column_exists(cursor, table, column):
+        cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+
+
+def _add_index(cursor, table: str, index: str, columns: str):
+    if not _index_exists(cursor, table, index):
+        cursor.execute(f"CREATE INDEX {index} ON {table} ({columns})")
+
+
+# --- Migrations ---
+def _001_create_tables(cursor):
+    cursor.execute(
+        "CREATE TABLE IF NOT EXISTS users ("
+        "    id INT AUTO_INCREMENT PRIMARY KEY,"
+        "    name VARCHAR(255) NOT NULL,"
+        "    email VARCHAR(255) NOT NULL UNIQUE,"
+        "    hashed_password VARCHAR(255) NOT NULL,"
+        "    phone_number VARCHAR(20) NULL,"
+        "    gender ENUM('male', 'female', 'other', 'prefer_not_to_say') DEFAULT 'prefer_not_to_say',"
+        "    profile_pic MEDIUMTEXT NULL,"
+        "    reset_token VARCHAR(255) NULL,"
+        "    reset_token_expires DATETIME NULL,"
+        "    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP"
+        ")"
+    )
+    cursor.execute(
+        "CREATE TABLE IF NOT EXISTS chat_history ("
+        "    id INT AUTO_INCREMENT PRIMARY KEY,"
+        "    user_id INT NOT NULL,"
+        "    session_id VARCHAR(255) NOT NULL,"
+        "    message_text TEXT NOT NULL,"
+        "    response_text TEXT NOT NULL,"
+        "    relevant_law VARCHAR(1024) NULL,"
+        "    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,"
+        "    FOREIGN KEY (user_id) REFERENCES users(id)"
+        ")"
+    )
+
+
+def _002_align_users_columns(cursor):
+    # Tables from the old create_tables.py used `phone` and had no profile/reset columns
+    if _column_exists(cursor, "users", "phone") and not _column_exists(cursor, "users", "phone_number"):
+        cursor.execute("ALTER TABLE users CHANGE COLUMN phone phone_number VARCHAR(20) NULL")
+    _add_column(cursor, "users", "phone_number", "VARCHAR(20) NULL")
+    _add_column(cursor, "users", "profile_pic", "MEDIUMTEXT NULL")
+    _add_column(cursor, "users", "reset_token", "VARCHAR(255) NULL")
+    _add_column(cursor, "users", "reset_token_expires", "DATETIME NULL")
+
+
+def _003_lookup_indexes(cursor):
+    _add_index(cursor, "users", "idx_users_reset_token", "reset_token")
+    _add_index(cursor, "users", "idx_users_phone_number", "phone_number")
+    _add_index(cursor, "chat_history", "idx_chat_history_user_session_created", "user_id, session_id, created_at")
+
+
+MIGRATIONS = [
+    (1, "create users and chat_history", _001_create_tables),
+    (2, "align users columns with the API", _002_align_users_columns),
+    (3, "index reset_token, phone_number and chat history lookups", _003_lookup_indexes),
+]
+
+
+def applied_versions(cursor) -> set:
+    cursor.execute(
+        "CREATE TABLE IF NOT EXISTS schema_migrations ("
+        "    version INT PRIMARY KEY,"
+        "    name VARCHAR(255) NOT NULL,"
+        "    applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP"
+        ")"
+    )
+    cursor.execute("SELECT version FROM schema_migrations")
+    return {row[0] for row in cursor.fetchall()}
+
+
+def migrate(connection=None) -> list:
+    """
+    Applies pending migrations and returns the versions it ran. Safe to call
+    repeatedly and from several processes: a named lock serialises runners.
+    """
+    own_connection = connection is None
+    if own_connection:
+        connection = mysql.connector.connect(**_db_config())
+    cursor = connection.cursor()
+    try:
+        cursor.execute("SELECT GET_LOCK('kanoonai_migrations', 60)")
+        if cursor.fetchone()[0] != 1:
+            raise RuntimeError("Timed out waiting for another migration run to finish.")
+        try:
+            done = applied_versions(cursor)
+            ran = []
+            for version, name, apply in MIGRATIONS:
+                if version in done:
+                    continue
+                print(f"Applying migration {version:03d}: {name}")
+                # MySQL commits DDL implicitly, so each step must be idempotent on its own
+                apply(cursor)
+                cursor.execute("INSERT INTO schema_migrations (version, name) VALUES (%s, %s)", (version, name))
+                connection.commit()
+                ran.append(version)
+            return ran
+        finally:
+            cursor.execute("SELECT RELEASE_LOCK('kanoonai_migrations')")
+            cursor.fetchone()
+    finally:
+        cursor.close()
+        if own_connection:
+            connection.close()
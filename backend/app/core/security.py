@@ -1,11 +1,74 @@
+import asyncio
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
 import bcrypt
 
+from app.core.config import BCRYPT_ROUNDS, BCRYPT_WORKERS
+
+# --- Password Hashing Pool ---
+# A bcrypt hash or check burns 100-300 ms of CPU at the default cost. Running it
+# inline in the auth handlers pinned a threadpool thread per login, so a login
+# storm starved the sync document routes sharing that pool. The work now runs in
+# a dedicated process pool sized to the CPU count; async handlers await it
+# without holding any thread. Workers are spawned (not forked) and only ever
+# import bcrypt, so they stay small and never inherit app state.
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ProcessPoolExecutor(
+                    max_workers=max(1, BCRYPT_WORKERS),
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+    return _executor
+
+
+def shutdown_hash_pool():
+    """Stops the hashing workers (called on app shutdown)."""
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
+
+
 def hash_password(password: str) -> str:
     """Hashes a password using bcrypt."""
-    salt = bcrypt.gensalt()
+    salt = bcrypt.gensalt(rounds=BCRYPT_ROUNDS)
     hashed_pw = bcrypt.hashpw(password.encode('utf-8'), salt)
     return hashed_pw.decode('utf-8')
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verifies a plain password against a hashed one."""
-    return bcrypt.checkpw(plain_password.encode('utf-8'), hashed_password.encode('utf-8'))
\ No newline at end of file
+    return bcrypt.checkpw(plain_password.encode('utf-8'), hashed_password.encode('utf-8'))
+
+
+async def hash_password_async(password: str) -> str:
+    """Like `hash_password`, but runs bcrypt in the hashing pool."""
+    salt = bcrypt.gensalt(rounds=BCRYPT_ROUNDS)
+    loop = asyncio.get_running_loop()
+    hashed_pw = await loop.run_in_executor(_get_executor(), bcrypt.hashpw, password.encode('utf-8'), salt)
+    return hashed_pw.decode('utf-8')
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Like `verify_password`, but runs bcrypt in the hashing pool."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        _get_executor(), bcrypt.checkpw, plain_password.encode('utf-8'), hashed_password.encode('utf-8')
+    )
+
+
+def needs_rehash(hashed_password: str) -> bool:
+    """True when a stored hash was made with a different work factor than BCRYPT_ROUNDS."""
+    try:
+        return int(hashed_password.split("$")[2]) != BCRYPT_ROUNDS
+    except (IndexError, ValueError):
+        return True
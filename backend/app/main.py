@@ -2,6 +2,9 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
+from fastapi.concurrency import run_in_threadpool
+from contextlib import asynccontextmanager
+import asyncio
 import os
 
 # Import your API routers
@@ -13,9 +16,64 @@ from app.api import notice_routes
 from app.api import learning_routes
 from app.api import faq_routes
 from app.api import auth_routes  # <-- 1. IMPORT THE NEW ROUTER
+from app.api import job_routes
+from app.core import database
+from app.core import http_client
+from app.core import llm_gateway
+from app.core import security
+from app.core.config import FIR_UPLOAD_MAX_BYTES, FIR_BATCH_MAX_BYTES, SUMMARIZER_UPLOAD_MAX_BYTES
+from app.core.jobs import job_manager
+from app.utils import pdf_converter
+from app.utils import file_manager
+from app.utils import pdf_parser
+from app.utils import text_cache
+from app.utils import embeddings
+from app.utils import similarity_checker
+from app.utils import ner_extractor
+from app.utils import text_cleaner
+from app.utils.uploads import UploadLimitMiddleware
+from app.services import chat_history, conversation_context
+
+
+# --- Lifespan Hooks ---
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Opens shared resources on startup and releases them on shutdown."""
+    await http_client.start_http_client()
+    await run_in_threadpool(pdf_converter.start_engine)
+    job_manager.start(asyncio.get_running_loop())
+    sweeper = asyncio.create_task(file_manager.run_sweeper())
+    history_writer = asyncio.create_task(chat_history.writer.run())
+    # Map the retrieval index now so the first chatbot query doesn't pay for it
+    await run_in_threadpool(embeddings.get_index)
+    yield
+    sweeper.cancel()
+    history_writer.cancel()
+    await asyncio.gather(history_writer, return_exceptions=True)
+    await chat_history.writer.drain()
+    job_manager.shutdown()
+    await run_in_threadpool(pdf_converter.engine.stop)
+    await database.close_async_pool()
+    await run_in_threadpool(database.close_pool)
+    security.shutdown_hash_pool()
+    pdf_parser.shutdown_pool()
+    embeddings.reload_index()
+    await http_client.close_http_client()
+
 
 # --- App Initialization ---
-app = FastAPI(title="KanoonAI API")
+app = FastAPI(title="KanoonAI API", lifespan=lifespan)
+
+# --- Upload Size Limits ---
+# Added before CORS so that 413 responses still carry the CORS headers
+app.add_middleware(
+    UploadLimitMiddleware,
+    limits={
+        "/api/v1/analyzer/analyze-fir": FIR_UPLOAD_MAX_BYTES,
+        "/api/v1/analyzer/analyze-fir-batch": FIR_BATCH_MAX_BYTES,
+        "/api/v1/summarizer/upload-and-summarize": SUMMARIZER_UPLOAD_MAX_BYTES,
+    },
+)
 
 # --- CORS Configuration ---
 # Allow both localhost and 127.0.0.1 to avoid "Failed to fetch" from browser when the
@@ -53,6 +111,26 @@ async def read_root():
     """
     return {"message": "Welcome to the KanoonAI API!"}
 
+@app.get("/metrics")
+async def read_metrics():
+    """
+    Operational counters for the shared caches and pools.
+    """
+    return {
+        "llm_response_cache": llm_gateway.response_cache.stats(),
+        "pdf_engine": pdf_converter.engine.stats(),
+        "jobs": job_manager.stats(),
+        "db_pool": database.pool_stats(),
+        "chat_history_writer": chat_history.writer.stats(),
+        "conversation_context": conversation_context.stats(),
+        "extracted_text_cache": await run_in_threadpool(text_cache.stats),
+        "text_cleaning": text_cleaner.stats(),
+        "retrieval_index": embeddings.stats(),
+        "near_duplicates": similarity_checker.stats(),
+        "fir_local_extraction": ner_extractor.stats(),
+        "outputs_disk": await run_in_threadpool(file_manager.disk_usage),
+    }
+
 # --- Include all API routers ---
 app.include_router(chatbot_routes.router)
 app.include_router(document_routes.router)
@@ -61,4 +139,5 @@ app.include_router(analyzer_routes.router)
 app.include_router(notice_routes.router)
 app.include_router(learning_routes.router)
 app.include_router(faq_routes.router)
-app.include_router(auth_routes.router) # <-- 2. INCLUDE THE NEW ROUTER
\ No newline at end of file
+app.include_router(auth_routes.router) # <-- 2. INCLUDE THE NEW ROUTER
+app.include_router(job_routes.router)
\ No newline at end of file
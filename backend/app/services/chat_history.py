@@ -0,0 +1,204 @@
+import asyncio
+from datetime import datetime
+
+from mysql.connector import errors
+
+from app.core.config import CHAT_HISTORY_BATCH_SIZE, CHAT_HISTORY_FLUSH_INTERVAL
+from app.core.database import get_async_pool
+
+# --- Session Chat History ---
+# Turns are kept server-side in `chat_history`, keyed by (user_id, session_id),
+# so clients send only the new query. Writes are buffered and flushed as one
+# multi-row INSERT per batch; turns still waiting in the buffer are merged into
+# reads so the next question in a session always sees the previous answer. A
+# batch the server rejects (user_id comes from the client, so a row can fail
+# the users(id) foreign key) is retried row by row and only the failing rows
+# are dropped, so one bad turn never holds up everyone else's history.
+
+TURN_COLUMNS = "id, message_text, response_text, relevant_law, created_at"
+
+INSERT_TURN = (
+    "INSERT INTO chat_history (user_id, session_id, message_text, response_text, relevant_law) "
+    "VALUES (%s, %s, %s, %s, %s)"
+)
+# Both reads walk idx_chat_history_user_session_created backwards
+LATEST_TURNS = (
+    f"SELECT {TURN_COLUMNS} FROM chat_history "
+    "WHERE user_id = %s AND session_id = %s "
+    "ORDER BY created_at DESC, id DESC LIMIT %s"
+)
+TURNS_BEFORE = (
+    f"SELECT {TURN_COLUMNS} FROM chat_history "
+    "WHERE user_id = %s AND session_id = %s AND (created_at, id) < (%s, %s) "
+    "ORDER BY created_at DESC, id DESC LIMIT %s"
+)
+
+
+class ChatHistoryWriter:
+    """Buffers finished turns and writes them to MySQL in batches."""
+
+    def __init__(self, batch_size: int, flush_interval: float):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = batch_size * 50
+        self._pending = []
+        self._in_flight = []  # the batch flush() is writing; back to _pending if the write fails
+        self._wake = None
+        self._idle = asyncio.Event()  # set while no batch is being written
+        self._idle.set()
+        self.writes_started = 0
+        self._stats = {"turns_written": 0, "batches": 0, "dropped": 0, "rejected": 0, "errors": 0}
+
+    def add(self, user_id: int, session_id: str, message_text: str, response_text: str, relevant_law: str):
+        self._pending.append((user_id, session_id, message_text, response_text, relevant_law))
+        self._shed()
+        if len(self._pending) >= self.batch_size and self._wake is not None:
+            self._wake.set()
+
+    def _shed(self):
+        if len(self._pending) > self.max_pending:
+            # The database has been unreachable for a while; shed the oldest turns
+            excess = len(self._pending) - self.max_pending
+            del self._pending[:excess]
+            self._stats["dropped"] += excess
+
+    def pending_for(self, user_id: int, session_id: str) -> list:
+        """Unwritten turns for one session, oldest first."""
+        return [turn for turn in self._in_flight + self._pending if turn[0] == user_id and turn[1] == session_id]
+
+    @property
+    def writing(self) -> bool:
+        return not self._idle.is_set()
+
+    async def wait_idle(self):
+        await self._idle.wait()
+
+    async def flush(self):
+        # One writer at a time, or two callers could insert the same batch
+        if not self._pending or self.writing:
+            return
+        self._idle.clear()
+        self.writes_started += 1
+        # Take the batch off the buffer, so add() shedding old turns can't shift it
+        batch, self._pending = self._pending[:self.batch_size], self._pending[self.batch_size:]
+        self._in_flight = batch
+        written = 0
+        try:
+            async with get_async_pool().connection() as conn:
+                try:
+                    await conn.execute_many(INSERT_TURN, batch)
+                    written = len(batch)
+                    self._stats["batches"] += 1
+                except (errors.IntegrityError, errors.DataError) as e:
+                    # One bad row (e.g. an unknown user_id) fails the whole INSERT;
+                    # write the rest one by one and drop the rows the server rejects
+                    print(f"Chat history batch rejected ({e}); retrying {len(batch)} turns one by one")
+                    for turn in batch:
+                        try:
+                            await conn.execute(INSERT_TURN, turn)
+                        except (errors.IntegrityError, errors.DataError) as e:
+                            self._stats["rejected"] += 1
+                            print(f"Chat history: dropped a turn for user {turn[0]}, session {turn[1]}: {e}")
+                        else:
+                            self._stats["turns_written"] += 1
+                        written += 1
+                    return
+            self._stats["turns_written"] += written
+        except Exception as e:
+            self._stats["errors"] += 1
+            print(f"Chat history write failed ({len(batch) - written} turns kept for retry): {e}")
+        finally:
+            if written < len(batch):
+                self._pending[:0] = batch[written:]
+                self._shed()
+            self._in_flight = []
+            self._idle.set()
+
+    async def run(self):
+        """Background task started from the app lifespan."""
+        self._wake = asyncio.Event()
+        try:
+            while True:
+                try:
+                    await asyncio.wait_for(self._wake.wait(), self.flush_interval)
+                except asyncio.TimeoutError:
+                    pass
+                self._wake.clear()
+                while self._pending:
+                    before = len(self._pending)
+                    await self.flush()
+                    if len(self._pending) >= before:
+                        break  # write failed; retry on the next tick
+        finally:
+            self._wake = None
+
+    async def drain(self):
+        """Writes everything still buffered (called on app shutdown)."""
+        await self.wait_idle()
+        while self._pending:
+            before = len(self._pending)
+            await self.flush()
+            if len(self._pending) >= before:
+                print(f"Chat history: {before} unwritten turn(s) lost at shutdown.")
+                return
+
+    def stats(self) -> dict:
+        return {"pending": len(self._pending) + len(self._in_flight), **self._stats}
+
+
+writer = ChatHistoryWriter(CHAT_HISTORY_BATCH_SIZE, CHAT_HISTORY_FLUSH_INTERVAL)
+
+
+def record_turn(user_id: int, session_id: str, message_text: str, response_text: str, relevant_law: str):
+    """Queues a finished turn for the next batched write."""
+    writer.add(user_id, session_id, message_text, response_text, relevant_law)
+
+
+async def latest_turns(user_id: int, session_id: str, limit: int) -> list:
+    """The newest `limit` turns of a session, newest first, including unwritten ones."""
+    while True:
+        # A batch committed while the SELECT runs could be both in the rows and
+        # still buffered; read again if one was written in the meantime
+        await writer.wait_idle()
+        writes = writer.writes_started
+        async with get_async_pool().connection() as conn:
+            rows = await conn.fetch_all(LATEST_TURNS, (user_id, session_id, limit), prepared=True)
+        if writer.writes_started == writes:
+            break
+    pending = [
+        {"id": None, "message_text": turn[2], "response_text": turn[3], "relevant_law": turn[4], "created_at": None}
+        for turn in writer.pending_for(user_id, session_id)
+    ]
+    return (pending[::-1] + rows)[:limit]
+
+
+def encode_cursor(row: dict) -> str:
+    return f"{row['created_at'].isoformat()}|{row['id']}"
+
+
+def decode_cursor(cursor: str) -> tuple:
+    """Raises ValueError for a malformed cursor."""
+    created_at, row_id = cursor.rsplit("|", 1)
+    return datetime.fromisoformat(created_at), int(row_id)
+
+
+async def get_page(user_id: int, session_id: str, limit: int, before: str = None) -> dict:
+    """
+    One page of a session's history, newest first. Keyset pagination on
+    (created_at, id): pass the returned `next_cursor` as `before` to get the
+    next older page; it is None on the last page.
+    """
+    await writer.wait_idle()
+    await writer.flush()
+    async with get_async_pool().connection() as conn:
+        if before is None:
+            rows = await conn.fetch_all(LATEST_TURNS, (user_id, session_id, limit + 1), prepared=True)
+        else:
+            created_at, row_id = decode_cursor(before)
+            rows = await conn.fetch_all(TURNS_BEFORE, (user_id, session_id, created_at, row_id, limit + 1), prepared=True)
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    return {
+        "items": rows,
+        "next_cursor": encode_cursor(rows[-1]) if has_more else None,
+    }
@@ -1,7 +1,10 @@
 import httpx
 from dotenv import load_dotenv
+from fastapi.concurrency import run_in_threadpool
 
 from app.core.config import GENAI_API_KEY
+from app.core.http_client import get_http_client, CHATBOT_TIMEOUT
+from app.utils import embeddings
 
 # --- Configuration ---
 
@@ -24,7 +27,8 @@ GEMINI_API_URL = "https://generativelanguage.googleapis.com/v1beta/models/gemini
 async def get_chatbot_response(user_query: str, chat_history: list[dict]):
     """
     Calls the Gemini API with the user's query and chat history.
-    Enables Google Search grounding to get up-to-date legal information.
+    Grounds the answer in passages from the local retrieval index, and falls
+    back to Google Search grounding when the index has nothing relevant.
     """
     # Securely get the API key from environment variables
     api_key = GENAI_API_KEY
@@ -35,58 +39,61 @@ async def get_chatbot_response(user_query: str, chat_history: list[dict]):
 
     full_api_url = f"{GEMINI_API_URL}?key={api_key}"
 
+    passages = await run_in_threadpool(embeddings.retrieve, user_query)
+
     # Prepare the conversation history for the API
     contents = [
         *chat_history,
-        {"role": "user", "parts": [{"text": user_query}]}
+        {"role": "user", "parts": [{"text": embeddings.grounded_prompt(user_query, passages)}]}
     ]
 
     payload = {
         "contents": contents,
-        "tools": [{"google_search": {}}],
         "systemInstruction": {
             "parts": [{"text": SYSTEM_INSTRUCTION}]
         },
     }
+    if not passages:
+        payload["tools"] = [{"google_search": {}}]
 
     try:
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.post(
-                full_api_url,
-                headers={"Content-Type": "application/json"},
-                json=payload
-            )
-
-            # Raise an exception for bad status codes
-            response.raise_for_status()
-
-            result = response.json()
-            candidate = result.get("candidates", [{}])[0]
-            content = candidate.get("content", {}).get("parts", [{}])[0]
-            text = content.get("text")
-
-            if not text:
-                print("Invalid API response:", result)
-                return {"error": "Received an invalid response from the AI."}
-
-            # Extract sources from grounding metadata
-            sources = []
-            grounding_metadata = candidate.get("groundingMetadata", {})
-            if grounding_metadata and "groundingAttributions" in grounding_metadata:
-                sources = [
-                    {
-                        "uri": attr.get("web", {}).get("uri"),
-                        "title": attr.get("web", {}).get("title"),
-                    }
-                    for attr in grounding_metadata["groundingAttributions"]
-                    if attr.get("web")
-                ]
-            
-            return {"text": text, "sources": sources}
+        client = get_http_client()
+        response = await client.post(
+            full_api_url,
+            json=payload,
+            timeout=CHATBOT_TIMEOUT,
+        )
+
+        # Raise an exception for bad status codes
+        response.raise_for_status()
+
+        result = response.json()
+        candidate = result.get("candidates", [{}])[0]
+        content = candidate.get("content", {}).get("parts", [{}])[0]
+        text = content.get("text")
+
+        if not text:
+            print("Invalid API response:", result)
+            return {"error": "Received an invalid response from the AI."}
+
+        # Local passages first, then any web sources from grounding metadata
+        sources = [{"uri": None, "title": passage["title"]} for passage in passages]
+        grounding_metadata = candidate.get("groundingMetadata", {})
+        if grounding_metadata and "groundingAttributions" in grounding_metadata:
+            sources += [
+                {
+                    "uri": attr.get("web", {}).get("uri"),
+                    "title": attr.get("web", {}).get("title"),
+                }
+                for attr in grounding_metadata["groundingAttributions"]
+                if attr.get("web")
+            ]
+        
+        return {"text": text, "sources": sources}
 
     except httpx.HTTPStatusError as e:
         print(f"HTTP error occurred: {e}")
-        return {"error": f"API request failed with status {e.response.status}: {e.response.text}"}
+        return {"error": f"API request failed with status {e.response.status_code}: {e.response.text}"}
     except Exception as e:
         print(f"An unexpected error occurred: {e}")
         return {"error": f"An unexpected error occurred: {str(e)}"}
\ No newline at end of file
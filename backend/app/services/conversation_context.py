@@ -0,0 +1,158 @@
+import asyncio
+import math
+import re
+
+import google.generativeai as genai
+
+from app.core import llm_gateway
+from app.core.cache import LRUCache
+from app.core.config import (
+    CHAT_HISTORY_MAX_TURNS,
+    CHAT_HISTORY_TOKEN_BUDGET,
+    CHAT_SUMMARY_ENABLED,
+    CHAT_SUMMARY_EVERY,
+    CHAT_SUMMARY_MAX_TOKENS,
+    CHAT_SUMMARY_CACHE_ENTRIES,
+)
+from app.services import chat_history
+
+# --- Bounded Conversation Context ---
+# The prompt for a session turn is: a running summary of everything older than
+# the recent window, then the recent turns verbatim, trimmed newest-first to
+# CHAT_HISTORY_TOKEN_BUDGET. Older turns are folded into the summary in groups
+# of CHAT_SUMMARY_EVERY, so a long session costs one small summarisation call
+# every few turns instead of re-sending its whole transcript on every turn.
+# The fold runs as a background task, at most one per session; until it lands,
+# requests use the previous summary and send the unfolded turns verbatim.
+
+# How many not-yet-summarised older turns are read per request. After a restart
+# (the summary cache is in memory) the summary is rebuilt from at most this many.
+MAX_FOLD_TURNS = max(CHAT_SUMMARY_EVERY * 4, 20)
+
+SUMMARY_PROMPT = """
+You maintain a running summary of a conversation between a user and KanoonAI, a legal assistant for Indian law.
+You are given the current summary (possibly empty) and the next turns of the conversation.
+Return an updated summary in plain text that keeps: the user's situation and facts, questions asked,
+laws and sections cited, advice already given, and anything left unresolved. Drop greetings and repetition.
+Write at most 200 words. Do not add new legal analysis.
+"""
+
+SUMMARY_HEADER = "Summary of our conversation so far:\n"
+
+summary_model = genai.GenerativeModel(
+    model_name="gemini-2.5-flash-preview-09-2025",
+    generation_config={"temperature": 0.2, "max_output_tokens": CHAT_SUMMARY_MAX_TOKENS},
+    system_instruction=SUMMARY_PROMPT,
+)
+
+# (user_id, session_id) -> {"summary": str, "through_id": id of the last folded turn}
+_summaries = LRUCache(CHAT_SUMMARY_CACHE_ENTRIES, 24 * 3600)
+_folding = {}  # (user_id, session_id) -> running fold task
+_stats = {"summaries_built": 0, "summary_errors": 0}
+
+_TOKEN_PIECE_RE = re.compile(r"\w+|[^\w\s]")
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Local approximation of the model's token count, with no tokenizer
+    download. Short words and punctuation are one token each, longer words
+    about one per five characters, and non-Latin scripts (e.g. Devanagari)
+    roughly one per two characters, so it errs on the high side.
+    """
+    return sum(_piece_tokens(piece) for piece in _TOKEN_PIECE_RE.findall(text))
+
+
+def _piece_tokens(piece: str) -> int:
+    return max(1, math.ceil(len(piece) / (5 if piece.isascii() else 2)))
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """The longest prefix of `text` that estimate_tokens() puts within `max_tokens`."""
+    count = 0
+    for match in _TOKEN_PIECE_RE.finditer(text):
+        count += _piece_tokens(match.group(0))
+        if count > max_tokens:
+            return text[:match.start()].rstrip()
+    return text
+
+
+def _turn_tokens(turn: dict) -> int:
+    return estimate_tokens(turn["message_text"]) + estimate_tokens(turn["response_text"])
+
+
+async def _fold(summary: str, turns: list) -> str:
+    transcript = "\n".join(
+        f"User: {turn['message_text']}\nAssistant: {turn['response_text']}" for turn in turns
+    )
+    response = await llm_gateway.send_message(
+        summary_model,
+        f"Current summary:\n{summary or '(none)'}\n\nNext turns:\n{transcript}",
+    )
+    return response.text.strip()
+
+
+async def _refresh_summary(key: tuple, state: dict, turns: list):
+    try:
+        _summaries.set(key, {"summary": await _fold(state["summary"], turns), "through_id": turns[-1]["id"]})
+        _stats["summaries_built"] += 1
+    except Exception as e:
+        # Turns stay verbatim (within the budget) until a later fold succeeds
+        _stats["summary_errors"] += 1
+        print(f"Could not update conversation summary for session {key[1]}: {e}")
+    finally:
+        _folding.pop(key, None)
+
+
+async def build_history(user_id: int, session_id: str) -> list:
+    """
+    Model history for the next turn of a session, oldest first, in the
+    google-generativeai `history` format. Returns [] if the database is down.
+    """
+    try:
+        turns = await chat_history.latest_turns(user_id, session_id, CHAT_HISTORY_MAX_TURNS + MAX_FOLD_TURNS)
+    except Exception as e:
+        print(f"Could not load chat history for session {session_id}: {e}")
+        return []
+
+    recent = turns[:CHAT_HISTORY_MAX_TURNS]          # newest first
+    older = turns[CHAT_HISTORY_MAX_TURNS:][::-1]     # oldest first
+    summary = ""
+
+    if CHAT_SUMMARY_ENABLED and older:
+        key = (user_id, session_id)
+        state = _summaries.get(key) or {"summary": "", "through_id": 0}
+        # Unwritten turns have no id yet; they are always among the newest
+        unfolded = [turn for turn in older if turn["id"] is not None and turn["id"] > state["through_id"]]
+        if len(unfolded) >= CHAT_SUMMARY_EVERY and key not in _folding:
+            _folding[key] = asyncio.create_task(_refresh_summary(key, state, unfolded))
+        summary = state["summary"]
+        # Turns not folded yet stay verbatim until the next summary lands
+        recent = recent + unfolded[::-1]
+
+    budget = CHAT_HISTORY_TOKEN_BUDGET
+    if summary:
+        # A summary over the whole budget is cut down rather than dropped
+        summary = SUMMARY_HEADER + truncate_to_tokens(summary, budget - estimate_tokens(SUMMARY_HEADER))
+        budget -= estimate_tokens(summary)
+
+    history = []
+    for turn in recent:
+        cost = _turn_tokens(turn)
+        if cost > budget:
+            break
+        budget -= cost
+        history.append({"role": "model", "parts": [turn["response_text"]]})
+        history.append({"role": "user", "parts": [turn["message_text"]]})
+    history.reverse()
+
+    if summary:
+        history = [
+            {"role": "user", "parts": [summary]},
+            {"role": "model", "parts": ["Understood. I will keep this context in mind."]},
+        ] + history
+    return history
+
+
+def stats() -> dict:
+    return {"cached_summaries": len(_summaries), "folds_in_progress": len(_folding), **_stats}
@@ -4,6 +4,7 @@ from docx import Document
 import io
 
 from app.core.config import GENAI_API_KEY
+from app.core.http_client import get_http_client, DRAFTING_TIMEOUT
 
 # --- Configuration ---
 
@@ -41,16 +42,16 @@ async def _call_gemini_for_drafting(prompt: str) -> str:
     }
 
     try:
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            response = await client.post(full_api_url, json=payload, headers={"Content-Type": "application/json"})
-            response.raise_for_status()
-            
-            result = response.json()
-            text = result.get("candidates", [{}])[0].get("content", {}).get("parts", [{}])[0].get("text")
-            
-            if not text:
-                raise ValueError("AI failed to generate document text.")
-            return text
+        client = get_http_client()
+        response = await client.post(full_api_url, json=payload, timeout=DRAFTING_TIMEOUT)
+        response.raise_for_status()
+        
+        result = response.json()
+        text = result.get("candidates", [{}])[0].get("content", {}).get("parts", [{}])[0].get("text")
+        
+        if not text:
+            raise ValueError("AI failed to generate document text.")
+        return text
             
     except httpx.HTTPStatusError as e:
         print(f"HTTP error occurred: {e}")
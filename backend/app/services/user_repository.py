@@ -0,0 +1,72 @@
+from app.core.database import get_async_pool
+
+# --- User Repository ---
+# Every query the auth router runs against `users`, on the async pool. The two
+# hot lookups (login/profile by email, password reset by token) go through
+# per-connection prepared statements.
+
+# Queries name their columns: profile_pic can be a large Base64 blob, and only
+# login needs the password hash.
+PROFILE_COLUMNS = "id, name, email, gender, phone_number, profile_pic"
+
+GET_BY_EMAIL = f"SELECT {PROFILE_COLUMNS} FROM users WHERE email = %s"
+GET_LOGIN_BY_EMAIL = f"SELECT {PROFILE_COLUMNS}, hashed_password FROM users WHERE email = %s"
+GET_ID_BY_EMAIL = "SELECT id, name FROM users WHERE email = %s"
+GET_BY_RESET_TOKEN = "SELECT id FROM users WHERE reset_token = %s AND reset_token_expires > NOW()"
+
+INSERT_USER = (
+    "INSERT INTO users (name, email, hashed_password, gender, phone_number, profile_pic) "
+    "VALUES (%s, %s, %s, %s, %s, %s)"
+)
+SET_RESET_TOKEN = "UPDATE users SET reset_token = %s, reset_token_expires = %s WHERE id = %s"
+SET_PASSWORD = "UPDATE users SET hashed_password = %s WHERE id = %s"
+RESET_PASSWORD = "UPDATE users SET hashed_password = %s, reset_token = NULL, reset_token_expires = NULL WHERE id = %s"
+UPDATE_PROFILE = "UPDATE users SET name = %s, gender = %s, phone_number = %s, profile_pic = %s WHERE email = %s"
+
+
+async def get_by_email(email: str):
+    """The user's profile columns (what UserOut returns)."""
+    async with get_async_pool().connection() as conn:
+        return await conn.fetch_one(GET_BY_EMAIL, (email,), prepared=True)
+
+
+async def get_login_by_email(email: str):
+    """Profile columns plus hashed_password, for checking credentials."""
+    async with get_async_pool().connection() as conn:
+        return await conn.fetch_one(GET_LOGIN_BY_EMAIL, (email,), prepared=True)
+
+
+async def get_id_by_email(email: str):
+    """Just id and name, for existence checks and emails."""
+    async with get_async_pool().connection() as conn:
+        return await conn.fetch_one(GET_ID_BY_EMAIL, (email,), prepared=True)
+
+
+async def get_by_reset_token(token: str):
+    """Returns the user holding this reset token, if it has not expired."""
+    async with get_async_pool().connection() as conn:
+        return await conn.fetch_one(GET_BY_RESET_TOKEN, (token,), prepared=True)
+
+
+async def create_user(name: str, email: str, hashed_password: str, gender, phone_number) -> int:
+    """Inserts a new user and returns its id. Raises IntegrityError (1062) on a duplicate email."""
+    async with get_async_pool().connection() as conn:
+        # profile_pic defaults to NULL for new signups
+        return await conn.execute(INSERT_USER, (name, email, hashed_password, gender, phone_number, None))
+
+
+async def set_reset_token(user_id: int, token: str, expires):
+    async with get_async_pool().connection() as conn:
+        await conn.execute(SET_RESET_TOKEN, (token, expires, user_id))
+
+
+async def set_password(user_id: int, hashed_password: str, clear_reset_token: bool = False):
+    async with get_async_pool().connection() as conn:
+        await conn.execute(RESET_PASSWORD if clear_reset_token else SET_PASSWORD, (hashed_password, user_id))
+
+
+async def update_profile(email: str, name: str, gender, phone_number, profile_pic):
+    """Updates the profile fields and returns the fresh row."""
+    async with get_async_pool().connection() as conn:
+        await conn.execute(UPDATE_PROFILE, (name, gender, phone_number, profile_pic, email))
+        return await conn.fetch_one(GET_BY_EMAIL, (email,), prepared=True)
@@ -0,0 +1,10 @@
+import docx
+
+# --- DOCX Text Extraction ---
+# Counterpart of pdf_parser for Word uploads; one paragraph per line.
+
+
+def extract_text(source) -> str:
+    """Extracts the paragraph text of a DOCX given as a path or binary file object."""
+    document = docx.Document(source)
+    return "".join(para.text + "\n" for para in document.paragraphs)
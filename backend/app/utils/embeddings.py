@@ -0,0 +1,492 @@
+import json
+import math
+import mmap
+import os
+import re
+import shutil
+import threading
+import time
+import uuid
+import zlib
+from collections import Counter
+from functools import lru_cache
+
+import numpy as np
+
+# --- Local Vector Index ---
+# Offline retrieval over a corpus of bare acts and judgments, with no model
+# download and no network: passages are embedded with a signed hashing
+# vectorizer (stemmed word unigrams and bigrams hashed into DIM buckets,
+# sublinear TF, IDF learned per bucket at build time, L2-normalised), so
+# cosine similarity is a dot product.
+#
+# The approximate nearest-neighbour index is an inverted file (IVF): passages
+# are clustered with spherical k-means and stored grouped by cluster, so a
+# query scores the centroids, then only the `nprobe` closest clusters, each a
+# contiguous slice of the memory-mapped vector matrix.
+#
+# Index directory layout (written by write_index). publish_index writes each
+# new version to its own subdirectory of the index root and then points the
+# CURRENT file at it, so a running server can switch versions safely:
+#   meta.json            dim, count, nlist, build parameters
+#   vectors.npy          float32 [count, dim], rows grouped by cluster
+#   centroids.npy        float32 [nlist, dim]
+#   list_offsets.npy     int64 [nlist + 1], cluster i is rows offsets[i]:offsets[i+1]
+#   idf.npy              float32 [dim]
+#   passages.jsonl       one {"source", "title", "text"} per row, same order
+#   passage_offsets.npy  int64 [count + 1], byte offsets into passages.jsonl
+#
+# App settings are read lazily, so the build script and benchmarks can use the
+# index classes without the web app's configuration.
+
+INDEX_VERSION = 1
+DEFAULT_DIM = 1024
+DEFAULT_CHUNK_CHARS = 1500
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it its of on or that the this to was were will with "
+    "which who whom shall may any such than then there these those been being into upon under".split()
+)
+_SUFFIXES = ("ing", "ed", "es", "s")
+
+
+def _stem(token: str) -> str:
+    """Crude suffix stripping so "cheats", "cheated" and "cheating" share a feature."""
+    for suffix in _SUFFIXES:
+        if len(token) > len(suffix) + 3 and token.endswith(suffix):
+            return token[:-len(suffix)]
+    return token
+
+
+def _features(text: str) -> list:
+    tokens = [_stem(token) for token in _TOKEN_RE.findall(text.lower()) if token not in STOPWORDS]
+    return tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+
+
+@lru_cache(maxsize=1 << 18)
+def _bucket(feature: str, dim: int) -> tuple:
+    h = zlib.crc32(feature.encode("utf-8"))
+    return h % dim, 1.0 if (h >> 31) & 1 else -1.0
+
+
+def hash_texts(texts: list, dim: int = DEFAULT_DIM) -> np.ndarray:
+    """Unweighted hashed term vectors (sublinear TF), float32 [len(texts), dim]."""
+    matrix = np.zeros((len(texts), dim), dtype=np.float32)
+    for row, text in enumerate(texts):
+        counts = Counter(_features(text))
+        if not counts:
+            continue
+        columns = np.empty(len(counts), dtype=np.int64)
+        values = np.empty(len(counts), dtype=np.float32)
+        for i, (feature, tf) in enumerate(counts.items()):
+            columns[i], sign = _bucket(feature, dim)
+            values[i] = sign * (1.0 + math.log(tf))
+        np.add.at(matrix[row], columns, values)
+    return matrix
+
+
+def compute_idf(document_frequency: np.ndarray, count: int) -> np.ndarray:
+    return (np.log((1.0 + count) / (1.0 + document_frequency)) + 1.0).astype(np.float32)
+
+
+def normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    matrix /= norms
+    return matrix
+
+
+def embed_texts(texts: list, idf: np.ndarray) -> np.ndarray:
+    """IDF-weighted, L2-normalised embeddings, float32 [len(texts), dim]."""
+    return normalize_rows(hash_texts(texts, len(idf)) * idf)
+
+
+# --- Index Build ---
+def spherical_kmeans(vectors: np.ndarray, nlist: int, iterations: int = 10, seed: int = 0) -> np.ndarray:
+    """Unit-norm centroids from k-means on cosine similarity, trained on a sample."""
+    rng = np.random.default_rng(seed)
+    sample = vectors[rng.choice(len(vectors), min(len(vectors), nlist * 64), replace=False)]
+    centroids = sample[rng.choice(len(sample), nlist, replace=False)].copy()
+    for _ in range(iterations):
+        assignment = np.argmax(sample @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignment, sample)
+        empty = np.flatnonzero(~sums.any(axis=1))
+        # Re-seed empty clusters from random sample rows
+        sums[empty] = sample[rng.choice(len(sample), len(empty), replace=False)]
+        centroids = normalize_rows(sums)
+    return centroids
+
+
+def assign_lists(vectors: np.ndarray, centroids: np.ndarray, batch_size: int = 8192) -> np.ndarray:
+    assignment = np.empty(len(vectors), dtype=np.int64)
+    for start in range(0, len(vectors), batch_size):
+        assignment[start:start + batch_size] = np.argmax(vectors[start:start + batch_size] @ centroids.T, axis=1)
+    return assignment
+
+
+def write_index(directory: str, vectors: np.ndarray, idf: np.ndarray, passages: list, nlist: int = None, params: dict = None):
+    """
+    Clusters `vectors` (normalised rows, one per passage) and writes the index
+    directory, replacing any previous index atomically file by file.
+    `nlist` defaults to about sqrt(count) clusters.
+    """
+    count, dim = vectors.shape
+    nlist = max(1, min(count, nlist or int(math.sqrt(count))))
+    centroids = spherical_kmeans(vectors, nlist) if count else np.zeros((1, dim), dtype=np.float32)
+    assignment = assign_lists(vectors, centroids)
+    order = np.argsort(assignment, kind="stable")
+    offsets = np.searchsorted(assignment[order], np.arange(len(centroids) + 1)).astype(np.int64)
+
+    os.makedirs(directory, exist_ok=True)
+
+    def save(name, array):
+        tmp_path = os.path.join(directory, f".{name}.tmp.npy")
+        np.save(tmp_path, array)
+        os.replace(tmp_path, os.path.join(directory, name))
+
+    save("vectors.npy", vectors[order])
+    save("centroids.npy", centroids.astype(np.float32))
+    save("list_offsets.npy", offsets)
+    save("idf.npy", idf.astype(np.float32))
+
+    passage_offsets = np.zeros(count + 1, dtype=np.int64)
+    tmp_path = os.path.join(directory, ".passages.jsonl.tmp")
+    with open(tmp_path, "wb") as f:
+        for row, index in enumerate(order):
+            f.write(json.dumps(passages[index], ensure_ascii=False).encode("utf-8") + b"\n")
+            passage_offsets[row + 1] = f.tell()
+    os.replace(tmp_path, os.path.join(directory, "passages.jsonl"))
+    save("passage_offsets.npy", passage_offsets)
+
+    meta = {"version": INDEX_VERSION, "dim": dim, "count": count, "nlist": len(centroids), **(params or {})}
+    with open(os.path.join(directory, ".meta.json.tmp"), "w") as f:
+        json.dump(meta, f, indent=2)
+    os.replace(os.path.join(directory, ".meta.json.tmp"), os.path.join(directory, "meta.json"))
+
+
+CURRENT_FILE = "CURRENT"
+VERSION_PREFIX = "index-"
+
+
+def resolve_index_dir(root: str) -> str:
+    """The published index version under `root`, or `root` itself for a plain index directory."""
+    try:
+        with open(os.path.join(root, CURRENT_FILE)) as f:
+            return os.path.join(root, f.read().strip())
+    except FileNotFoundError:
+        return root
+
+
+def publish_index(root: str, counts: np.ndarray, passages: list, nlist: int = None, params: dict = None) -> str:
+    """
+    Weights `counts` (hash_texts rows, one per passage) by IDF over these
+    passages, writes them as a new index version under `root` and switches
+    CURRENT to it with one rename. Older versions are then deleted; a server
+    still reading one keeps its memory maps until it reloads.
+    """
+    idf = compute_idf((counts != 0).sum(axis=0), len(passages))
+    vectors = normalize_rows(counts * idf)
+    version = f"{VERSION_PREFIX}{time.strftime('%Y%m%d%H%M%S')}-{uuid.uuid4().hex[:6]}"
+    write_index(os.path.join(root, version), vectors, idf, passages, nlist, {"vectorizer": "hashing-uni-bigram", **(params or {})})
+    tmp_path = os.path.join(root, f".{CURRENT_FILE}.tmp")
+    with open(tmp_path, "w") as f:
+        f.write(version)
+    os.replace(tmp_path, os.path.join(root, CURRENT_FILE))
+    for name in os.listdir(root):
+        if name.startswith(VERSION_PREFIX) and name != version:
+            shutil.rmtree(os.path.join(root, name), ignore_errors=True)
+    return version
+
+
+def build_index(root: str, passages: list, dim: int = DEFAULT_DIM, nlist: int = None) -> str:
+    """Embeds `passages` ({"source", "title", "text"} dicts) in one go and publishes an index under `root`."""
+    return publish_index(root, hash_texts([passage["text"] for passage in passages], dim), passages, nlist)
+
+
+# --- Incremental Build ---
+# The build keeps the unweighted term vectors of every passage in append-only
+# shards (<index root>/build/shard-NNNNN.npy plus a .jsonl of its passages) and
+# a manifest of each source document's content hash and row range. A run
+# embeds only new or changed documents, and a shard becomes part of the build
+# only when the manifest naming it is written, so a crashed run resumes after
+# its last complete shard. merge() recomputes IDF over the live rows (those
+# still referenced by the manifest) and publishes a fresh index.
+
+class ShardStore:
+    """Manifest and shards of an incremental embedding build."""
+
+    def __init__(self, directory: str, dim: int = None, chunk_chars: int = None):
+        """`dim`/`chunk_chars` default to the existing build's (or DEFAULT_DIM and DEFAULT_CHUNK_CHARS for a new one)."""
+        self.directory = directory
+        self.manifest_path = os.path.join(directory, "manifest.json")
+        os.makedirs(directory, exist_ok=True)
+        if os.path.exists(self.manifest_path):
+            with open(self.manifest_path) as f:
+                self.manifest = json.load(f)
+            built_with = (self.manifest["dim"], self.manifest["chunk_chars"])
+            if (dim or built_with[0], chunk_chars or built_with[1]) != built_with:
+                raise ValueError(
+                    f"Existing build uses dim={built_with[0]}, chunk_chars={built_with[1]}; "
+                    "pass the same values or start over with --rebuild"
+                )
+        else:
+            self.manifest = {
+                "dim": dim or DEFAULT_DIM,
+                "chunk_chars": chunk_chars or DEFAULT_CHUNK_CHARS,
+                "next_shard": 1,
+                "shards": {},
+                "documents": {},
+            }
+
+    @property
+    def dim(self) -> int:
+        return self.manifest["dim"]
+
+    def _save_manifest(self):
+        tmp_path = self.manifest_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.manifest, f)
+        os.replace(tmp_path, self.manifest_path)
+
+    def _shard_path(self, name: str, extension: str) -> str:
+        return os.path.join(self.directory, f"{name}{extension}")
+
+    def document(self, source: str):
+        """Manifest entry of a source document (sha256, mtime_ns, size, shard, start, stop), if built."""
+        return self.manifest["documents"].get(source)
+
+    def write_shard(self, documents: list) -> str:
+        """
+        Appends one shard of (source, info, passages, counts) documents, where
+        info holds the file's sha256/mtime_ns/size, and commits it to the manifest.
+        """
+        name = f"shard-{self.manifest['next_shard']:05d}"
+        parts = [counts for _, _, _, counts in documents if len(counts)]
+        matrix = np.concatenate(parts) if parts else np.zeros((0, self.dim), dtype=np.float32)
+
+        np.save(self._shard_path(name, ".tmp.npy"), matrix)
+        os.replace(self._shard_path(name, ".tmp.npy"), self._shard_path(name, ".npy"))
+        with open(self._shard_path(name, ".jsonl.tmp"), "wb") as f:
+            for _, _, passages, _ in documents:
+                for passage in passages:
+                    f.write(json.dumps(passage, ensure_ascii=False).encode("utf-8") + b"\n")
+        os.replace(self._shard_path(name, ".jsonl.tmp"), self._shard_path(name, ".jsonl"))
+
+        row = 0
+        for source, info, passages, _ in documents:
+            self.manifest["documents"][source] = {**info, "shard": name, "start": row, "stop": row + len(passages)}
+            row += len(passages)
+        self.manifest["shards"][name] = {"rows": row}
+        self.manifest["next_shard"] += 1
+        self._save_manifest()
+        return name
+
+    def remove_documents(self, sources: list):
+        """Drops documents that left the corpus; their rows stop being live."""
+        for source in sources:
+            self.manifest["documents"].pop(source, None)
+        self._save_manifest()
+
+    def live_ranges(self) -> dict:
+        """shard name -> sorted (start, stop) row ranges still referenced by a document."""
+        ranges = {name: [] for name in self.manifest["shards"]}
+        for entry in self.manifest["documents"].values():
+            if entry["stop"] > entry["start"]:
+                ranges[entry["shard"]].append((entry["start"], entry["stop"]))
+        return {name: sorted(shard_ranges) for name, shard_ranges in ranges.items()}
+
+    def stats(self) -> dict:
+        live = sum(stop - start for ranges in self.live_ranges().values() for start, stop in ranges)
+        rows = sum(shard["rows"] for shard in self.manifest["shards"].values())
+        return {"documents": len(self.manifest["documents"]), "shards": len(self.manifest["shards"]), "rows": rows, "live_rows": live}
+
+    def merge(self, root: str, nlist: int = None) -> str:
+        """Publishes an index of every live row under `root`, then deletes shards with no live rows."""
+        parts = []
+        passages = []
+        dead = []
+        for name, ranges in sorted(self.live_ranges().items()):
+            if not ranges:
+                dead.append(name)
+                continue
+            vectors = np.load(self._shard_path(name, ".npy"), mmap_mode="r")
+            with open(self._shard_path(name, ".jsonl"), "rb") as f:
+                lines = f.readlines()
+            for start, stop in ranges:
+                parts.append(np.asarray(vectors[start:stop]))
+                passages.extend(json.loads(line) for line in lines[start:stop])
+        counts = np.concatenate(parts) if parts else np.zeros((0, self.dim), dtype=np.float32)
+        version = publish_index(root, counts, passages, nlist, {"chunk_chars": self.manifest["chunk_chars"]})
+
+        for name in dead:
+            del self.manifest["shards"][name]
+        self._save_manifest()
+        for name in dead:
+            for extension in (".npy", ".jsonl"):
+                if os.path.exists(self._shard_path(name, extension)):
+                    os.remove(self._shard_path(name, extension))
+        return version
+
+
+# --- Index Search ---
+class VectorIndex:
+    """Read-only view of an index directory; vectors and passages are memory-mapped."""
+
+    def __init__(self, directory: str):
+        directory = resolve_index_dir(directory)
+        self.directory = directory
+        with open(os.path.join(directory, "meta.json")) as f:
+            self.meta = json.load(f)
+        if self.meta.get("version") != INDEX_VERSION:
+            raise ValueError(f"Unsupported index version {self.meta.get('version')} in {directory}")
+        self.vectors = np.load(os.path.join(directory, "vectors.npy"), mmap_mode="r")
+        self.centroids = np.load(os.path.join(directory, "centroids.npy"))
+        self.list_offsets = np.load(os.path.join(directory, "list_offsets.npy"))
+        self.idf = np.load(os.path.join(directory, "idf.npy"))
+        self.passage_offsets = np.load(os.path.join(directory, "passage_offsets.npy"))
+        self._passages_file = open(os.path.join(directory, "passages.jsonl"), "rb")
+        self._passages = mmap.mmap(self._passages_file.fileno(), 0, access=mmap.ACCESS_READ) if len(self) else b""
+
+    def __len__(self):
+        return int(self.meta["count"])
+
+    def close(self):
+        if isinstance(self._passages, mmap.mmap):
+            self._passages.close()
+        self._passages_file.close()
+
+    def passage(self, row: int) -> dict:
+        start, end = self.passage_offsets[row], self.passage_offsets[row + 1]
+        return json.loads(self._passages[start:end])
+
+    def embed_query(self, text: str) -> np.ndarray:
+        return embed_texts([text], self.idf)[0]
+
+    def search_vector(self, query: np.ndarray, k: int, nprobe: int = None) -> tuple:
+        """(rows, scores) of the top `k` rows, best first. nprobe=None scans every row (exact)."""
+        if not len(self):
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        nlist = len(self.centroids)
+        if nprobe is None or nprobe >= nlist:
+            rows = np.arange(len(self), dtype=np.int64)
+            scores = np.asarray(self.vectors @ query)
+        else:
+            lists = np.argpartition(-(self.centroids @ query), nprobe)[:nprobe]
+            row_parts = []
+            score_parts = []
+            for i in lists:
+                start, end = self.list_offsets[i], self.list_offsets[i + 1]
+                if end > start:
+                    row_parts.append(np.arange(start, end, dtype=np.int64))
+                    score_parts.append(np.asarray(self.vectors[start:end] @ query))
+            if not row_parts:
+                return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+            rows = np.concatenate(row_parts)
+            scores = np.concatenate(score_parts)
+        k = min(k, len(rows))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return rows[top], scores[top]
+
+    def search(self, text: str, k: int, nprobe: int = None, min_score: float = 0.0) -> list:
+        """Top passages for `text` as dicts with a "score", best first."""
+        rows, scores = self.search_vector(self.embed_query(text), k, nprobe)
+        return [
+            {**self.passage(int(row)), "score": round(float(score), 4)}
+            for row, score in zip(rows, scores)
+            if score >= min_score
+        ]
+
+
+# --- App Access ---
+_index = None
+_index_dir = None
+_checked_at = float("-inf")
+_index_lock = threading.Lock()
+_stats = {"searches": 0, "total_ms": 0.0, "loads": 0, "load_error": None}
+
+
+def get_index():
+    """
+    The index published under EMBEDDINGS_INDEX_DIR, or None if there is none.
+    Every RETRIEVAL_RELOAD_INTERVAL seconds it checks for a newer published
+    version and swaps it in, so a finished build goes live without a restart.
+    """
+    global _index, _index_dir, _checked_at
+    from app.core.config import EMBEDDINGS_INDEX_DIR, RETRIEVAL_RELOAD_INTERVAL
+
+    if time.monotonic() - _checked_at < RETRIEVAL_RELOAD_INTERVAL:
+        return _index
+    with _index_lock:
+        if time.monotonic() - _checked_at < RETRIEVAL_RELOAD_INTERVAL:
+            return _index
+        _checked_at = time.monotonic()
+        directory = resolve_index_dir(EMBEDDINGS_INDEX_DIR)
+        if directory == _index_dir or not os.path.exists(os.path.join(directory, "meta.json")):
+            return _index
+        try:
+            index = VectorIndex(directory)
+        except Exception as e:
+            _stats["load_error"] = str(e)
+            print(f"Could not load embeddings index from {directory}: {e}")
+            return _index
+        # Searches still running on the old version keep its memory maps alive
+        _index, _index_dir = index, directory
+        _stats["loads"] += 1
+    return _index
+
+
+def reload_index():
+    """Drops the loaded index so the next search reads the directory again."""
+    global _index, _index_dir, _checked_at
+    with _index_lock:
+        if _index is not None:
+            _index.close()
+        _index, _index_dir, _checked_at = None, None, float("-inf")
+
+
+def retrieve(query: str) -> list:
+    """Top RETRIEVAL_TOP_K passages for a chat query (blocking); [] when disabled or unindexed."""
+    from app.core.config import RETRIEVAL_ENABLED, RETRIEVAL_TOP_K, RETRIEVAL_NPROBE, RETRIEVAL_MIN_SCORE
+
+    if not RETRIEVAL_ENABLED:
+        return []
+    index = get_index()
+    if index is None:
+        return []
+    start = time.perf_counter()
+    passages = index.search(query, RETRIEVAL_TOP_K, RETRIEVAL_NPROBE, RETRIEVAL_MIN_SCORE)
+    _stats["searches"] += 1
+    _stats["total_ms"] += (time.perf_counter() - start) * 1000
+    return passages
+
+
+def grounded_prompt(query: str, passages: list) -> str:
+    """The user query prefixed with the retrieved passages, or the query alone if there are none."""
+    if not passages:
+        return query
+    references = "\n\n".join(
+        f"[{i}] {passage['title']}\n{passage['text'].strip()}" for i, passage in enumerate(passages, start=1)
+    )
+    return (
+        "Reference passages from Indian statutes and judgments. Use them where they are relevant "
+        "and cite the act or case they come from; ignore them if they do not apply.\n\n"
+        f"{references}\n\nQuestion: {query}"
+    )
+
+
+def stats() -> dict:
+    index = _index
+    searches = _stats["searches"]
+    return {
+        "loaded": index is not None,
+        "passages": len(index) if index is not None else 0,
+        "lists": len(index.centroids) if index is not None else 0,
+        "version": os.path.basename(index.directory) if index is not None else None,
+        "searches": searches,
+        "avg_search_ms": round(_stats["total_ms"] / searches, 3) if searches else 0.0,
+        "loads": _stats["loads"],
+        "load_error": _stats["load_error"],
+    }
@@ -1,9 +1,17 @@
+import copy
+import io
 import os
 import re
-import time
+import threading
+import unicodedata
+import urllib.parse
+from docx import Document
 from docxtpl import DocxTemplate
-import docx2pdf
-from functools import lru_cache
+from fastapi.responses import StreamingResponse
+
+from app.utils import file_manager
+from app.utils.file_manager import OUTPUT_DIR
+from app.utils.pdf_converter import convert_to_pdf, convert_bytes_to_pdf
 
 # --- File Path Configuration ---
 # Get the absolute path of the current file (.../backend/app/utils)
@@ -12,19 +20,40 @@ BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 APP_DIR = os.path.dirname(BASE_DIR)
 
 TEMPLATE_DIR = os.path.join(APP_DIR, "templates")
-OUTPUT_DIR = os.path.join(APP_DIR, "static/outputs")
-os.makedirs(OUTPUT_DIR, exist_ok=True)
 
 
-# --- Template Loader ---
-# We are removing @lru_cache to prevent the "file not found" bug
+# --- Template Registry ---
+# A rendered DocxTemplate is mutated in place, so we can't hand the same
+# object to two requests (that is why @lru_cache was removed earlier). Instead
+# each template is parsed once and every request gets a deep copy of the
+# parsed document, which is much cheaper than re-reading and re-parsing the
+# .docx zip. A changed file mtime triggers a re-parse.
+_template_cache = {}  # template_name -> (mtime_ns, parsed python-docx Document)
+_template_lock = threading.Lock()
+
+
+def _load_parsed_template(template_name, template_path):
+    mtime = os.stat(template_path).st_mtime_ns
+    cached = _template_cache.get(template_name)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+    with _template_lock:
+        cached = _template_cache.get(template_name)
+        if cached is None or cached[0] != mtime:
+            cached = (mtime, Document(template_path))
+            _template_cache[template_name] = cached
+    return cached[1]
+
+
 def get_template(template_name):
-    """ Loads a DocxTemplate from disk. """
+    """ Returns a fresh DocxTemplate backed by a copy of the cached parsed template. """
     template_path = os.path.join(TEMPLATE_DIR, template_name)
     if not os.path.exists(template_path):
         print(f"Template file not found at: {template_path}")
         return None
-    return DocxTemplate(template_path)
+    doc = DocxTemplate(template_path)
+    doc.docx = copy.deepcopy(_load_parsed_template(template_name, template_path))
+    return doc
 
 
 # --- Filename Sanitizer ---
@@ -34,36 +63,83 @@ def sanitize_filename(text):
     return text
 
 
+def content_disposition(filename: str) -> str:
+    """
+    Attachment header for `filename`. Header values must be latin-1, so
+    non-ASCII names ("राम-Kumar.docx") go in the RFC 5987 filename* parameter
+    with an ASCII fallback for older clients.
+    """
+    stem, ext = os.path.splitext(filename)
+    ascii_stem = unicodedata.normalize("NFKD", stem).encode("ascii", "ignore").decode()
+    ascii_stem = re.sub(r'[^\w.-]+', '_', ascii_stem).strip("_.-") or "document"
+    return f'attachment; filename="{ascii_stem}{ext}"; filename*=UTF-8\'\'{urllib.parse.quote(filename)}'
+
+
 # --- Shared File Generation Helper ---
 def generate_and_save_files(doc: DocxTemplate, context: dict, base_filename: str):
     """
     Renders, saves, and converts a doc template.
     Returns a dictionary of download links.
     """
-    # Add a unique timestamp to prevent file locking
-    timestamp = int(time.time())
-    unique_filename = f"{base_filename}_{timestamp}"
+    # Name files by content hash: an identical request reuses the existing files
+    content_key = file_manager.content_key(doc.template_file, context)
+    unique_filename = f"{base_filename}_{content_key[:16]}"
 
     output_docx_name = f"{unique_filename}.docx"
     output_pdf_name = f"{unique_filename}.pdf"
     output_docx_path = os.path.join(OUTPUT_DIR, output_docx_name)
     output_pdf_path = os.path.join(OUTPUT_DIR, output_pdf_name)
 
-    doc.render(context)
-    doc.save(output_docx_path)
-    
-    pdf_url = None
-    try:
-        # We will keep this conversion, as it was working for you.
-        docx2pdf.convert(output_docx_path, output_pdf_path)
-        pdf_url = f"/static/outputs/{output_pdf_name}"
-    except Exception as pdf_error:
-        print(f"Warning: PDF conversion failed: {pdf_error}")
-        # This can happen if Microsoft Word is not installed or permissions are wrong
-        # We still return the .docx file
-        pass
+    with file_manager.lock_for(content_key):
+        if not file_manager.reuse(output_docx_path):
+            doc.render(context)
+            file_manager.write_atomic(output_docx_path, doc.save)
+
+        pdf_url = None
+        if file_manager.reuse(output_pdf_path):
+            pdf_url = f"/static/outputs/{output_pdf_name}"
+        else:
+            try:
+                # Handled by the pooled engine in pdf_converter (LibreOffice workers or Word)
+                file_manager.write_atomic(output_pdf_path, lambda tmp_path: convert_to_pdf(output_docx_path, tmp_path))
+                pdf_url = f"/static/outputs/{output_pdf_name}"
+            except Exception as pdf_error:
+                print(f"Warning: PDF conversion failed: {pdf_error}")
+                # This can happen if no PDF engine is available or a worker is busy
+                # We still return the .docx file
 
     return {
         "docx_url": f"/static/outputs/{output_docx_name}",
         "pdf_url": pdf_url
-    }
\ No newline at end of file
+    }
+
+
+# --- In-Memory Rendering ---
+MEDIA_TYPES = {
+    "docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+    "pdf": "application/pdf",
+}
+
+
+def render_to_bytes(doc: DocxTemplate, context: dict) -> bytes:
+    """Renders a template into memory and returns the .docx bytes."""
+    doc.render(context)
+    buffer = io.BytesIO()
+    doc.save(buffer)
+    return buffer.getvalue()
+
+
+def render_file_response(doc: DocxTemplate, context: dict, base_filename: str, file_format: str):
+    """
+    Renders (and optionally converts) a document entirely in memory and streams
+    it back as an attachment. Nothing is written to static/outputs.
+    """
+    data = render_to_bytes(doc, context)
+    if file_format == "pdf":
+        data = convert_bytes_to_pdf(data)
+    filename = f"{base_filename}.{file_format}"
+    return StreamingResponse(
+        io.BytesIO(data),
+        media_type=MEDIA_TYPES[file_format],
+        headers={"Content-Disposition": content_disposition(filename)},
+    )
@@ -0,0 +1,142 @@
+import asyncio
+import os
+import threading
+import time
+import uuid
+
+from app.core.cache import make_key
+from app.core.config import OUTPUT_MAX_AGE, OUTPUT_MAX_BYTES, OUTPUT_SWEEP_INTERVAL
+
+# --- Generated File Lifecycle ---
+# Output files are named after a hash of (template, rendered context), so an
+# identical request reuses the file that is already on disk instead of
+# rendering and converting again. Every generation or reuse bumps the file's
+# mtime, which serves as its "last used" time; a background sweeper deletes
+# files unused for OUTPUT_MAX_AGE and then trims the oldest until the
+# directory fits in OUTPUT_MAX_BYTES.
+
+# --- File Path Configuration ---
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+APP_DIR = os.path.dirname(BASE_DIR)
+OUTPUT_DIR = os.path.join(APP_DIR, "static", "outputs")
+os.makedirs(OUTPUT_DIR, exist_ok=True)
+
+# Striped locks: identical requests serialise on the same key, others don't contend
+_locks = [threading.Lock() for _ in range(64)]
+
+_stats = {"dedup_hits": 0, "files_written": 0, "evicted_files": 0, "evicted_bytes": 0, "last_sweep": None}
+
+
+def content_key(template_path: str, context: dict) -> str:
+    """Hash of the template (name + version) and the exact context it is rendered with."""
+    template_version = os.stat(template_path).st_mtime_ns if os.path.exists(template_path) else 0
+    return make_key(os.path.basename(template_path), template_version, context)
+
+
+def lock_for(key: str) -> threading.Lock:
+    return _locks[int(key[:8], 16) % len(_locks)]
+
+
+def touch(path: str) -> bool:
+    """Marks a file as just used. Returns False if it does not exist."""
+    try:
+        os.utime(path)
+    except FileNotFoundError:
+        return False
+    return True
+
+
+def reuse(path: str) -> bool:
+    """Returns True (and marks the file as used) when an identical output already exists."""
+    if not touch(path):
+        return False
+    _stats["dedup_hits"] += 1
+    return True
+
+
+def write_bytes(path: str, data: bytes):
+    def writer(tmp_path):
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+    write_atomic(path, writer)
+
+
+def write_atomic(path: str, writer):
+    """
+    Calls `writer(tmp_path)` and moves the result into place, so readers never
+    see a half-written file. The temp name keeps the real extension because
+    some converters infer the output format from it.
+    """
+    directory, name = os.path.split(path)
+    tmp_path = os.path.join(directory, f".{uuid.uuid4().hex}.{name}")
+    try:
+        writer(tmp_path)
+        os.replace(tmp_path, path)
+        _stats["files_written"] += 1
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def _scan():
+    entries = []
+    with os.scandir(OUTPUT_DIR) as it:
+        for entry in it:
+            if entry.is_file():
+                try:
+                    st = entry.stat()
+                except FileNotFoundError:
+                    continue  # removed mid-scan (e.g. a tmp file being renamed)
+                entries.append((st.st_mtime, st.st_size, entry.path))
+    return entries
+
+
+def _remove(path: str, size: int):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        return
+    _stats["evicted_files"] += 1
+    _stats["evicted_bytes"] += size
+
+
+def sweep():
+    """Evicts files by age, then oldest-first until the size budget is met."""
+    cutoff = time.time() - OUTPUT_MAX_AGE
+    remaining = []
+    for mtime, size, path in _scan():
+        if mtime < cutoff:
+            _remove(path, size)
+        else:
+            remaining.append((mtime, size, path))
+
+    total = sum(size for _, size, _ in remaining)
+    if total > OUTPUT_MAX_BYTES:
+        remaining.sort()
+        for mtime, size, path in remaining:
+            if total <= OUTPUT_MAX_BYTES:
+                break
+            _remove(path, size)
+            total -= size
+    _stats["last_sweep"] = time.time()
+
+
+def disk_usage() -> dict:
+    entries = _scan()
+    return {
+        "files": len(entries),
+        "bytes": sum(size for _, size, _ in entries),
+        "max_bytes": OUTPUT_MAX_BYTES,
+        "max_age_seconds": OUTPUT_MAX_AGE,
+        **_stats,
+    }
+
+
+async def run_sweeper():
+    """Background task started from the app lifespan."""
+    while True:
+        try:
+            await asyncio.to_thread(sweep)
+        except Exception as e:
+            print(f"Output sweeper error: {e}")
+        await asyncio.sleep(OUTPUT_SWEEP_INTERVAL)
@@ -0,0 +1,361 @@
+import re
+import threading
+
+from app.core.config import NER_MIN_CONFIDENCE, NER_WINDOW_CHARS, NER_POLICE_STATIONS_FILE
+
+# --- Local FIR Field Extraction ---
+# FIRs mostly follow the NCRB form, so several of the analyzer's fields sit
+# behind fixed labels ("FIR No.", "P.S.", "Date of occurrence", "u/s 379 IPC")
+# and can be read without a model. extract() runs a bank of compiled patterns
+# per field, each with a confidence reflecting how unambiguous its label is;
+# prepare() keeps the fields at or above NER_MIN_CONFIDENCE and cuts the text
+# down to windows around the cues of the fields still unresolved, which is
+# all the model then sees. When every field resolves, no model call is made.
+#
+# Field names match the analyzer's ANALYSIS_SCHEMA.
+
+FIELDS = (
+    "fir_number", "police_station", "date_of_filing", "complainant",
+    "date_and_time_of_incident", "place_of_incident", "accused_name",
+    "witnesses", "offence", "offences_mentioned", "investigating_officer",
+)
+
+# --- Building Blocks ---
+_MONTHS = r"(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Sept|Oct|Nov|Dec)[a-z]*\.?"
+_DATE = rf"(?:\d{{1,2}}[./-]\d{{1,2}}[./-](?:\d{{4}}|\d{{2}})|\d{{1,2}}(?:st|nd|rd|th)?\s+{_MONTHS},?\s+\d{{4}}|{_MONTHS}\s+\d{{1,2}},?\s+\d{{4}})"
+_TIME = r"(?:\d{1,2}[:.]\d{2}(?:\s*(?:hrs|hours|[AaPp]\.?\s?[Mm]\.?))?|\d{1,2}\s*(?:hrs|hours|[AaPp]\.?\s?[Mm]\.?))"
+_SEP = r"\s*[:\-\u2013]\s*"
+_OPT_SEP = rf"(?:{_SEP}|\s*)"
+_TITLE = r"(?:(?:Shri|Smt|Sri|Mr|Mrs|Ms|Km|Kumari|Dr)\.?\s+)"
+# Capitalised words that end a name rather than continue it ("Ramesh Kumar Address: ...")
+_STOP = r"(?!(?:Address|Age|Aged|Father|Husband|Occupation|Resident|R/o|Date|Time|Mobile|Phone|Nationality|Police|District|Distt|Village|House|Year|State|FIR|Rank|Name)\b)"
+_NAME = rf"{_TITLE}?{_STOP}[A-Z][A-Za-z.']*(?:[ \t]+(?:{_TITLE}|{_STOP}[A-Z][A-Za-z.']*|[SDWsdw]/[Oo]\.?)){{0,6}}"
+_NAMES = rf"{_NAME}(?:\s*(?:,|;|\band\b|&)\s*{_NAME})*"
+_RANK = r"(?:SI|S\.I\.|ASI|A\.S\.I\.|HC|H\.C\.|Head\s+Constable|Constable|Inspector|Insp\.|Sub[\s-]Inspector|SHO|S\.H\.O\.|DSP|ACP)"
+
+_ACTS = {
+    "IPC": r"I\.?\s?P\.?\s?C\.?|Indian\s+Penal\s+Code",
+    "BNS": r"B\.?\s?N\.?\s?S\.?|Bharatiya\s+Nyaya\s+Sanhita",
+}
+# Procedure codes: sections of these are not offences
+_PROCEDURE = r"Cr\.?\s?P\.?\s?C\.?|Code\s+of\s+Criminal\s+Procedure|B\.?\s?N\.?\s?S\.?\s?S\.?|Bharatiya\s+Nagarik\s+Suraksha\s+Sanhita"
+_OTHER_ACT = r"[A-Z][A-Za-z.]*(?:\s+(?:[A-Z][A-Za-z.]*|of|and|the|&))*\s+Act(?:,?\s*\d{4})?"
+_ACT = "|".join(
+    [f"(?P<PROCEDURE>{_PROCEDURE})"]
+    + [f"(?P<{name}>{pattern})" for name, pattern in _ACTS.items()]
+    + [f"(?P<OTHER>{_OTHER_ACT})"]
+)
+_SECTION_NUMBER = r"\d{1,3}[A-Z]?(?:\s?\(\d{1,2}\))*(?:\s?\([a-z]\))?"
+_SECTION_LIST = rf"{_SECTION_NUMBER}(?:\s*(?:,|/|&|\band\b|r/w|read\s+with)\s*{_SECTION_NUMBER})*"
+
+# --- Section Gazetteer ---
+# Common IPC sections and their BNS (2023) counterparts, by base section number.
+OFFENCES = {
+    "IPC": {
+        "34": "Common intention", "120B": "Criminal conspiracy", "147": "Rioting",
+        "148": "Rioting, armed with deadly weapon", "149": "Unlawful assembly (common object)",
+        "279": "Rash driving", "294": "Obscene acts", "302": "Murder",
+        "304": "Culpable homicide not amounting to murder", "304A": "Causing death by negligence",
+        "304B": "Dowry death", "306": "Abetment of suicide", "307": "Attempt to murder",
+        "323": "Voluntarily causing hurt", "324": "Voluntarily causing hurt by dangerous weapons",
+        "325": "Voluntarily causing grievous hurt", "326": "Grievous hurt by dangerous weapons",
+        "341": "Wrongful restraint", "342": "Wrongful confinement",
+        "354": "Assault on a woman with intent to outrage her modesty", "354A": "Sexual harassment",
+        "354D": "Stalking", "363": "Kidnapping", "364": "Kidnapping in order to murder",
+        "364A": "Kidnapping for ransom", "376": "Rape", "379": "Theft",
+        "380": "Theft in a dwelling house", "384": "Extortion", "392": "Robbery", "395": "Dacoity",
+        "406": "Criminal breach of trust", "409": "Criminal breach of trust by a public servant",
+        "411": "Dishonestly receiving stolen property", "420": "Cheating",
+        "447": "Criminal trespass", "448": "House-trespass", "452": "House-trespass after preparation for hurt",
+        "454": "Lurking house-trespass or house-breaking", "457": "House-breaking by night",
+        "467": "Forgery of valuable security", "468": "Forgery for the purpose of cheating",
+        "471": "Using a forged document as genuine", "498A": "Cruelty by husband or his relatives",
+        "504": "Intentional insult to provoke breach of the peace", "506": "Criminal intimidation",
+        "509": "Insulting the modesty of a woman",
+    },
+    "BNS": {
+        "3": "Common intention", "61": "Criminal conspiracy", "64": "Rape",
+        "74": "Assault on a woman with intent to outrage her modesty", "75": "Sexual harassment",
+        "78": "Stalking", "79": "Insulting the modesty of a woman", "80": "Dowry death",
+        "85": "Cruelty by husband or his relatives", "103": "Murder",
+        "105": "Culpable homicide not amounting to murder", "106": "Causing death by negligence",
+        "108": "Abetment of suicide", "109": "Attempt to murder", "115": "Voluntarily causing hurt",
+        "117": "Voluntarily causing grievous hurt", "118": "Hurt by dangerous weapons",
+        "126": "Wrongful restraint", "127": "Wrongful confinement", "137": "Kidnapping",
+        "140": "Kidnapping for murder or ransom", "189": "Unlawful assembly", "191": "Rioting",
+        "281": "Rash driving", "296": "Obscene acts", "303": "Theft", "304": "Snatching",
+        "305": "Theft in a dwelling house", "308": "Extortion", "309": "Robbery", "310": "Dacoity",
+        "316": "Criminal breach of trust", "317": "Stolen property", "318": "Cheating",
+        "329": "Criminal trespass", "331": "House-trespass or house-breaking",
+        "336": "Forgery", "338": "Forgery of valuable security", "340": "Using a forged document as genuine",
+        "351": "Criminal intimidation", "352": "Intentional insult to provoke breach of the peace",
+    },
+}
+
+
+def _compile(patterns: list) -> list:
+    return [(re.compile(pattern), confidence) for pattern, confidence in patterns]
+
+
+# --- Pattern Banks ---
+# (pattern, confidence); each pattern captures the field in a group named "value".
+PATTERNS = {
+    "fir_number": _compile([
+        (rf"(?i:\b(?:F\.?\s?I\.?\s?R\.?|First\s+Information\s+Report)\s*(?:No|Number)\.?){_OPT_SEP}(?P<value>\d{{1,6}}\s*/\s*\d{{2,4}}|\d{{1,6}})\b", 0.95),
+        (rf"(?i:\b(?:Crime|Case)\s*(?:No|Number)\.?){_OPT_SEP}(?P<value>\d{{1,6}}\s*/\s*\d{{2,4}})\b", 0.85),
+    ]),
+    "police_station": _compile([
+        (rf"(?i:\b(?:Police\s+Station|P\.\s?S\.?|Thana)(?:\s+Name)?){_SEP}(?P<value>{_STOP}[A-Z][A-Za-z.]*(?:[ \t]+{_STOP}[A-Z][A-Za-z.]*){{0,3}})", 0.9),
+        (rf"(?i:\b(?:Police\s+Station|P\.\s?S\.|Thana))[ \t]+(?P<value>{_STOP}[A-Z][A-Za-z]+(?:[ \t]+{_STOP}[A-Z][A-Za-z]+){{0,2}})", 0.8),
+    ]),
+    "date_of_filing": _compile([
+        (rf"(?i:\bDate\s+(?:and\s+time\s+)?of\s+(?:F\.?I\.?R\.?|registration|report|filing)|\bFIR\s+date)[^\n\d]{{0,30}}(?P<value>{_DATE})", 0.9),
+        (rf"(?i:\bF\.?I\.?R\.?\s*No\.?{_OPT_SEP}[\w/]+\s*(?:dated|dtd\.?|dt\.?))\s*(?P<value>{_DATE})", 0.9),
+        (rf"(?i:\bInformation\s+received\s+at\s+(?:P\.?\s?S\.?|police\s+station))[^\n\d]{{0,30}}(?P<value>{_DATE})", 0.85),
+    ]),
+    "complainant": _compile([
+        (rf"(?i:\bName\s+of\s+(?:the\s+)?(?:complainant|informant)){_OPT_SEP}(?P<value>{_NAME})", 0.9),
+        (rf"(?i:\b(?:Complainant|Informant)(?:\s*/\s*(?:Informant|Complainant))?(?:'s\s+name|\s+name)?){_SEP}(?:\(?a\)?\s*(?i:Name){_OPT_SEP})?(?P<value>{_NAME})", 0.85),
+    ]),
+    "date_and_time_of_incident": _compile([
+        (rf"(?i:\b(?:Date\s+(?:and\s+time\s+)?of\s+(?:occurrence|incident|offen[cs]e)|Occurrence\s+of\s+offen[cs]e))[^\n\d]{{0,40}}(?P<value>{_DATE}(?:[^\n\d]{{0,20}}{_TIME})?)", 0.85),
+        (rf"(?i:\bon)\s+(?P<value>{_DATE}\s+(?i:at)\s+(?:(?i:about|around)\s+)?{_TIME})", 0.6),
+    ]),
+    "place_of_incident": _compile([
+        (rf"(?i:\bPlace\s+of\s+(?:occurrence|incident|offen[cs]e))(?:\s*\([^)\n]*\))?{_SEP}(?P<value>[^\n]{{3,120}})", 0.8),
+    ]),
+    "accused_name": _compile([
+        (rf"(?i:\bName\s+of\s+(?:the\s+)?accused(?:\s*\(s\))?){_OPT_SEP}(?P<value>{_NAMES})", 0.85),
+        (rf"(?i:\bAccused(?:\s+persons?|\s+name)?(?:\s*\(s\))?){_SEP}(?P<value>{_NAMES})", 0.8),
+        (rf"(?i:\bAccused(?:\s+persons?)?(?:\s*\(s\))?{_SEP}(?P<value>unknown|not\s+known|unidentified)(?:\s+persons?)?)", 0.85),
+    ]),
+    "witnesses": _compile([
+        (rf"(?i:\b(?:Name\s+of\s+)?(?:the\s+)?(?:eye[\s-]?)?witness(?:es)?(?:\s*\(s\))?){_SEP}(?P<value>{_NAMES})", 0.8),
+    ]),
+    "investigating_officer": _compile([
+        (rf"(?i:\b(?:Investigating\s+Officer|Name\s+of\s+(?:the\s+)?I\.?\s?O\.?|I\.\s?O\.)(?:'s\s+name)?)(?:\s*\)|{_SEP})\s*(?P<value>(?:{_RANK}\s+)?{_NAME})", 0.85),
+        (rf"(?i:\binvestigation\s+(?:is\s+|was\s+)?(?:handed\s+over|entrusted|assigned|given)\s+to)\s+(?P<value>{_RANK}\s+{_NAME})", 0.8),
+    ]),
+}
+
+_SECTIONS_AFTER = re.compile(
+    rf"(?i:\b(?:u/s|u/ss|under\s+sections?|sections?|secs?\.?))[ \t]*(?P<numbers>{_SECTION_LIST})\s*(?i:of\s+(?:the\s+)?)?(?:{_ACT})?"
+)
+_SECTIONS_BEFORE = re.compile(
+    rf"\b(?:{_ACT})(?:\s*,?\s*(?:1860|2023))?\s*(?i:(?:u/s|sections?|secs?\.?)\s*)?[:\-]?[ \t]*(?P<numbers>{_SECTION_LIST})\b"
+)
+_SECTION_SPLIT = re.compile(r"\s*(?:,|/|&|\band\b|r/w|read\s+with)\s*", re.I)
+_UNKNOWN = re.compile(r"(?i)unknown|not\s+known|unidentified")
+_NONE = re.compile(r"(?i)nil|none|no|n/?a|not\s+applicable")
+
+# Where to look for each field when it is left to the model
+CUES = {
+    "fir_number": r"(?i)\bF\.?\s?I\.?\s?R\b|\bcrime\s+no|\bcase\s+no",
+    "police_station": r"(?i)police\s+station|\bP\.\s?S\.|\bPS\b|thana",
+    "date_of_filing": r"(?i)\bdated?\b|\bdtd?\b|received|registered|lodged",
+    "complainant": r"(?i)complainant|informant|\bI\s+(?:am|was|have|had)\b",
+    "date_and_time_of_incident": r"(?i)occurr|incident|\bon\s+\d|night|morning|evening",
+    "place_of_incident": r"(?i)place|occurrence|\bnear\b|\bat\s+village|address|locality",
+    "accused_name": r"(?i)accused|suspect",
+    "witnesses": r"(?i)witness|\bsaw\b|\bseen\b|present\s+at|\bnoticed\b",
+    "offence": r"(?i)offen[cs]e|section|u/s|theft|murder|assault|cheat|robbery|hurt",
+    "offences_mentioned": r"(?i)section|u/s|\bIPC\b|\bBNS\b|\bAct\b",
+    "investigating_officer": r"(?i)investigat|\bI\.\s?O\.|officer|inspector|\bS\.?I\.?\b|S\.?H\.?O",
+}
+CUES = {field: re.compile(pattern) for field, pattern in CUES.items()}
+
+
+# --- Police Station Gazetteer ---
+def _load_stations(path: str):
+    """Compiled alternation of the station names in NER_POLICE_STATIONS_FILE (one per line), or None."""
+    if not path:
+        return None, {}
+    try:
+        with open(path, encoding="utf-8") as f:
+            names = [line.strip() for line in f if line.strip() and not line.startswith("#")]
+    except OSError as e:
+        print(f"Could not load police station gazetteer {path}: {e}")
+        return None, {}
+    if not names:
+        return None, {}
+    canonical = {" ".join(name.lower().split()): name for name in names}
+    # Longest first, so "Civil Lines North" wins over "Civil Lines"
+    alternation = "|".join(re.escape(name).replace(r"\ ", r"\s+") for name in sorted(names, key=len, reverse=True))
+    return re.compile(rf"(?i)\b(?:{alternation})\b"), canonical
+
+
+_STATIONS_RE, _STATIONS = _load_stations(NER_POLICE_STATIONS_FILE)
+_STATION_CUE = re.compile(r"(?i)(?:police\s+station|\bP\.\s?S\.?|\bPS|thana)\W{0,5}$")
+
+
+def _clean(value: str) -> str:
+    return " ".join(value.split()).strip(" ,;:.-")
+
+
+def _split_names(value: str) -> list:
+    return [_clean(name) for name in re.split(r"\s*(?:,|;|\band\b|&)\s*", value) if _clean(name)]
+
+
+def _sections(text: str) -> list:
+    """(act, section) pairs in order of first mention; act is "IPC", "BNS", another Act's name, or None."""
+    found = {}
+    for pattern in (_SECTIONS_AFTER, _SECTIONS_BEFORE):
+        for match in pattern.finditer(text):
+            if match.group("PROCEDURE"):
+                continue
+            act = next((name for name in _ACTS if match.group(name)), None) or (
+                match.group("OTHER") and " ".join(match.group("OTHER").split())
+            )
+            for number in _SECTION_SPLIT.split(match.group("numbers")):
+                number = re.sub(r"\s+", "", number).upper()
+                if number:
+                    key = (act, number)
+                    if key not in found and (None, number) not in found:
+                        found[key] = match.start()
+                    elif act and (None, number) in found:
+                        # The act was only named later in the list; attach it
+                        found[key] = found.pop((None, number))
+    return sorted(found, key=found.get)
+
+
+def _offence_name(act: str, section: str):
+    base = re.match(r"\d+[A-Z]?", section).group(0)
+    return OFFENCES.get(act, {}).get(base)
+
+
+def extract(text: str) -> dict:
+    """{field: (value, confidence)} for every field a pattern found; witnesses is a list."""
+    results = {}
+    for field, patterns in PATTERNS.items():
+        for pattern, confidence in patterns:
+            if field in results and results[field][1] >= confidence:
+                break
+            match = pattern.search(text)
+            if match:
+                value = match.group("value")
+                if field in ("accused_name", "witnesses") and _UNKNOWN.fullmatch(value.strip()):
+                    value = "Unknown"
+                if field == "witnesses":
+                    value = [] if _NONE.fullmatch(value.strip()) else _split_names(value)
+                else:
+                    value = _clean(value)
+                results[field] = (value, confidence)
+
+    if _STATIONS_RE is not None:
+        station = results.get("police_station")
+        known = station and _STATIONS.get(station[0].lower())
+        if known:
+            results["police_station"] = (known, 0.95)
+        else:
+            for match in _STATIONS_RE.finditer(text):
+                # A gazetteer name right after "P.S."/"Police Station" is near certain
+                cued = _STATION_CUE.search(text, max(0, match.start() - 20), match.start())
+                confidence = 0.95 if cued else 0.7
+                if not station or confidence > station[1]:
+                    station = (_STATIONS[" ".join(match.group(0).lower().split())], confidence)
+                    results["police_station"] = station
+                if cued:
+                    break
+
+    if "witnesses" not in results and not CUES["witnesses"].search(text):
+        # No witness section and no cue word, but bystanders may still be named
+        # in other words: a guess below NER_MIN_CONFIDENCE, so the model decides
+        results["witnesses"] = ([], 0.6)
+
+    sections = _sections(text)
+    if sections:
+        described = []
+        offences = []
+        for act, section in sections:
+            name = _offence_name(act, section)
+            label = f"Section {section} {act}" if act else f"Section {section}"
+            described.append(f"{label} ({name})" if name else label)
+            if name and name not in offences and name != "Common intention":
+                offences.append(name)
+        with_act = all(act for act, _ in sections)
+        results["offences_mentioned"] = (", ".join(described), 0.9 if with_act else 0.6)
+        if offences:
+            results["offence"] = (", ".join(offences), 0.85 if with_act else 0.5)
+    return results
+
+
+def focused_text(text: str, fields: list, window: int = None) -> str:
+    """
+    The parts of `text` around the cues of `fields`, merged into windows of
+    about `window` characters, in document order; the whole text when a field
+    has no cue or the windows would cover most of it anyway.
+    """
+    window = window or NER_WINDOW_CHARS
+    spans = []
+    for field in fields:
+        matches = list(CUES[field].finditer(text))
+        if not matches:
+            return text
+        for match in matches:
+            spans.append((max(0, match.start() - window // 2), min(len(text), match.end() + window // 2)))
+    spans.sort()
+    merged = [list(spans[0])]
+    for start, end in spans[1:]:
+        if start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    if sum(end - start for start, end in merged) > len(text) * 0.8:
+        return text
+    return "\n[...]\n".join(text[start:end].strip() for start, end in merged)
+
+
+_stats = {"documents": 0, "fields_resolved": 0, "model_skipped": 0, "chars_in": 0, "chars_sent": 0}
+_stats_lock = threading.Lock()
+
+
+def resolve(found: dict, fields=FIELDS) -> dict:
+    """{field: value} for the fields of an extract() result at or above NER_MIN_CONFIDENCE."""
+    return {field: found[field][0] for field in fields if field in found and found[field][1] >= NER_MIN_CONFIDENCE}
+
+
+# Fields that tell one FIR from another filed on near-identical text
+IDENTITY_FIELDS = ("fir_number", "police_station", "date_of_filing")
+
+
+def identity(found: dict):
+    """
+    The FIR's identity key from an extract() result: its normalised
+    IDENTITY_FIELDS (None where not found), or None without a FIR number.
+    """
+    if "fir_number" not in found:
+        return None
+    return tuple(
+        re.sub(r"\W+", "", found[field][0]).lower() if field in found else None for field in IDENTITY_FIELDS
+    )
+
+
+def prepare(text: str, fields=FIELDS, found: dict = None) -> tuple:
+    """
+    (resolved, missing, prompt_text): the fields resolved locally at or above
+    NER_MIN_CONFIDENCE as {field: value}, the rest in schema order, and the
+    text windows the model needs for them ("" when nothing is missing).
+    Pass `found` to reuse an extract() result for the same text.
+    """
+    if found is None:
+        found = extract(text)
+    resolved = resolve(found, fields)
+    missing = [field for field in fields if field not in resolved]
+    prompt_text = focused_text(text, missing) if missing else ""
+    with _stats_lock:
+        _stats["documents"] += 1
+        _stats["fields_resolved"] += len(resolved)
+        _stats["model_skipped"] += not missing
+        _stats["chars_in"] += len(text)
+        _stats["chars_sent"] += len(prompt_text)
+    return resolved, missing, prompt_text
+
+
+def stats() -> dict:
+    documents = _stats["documents"]
+    return {
+        **_stats,
+        "avg_fields_resolved": round(_stats["fields_resolved"] / documents, 2) if documents else 0.0,
+        "prompt_reduction": round(1 - _stats["chars_sent"] / _stats["chars_in"], 4) if _stats["chars_in"] else 0.0,
+        "gazetteer_stations": len(_STATIONS),
+    }
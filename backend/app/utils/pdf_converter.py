@@ -0,0 +1,287 @@
+import os
+import queue
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import xmlrpc.client
+
+from app.core.config import (
+    PDF_ENGINE,
+    PDF_WORKERS,
+    PDF_WORKER_BASE_PORT,
+    PDF_CONVERT_TIMEOUT,
+    UNOSERVER_BIN,
+)
+
+# --- Pluggable DOCX -> PDF Conversion ---
+# docx2pdf drives MS Word, so it only works on Windows/macOS desktops and blocks
+# the handler while Word starts. On servers we keep a pool of long-lived
+# headless LibreOffice processes (via `unoserver`) and hand each conversion to
+# an idle one over XML-RPC, so concurrent requests convert in parallel without
+# launching a new office process each time.
+#
+# Every app process (e.g. each uvicorn worker) runs its own pool. With
+# PDF_WORKER_BASE_PORT=0 (the default) each LibreOffice worker listens on free
+# ports picked when it is spawned, and profiles are per process, so pools never
+# collide; a fixed base port only suits a single app process. If the pool cannot
+# start, the app keeps running with PDF conversion disabled (DOCX only).
+
+
+def _free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class _TimeoutTransport(xmlrpc.client.Transport):
+    def __init__(self, timeout):
+        super().__init__()
+        self.timeout = timeout
+
+    def make_connection(self, host):
+        connection = super().make_connection(host)
+        connection.timeout = self.timeout
+        return connection
+
+
+class _UnoWorker:
+    """One `unoserver` process with its own LibreOffice profile."""
+
+    def __init__(self, index: int, base_port: int):
+        self.index = index
+        self.base_port = base_port
+        self.port = None
+        self.uno_port = None
+        self.profile_dir = os.path.join(tempfile.gettempdir(), f"kanoonai_lo_profile_{os.getpid()}_{index}")
+        self.process = None
+
+    def spawn(self):
+        if self.base_port:
+            self.port, self.uno_port = self.base_port + 2 * self.index, self.base_port + 2 * self.index + 1
+        else:
+            self.port, self.uno_port = _free_port(), _free_port()
+        self.process = subprocess.Popen(
+            [
+                UNOSERVER_BIN,
+                "--interface", "127.0.0.1",
+                "--port", str(self.port),
+                "--uno-port", str(self.uno_port),
+                "--user-installation", self.profile_dir,
+            ],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+
+    def wait_ready(self, timeout: float = 60.0):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if not self.alive():
+                raise RuntimeError(f"PDF worker {self.index} exited during startup.")
+            try:
+                with socket.create_connection(("127.0.0.1", self.port), timeout=1):
+                    return
+            except OSError:
+                time.sleep(0.25)
+        raise RuntimeError(f"PDF worker {self.index} did not become ready in {timeout:.0f}s.")
+
+    def alive(self) -> bool:
+        return self.process is not None and self.process.poll() is None
+
+    def _proxy(self):
+        return xmlrpc.client.ServerProxy(
+            f"http://127.0.0.1:{self.port}",
+            transport=_TimeoutTransport(PDF_CONVERT_TIMEOUT),
+            allow_none=True,
+        )
+
+    def convert(self, docx_path: str, pdf_path: str):
+        # unoserver signature: inpath, indata, outpath, convert_to, filtername,
+        # filter_options, update_index, infiltername
+        self._proxy().convert(docx_path, None, pdf_path, "pdf", None, [], True, None)
+
+    def convert_bytes(self, docx_bytes: bytes) -> bytes:
+        # With no outpath, unoserver returns the converted document itself
+        result = self._proxy().convert(None, xmlrpc.client.Binary(docx_bytes), None, "pdf", None, [], True, None)
+        return result.data
+
+    def stop(self):
+        if self.alive():
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+        self.process = None
+
+
+class UnoserverPool:
+    """A fixed pool of headless LibreOffice workers fed from a job queue."""
+
+    name = "unoserver"
+
+    def __init__(self, size: int, base_port: int):
+        self._workers = [_UnoWorker(i, base_port) for i in range(max(1, size))]
+        self._idle = queue.Queue()
+        self._started = False
+        self._lock = threading.Lock()
+
+    def start(self):
+        with self._lock:
+            if self._started:
+                return
+            try:
+                for worker in self._workers:
+                    worker.spawn()
+                for worker in self._workers:
+                    worker.wait_ready()
+                    self._idle.put(worker)
+            except Exception:
+                for worker in self._workers:
+                    worker.stop()
+                self._idle = queue.Queue()
+                raise
+            self._started = True
+            print(f"PDF engine: started {len(self._workers)} unoserver worker(s).")
+
+    def _acquire(self) -> _UnoWorker:
+        self.start()
+        try:
+            worker = self._idle.get(timeout=PDF_CONVERT_TIMEOUT)
+        except queue.Empty:
+            raise RuntimeError("All PDF workers are busy; please try again shortly.")
+        if not worker.alive():
+            print(f"PDF worker {worker.index} died; restarting it.")
+            try:
+                worker.spawn()
+                worker.wait_ready()
+            except Exception:
+                self._idle.put(worker)
+                raise
+        return worker
+
+    def convert(self, docx_path: str, pdf_path: str):
+        worker = self._acquire()
+        try:
+            worker.convert(os.path.abspath(docx_path), os.path.abspath(pdf_path))
+        finally:
+            self._idle.put(worker)
+
+    def convert_bytes(self, docx_bytes: bytes) -> bytes:
+        worker = self._acquire()
+        try:
+            return worker.convert_bytes(docx_bytes)
+        finally:
+            self._idle.put(worker)
+
+    def stop(self):
+        with self._lock:
+            for worker in self._workers:
+                worker.stop()
+            self._idle = queue.Queue()
+            self._started = False
+
+    def stats(self) -> dict:
+        return {"engine": self.name, "workers": len(self._workers), "idle": self._idle.qsize()}
+
+
+class Docx2PdfEngine:
+    """MS Word via docx2pdf (Windows/macOS only). Word automation is not re-entrant."""
+
+    name = "docx2pdf"
+
+    def __init__(self):
+        self._lock = threading.Lock()
+
+    def start(self):
+        pass
+
+    def convert(self, docx_path: str, pdf_path: str):
+        import docx2pdf
+        with self._lock:
+            docx2pdf.convert(docx_path, pdf_path)
+
+    def convert_bytes(self, docx_bytes: bytes) -> bytes:
+        # Word only works on files, so round-trip through a private temp dir
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            docx_path = os.path.join(tmp_dir, "document.docx")
+            pdf_path = os.path.join(tmp_dir, "document.pdf")
+            with open(docx_path, "wb") as f:
+                f.write(docx_bytes)
+            self.convert(docx_path, pdf_path)
+            with open(pdf_path, "rb") as f:
+                return f.read()
+
+    def stop(self):
+        pass
+
+    def stats(self) -> dict:
+        return {"engine": self.name}
+
+
+class DisabledEngine:
+    """Used when no converter is available; callers fall back to DOCX only."""
+
+    name = "none"
+
+    def start(self):
+        pass
+
+    def convert(self, docx_path: str, pdf_path: str):
+        raise RuntimeError("PDF conversion is not available on this server (set PDF_ENGINE).")
+
+    def convert_bytes(self, docx_bytes: bytes) -> bytes:
+        raise RuntimeError("PDF conversion is not available on this server (set PDF_ENGINE).")
+
+    def stop(self):
+        pass
+
+    def stats(self) -> dict:
+        return {"engine": self.name}
+
+
+def _select_engine():
+    engine = PDF_ENGINE
+    if engine == "auto":
+        if shutil.which(UNOSERVER_BIN):
+            engine = "unoserver"
+        elif sys.platform in ("win32", "darwin"):
+            engine = "docx2pdf"
+        else:
+            engine = "none"
+    if engine == "unoserver":
+        return UnoserverPool(PDF_WORKERS, PDF_WORKER_BASE_PORT)
+    if engine == "docx2pdf":
+        return Docx2PdfEngine()
+    if engine != "none":
+        print(f"Warning: unknown PDF_ENGINE '{PDF_ENGINE}'; PDF conversion is disabled.")
+    return DisabledEngine()
+
+
+engine = _select_engine()
+
+
+def start_engine():
+    """
+    Starts the configured engine (called on app startup, blocking). A failure
+    is logged and PDF conversion is disabled instead of failing the startup.
+    """
+    global engine
+    try:
+        engine.start()
+    except Exception as e:
+        print(f"Warning: PDF engine '{engine.name}' failed to start ({e}); PDF conversion is disabled.")
+        engine = DisabledEngine()
+
+
+def convert_to_pdf(docx_path: str, pdf_path: str):
+    """Converts a .docx on disk to PDF using the configured engine (blocking)."""
+    engine.convert(docx_path, pdf_path)
+
+
+def convert_bytes_to_pdf(docx_bytes: bytes) -> bytes:
+    """Converts an in-memory .docx to PDF bytes using the configured engine (blocking)."""
+    return engine.convert_bytes(docx_bytes)
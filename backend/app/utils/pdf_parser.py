@@ -0,0 +1,151 @@
+import io
+import multiprocessing
+import os
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import pypdf
+
+# --- Page-Parallel PDF Text Extraction ---
+# Judgments can run to hundreds of pages, and pypdf spends real CPU on each
+# one. Small PDFs are read in-process; larger ones are split into page runs
+# that a process pool extracts concurrently, and the results are joined once
+# in page order. With a `max_chars` budget, extraction stops (and queued page
+# runs are cancelled) as soon as the pages read so far cover the budget.
+#
+# Pool workers are spawned and import this module, so it deliberately keeps
+# its top-level imports to pypdf and the standard library; app settings are
+# read lazily by the parent process only.
+
+# Pages are joined with a form feed, so later stages (e.g. text_chunker) can
+# still split on page boundaries
+PAGE_BREAK = "\f"
+
+_executor = None
+_executor_lock = threading.Lock()
+
+# Per-worker cache of the last opened document, so consecutive page runs of
+# the same file don't re-parse its cross-reference table.
+_worker_reader = (None, None)
+
+
+def _clean(text: str) -> str:
+    return (text or "").replace("\x00", "")
+
+
+def _extract_pages(path: str, start: int, stop: int) -> list:
+    """Runs in a pool worker: text of pages [start, stop) of the PDF at `path`."""
+    global _worker_reader
+    st = os.stat(path)
+    key = (path, st.st_mtime_ns, st.st_size)
+    cached_key, reader = _worker_reader
+    if cached_key != key:
+        reader = pypdf.PdfReader(path)
+        _worker_reader = (key, reader)
+    return [_clean(reader.pages[i].extract_text()) for i in range(start, stop)]
+
+
+def _settings():
+    from app.core.config import (
+        PDF_PARSE_WORKERS,
+        PDF_PARSE_PAGES_PER_TASK,
+        PDF_PARSE_PARALLEL_MIN_PAGES,
+    )
+    return PDF_PARSE_WORKERS, PDF_PARSE_PAGES_PER_TASK, PDF_PARSE_PARALLEL_MIN_PAGES
+
+
+def _get_executor(workers: int) -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ProcessPoolExecutor(
+                    max_workers=max(1, workers),
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+    return _executor
+
+
+def shutdown_pool():
+    """Stops the extraction workers (called on app shutdown)."""
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
+
+
+def _extract_sequential(reader, max_chars) -> str:
+    pages = []
+    total = 0
+    for page in reader.pages:
+        text = _clean(page.extract_text())
+        pages.append(text)
+        total += len(text)
+        if max_chars is not None and total >= max_chars:
+            break
+    return PAGE_BREAK.join(pages)
+
+
+def _extract_parallel(path: str, page_count: int, max_chars, workers: int, pages_per_task: int) -> str:
+    executor = _get_executor(workers)
+    ranges = [(start, min(start + pages_per_task, page_count)) for start in range(0, page_count, pages_per_task)]
+    # Keep a bounded number of runs in flight so an early stop wastes little work
+    lookahead = max(1, workers) * 2
+    futures = []
+    next_range = 0
+    pages = []
+    total = 0
+    try:
+        while next_range < len(ranges) or futures:
+            while next_range < len(ranges) and len(futures) < lookahead:
+                start, stop = ranges[next_range]
+                futures.append(executor.submit(_extract_pages, path, start, stop))
+                next_range += 1
+            run = futures.pop(0).result()
+            pages.extend(run)
+            total += sum(len(text) for text in run)
+            if max_chars is not None and total >= max_chars:
+                break
+    finally:
+        for future in futures:
+            future.cancel()
+    return PAGE_BREAK.join(pages)
+
+
+def extract_text(source, max_chars: int = None, parallel: bool = True) -> str:
+    """
+    Extracts the text of a PDF given as a path, bytes, or binary file object.
+    Pages are separated by PAGE_BREAK. With `max_chars`, stops after the first
+    pages whose text reaches that many characters; the result may run a little
+    past the budget, so callers that need a hard cap still slice it.
+    Pass parallel=False from code that already runs in a worker process.
+    """
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        source = io.BytesIO(source)
+    reader = pypdf.PdfReader(source)
+    if not parallel:
+        return _extract_sequential(reader, max_chars)
+
+    workers, pages_per_task, parallel_min_pages = _settings()
+    page_count = len(reader.pages)
+
+    if workers <= 1 or page_count < parallel_min_pages:
+        return _extract_sequential(reader, max_chars)
+
+    if isinstance(source, str):
+        return _extract_parallel(source, page_count, max_chars, workers, pages_per_task)
+
+    # Workers open the document themselves, so hand them a file path
+    source.seek(0)
+    with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as tmp:
+        while True:
+            block = source.read(1024 * 1024)
+            if not block:
+                break
+            tmp.write(block)
+    try:
+        return _extract_parallel(tmp.name, page_count, max_chars, workers, pages_per_task)
+    finally:
+        os.remove(tmp.name)
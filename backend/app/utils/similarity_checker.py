@@ -0,0 +1,229 @@
+import re
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from functools import lru_cache
+
+import numpy as np
+
+from app.core.config import (
+    NEAR_DUPLICATE_ENABLED,
+    NEAR_DUPLICATE_THRESHOLD,
+    NEAR_DUPLICATE_MAX_ENTRIES,
+)
+
+# --- Near-Duplicate Detection (MinHash + LSH) ---
+# Many uploads are the same FIR or judgment again: re-scanned, re-exported, or
+# with a stamp or page header changed. Their text is not byte-identical, so the
+# SHA-256 keyed caches miss, but the set of overlapping word shingles barely
+# moves. Each document gets a MinHash signature of its word SHINGLE_WORDS-grams;
+# the fraction of equal signature slots estimates the Jaccard similarity of
+# two documents' shingle sets. Signatures are banded into an LSH table so a
+# lookup only compares against the few documents that share a band, instead of
+# every document seen.
+#
+# NUM_PERM = BANDS * ROWS. With 16 bands of 8 rows a pair at similarity 0.9 is
+# a candidate with probability ~1.0 (0.95 at 0.8), while pairs below ~0.6
+# rarely are; the threshold check on the full signature then decides.
+#
+# Similar text alone is not the same document: two FIRs on a stock narrative
+# differ only in their number, dates and names, and still score ~0.99. Callers
+# therefore pass an identity key read from the text (FIR number, station and
+# filing date; case number and parties), and only an entry with an equal key
+# is reused.
+
+SHINGLE_WORDS = 5
+NUM_PERM = 128
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+
+_TOKEN_RE = re.compile(r"\w+")
+_SHINGLE_PRIME = np.uint64(1099511628211)  # FNV-64 prime
+_BLOCK = 8192  # shingles per block, bounds the (NUM_PERM, block) temporary
+
+# Fixed seed: signatures must agree across workers and restarts
+_rng = np.random.default_rng(0x5EED)
+_PERM_A = _rng.integers(1, 2 ** 63, NUM_PERM, dtype=np.uint64) | np.uint64(1)
+_PERM_B = _rng.integers(0, 2 ** 63, NUM_PERM, dtype=np.uint64)
+_SHIFT = np.uint64(32)
+
+
+@lru_cache(maxsize=1 << 18)
+def _token_hash(token: str) -> int:
+    return zlib.crc32(token.encode("utf-8"))
+
+
+def shingle_hashes(text: str) -> np.ndarray:
+    """Unique 64-bit hashes of the text's lowercase word SHINGLE_WORDS-grams."""
+    tokens = _TOKEN_RE.findall(text.lower())
+    if not tokens:
+        return np.empty(0, dtype=np.uint64)
+    hashes = np.fromiter(map(_token_hash, tokens), dtype=np.uint64, count=len(tokens))
+    width = min(SHINGLE_WORDS, len(hashes))
+    count = len(hashes) - width + 1
+    # Polynomial rolling hash over each window; uint64 arithmetic wraps
+    shingles = hashes[:count].copy()
+    for offset in range(1, width):
+        shingles *= _SHINGLE_PRIME
+        shingles += hashes[offset:offset + count]
+    return np.unique(shingles)
+
+
+def minhash(shingles: np.ndarray) -> np.ndarray:
+    """
+    NUM_PERM-slot MinHash signature (uint32) of a set of shingle hashes, using
+    multiply-shift hashing ((a * x + b) mod 2**64) >> 32 as the permutations.
+    """
+    signature = np.full(NUM_PERM, np.iinfo(np.uint32).max, dtype=np.uint64)
+    for start in range(0, len(shingles), _BLOCK):
+        block = shingles[start:start + _BLOCK]
+        # In place: one (NUM_PERM, block) temporary instead of three
+        permuted = np.multiply(_PERM_A[:, None], block)
+        permuted += _PERM_B[:, None]
+        permuted >>= _SHIFT
+        np.minimum(signature, permuted.min(axis=1), out=signature)
+    return signature.astype(np.uint32)
+
+
+def signature(text: str):
+    """The MinHash signature of `text`, or None if it has no words."""
+    shingles = shingle_hashes(text)
+    if not len(shingles):
+        return None
+    return minhash(shingles)
+
+
+def similarity(a: np.ndarray, b: np.ndarray) -> float:
+    """Estimated Jaccard similarity of the documents behind two signatures."""
+    return float(np.count_nonzero(a == b)) / NUM_PERM
+
+
+class NearDuplicateIndex:
+    """
+    Thread-safe in-memory LSH index from document signatures to a stored
+    result (e.g. the model's JSON for that document). Each entry carries an
+    identity key and only matches lookups with an equal key. Holds at most
+    `max_entries` documents, evicting the least recently matched.
+    """
+
+    def __init__(self, name: str, threshold: float, max_entries: int):
+        self.name = name
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # id -> (signature, key, value)
+        self._buckets = [{} for _ in range(BANDS)]  # band key -> set of ids
+        self._next_id = 0
+        self._lock = threading.Lock()
+        self._stats = {"lookups": 0, "hits": 0, "candidates": 0, "lookup_ms": 0.0}
+
+    @staticmethod
+    def _band_keys(sig: np.ndarray) -> list:
+        return [band.tobytes() for band in sig.reshape(BANDS, ROWS)]
+
+    def find(self, sig: np.ndarray, key=None):
+        """
+        (value, similarity) of the most similar stored document with the same
+        `key` at or above the threshold, else None.
+        """
+        if sig is None:
+            return None
+        start = time.perf_counter()
+        with self._lock:
+            candidates = set()
+            for buckets, band in zip(self._buckets, self._band_keys(sig)):
+                ids = buckets.get(band)
+                if ids:
+                    candidates.update(ids)
+            best = None
+            best_score = self.threshold
+            for entry_id in candidates:
+                entry_sig, entry_key, _ = self._entries[entry_id]
+                if entry_key != key:
+                    continue
+                score = similarity(sig, entry_sig)
+                if score >= best_score:
+                    best, best_score = entry_id, score
+            match = None
+            if best is not None:
+                self._entries.move_to_end(best)
+                match = (self._entries[best][2], best_score)
+            self._stats["lookups"] += 1
+            self._stats["hits"] += match is not None
+            self._stats["candidates"] += len(candidates)
+            self._stats["lookup_ms"] += (time.perf_counter() - start) * 1000
+        return match
+
+    def add(self, sig: np.ndarray, value, key=None):
+        if sig is None:
+            return
+        with self._lock:
+            entry_id = self._next_id
+            self._next_id += 1
+            self._entries[entry_id] = (sig, key, value)
+            for buckets, key in zip(self._buckets, self._band_keys(sig)):
+                buckets.setdefault(key, set()).add(entry_id)
+            while len(self._entries) > self.max_entries:
+                self._evict()
+
+    def _evict(self):
+        entry_id, (sig, _, _) = self._entries.popitem(last=False)
+        for buckets, key in zip(self._buckets, self._band_keys(sig)):
+            ids = buckets[key]
+            ids.discard(entry_id)
+            if not ids:
+                del buckets[key]
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self) -> dict:
+        lookups = self._stats["lookups"]
+        return {
+            "entries": len(self._entries),
+            "lookups": lookups,
+            "hits": self._stats["hits"],
+            "hit_rate": round(self._stats["hits"] / lookups, 4) if lookups else 0.0,
+            "avg_candidates": round(self._stats["candidates"] / lookups, 2) if lookups else 0.0,
+            "avg_lookup_ms": round(self._stats["lookup_ms"] / lookups, 4) if lookups else 0.0,
+            "threshold": self.threshold,
+        }
+
+
+# --- Shared Indexes ---
+# One per endpoint, since a FIR analysis and a judgment summary of the same text
+# are different results. None when near-duplicate reuse is disabled.
+def _make_index(name: str):
+    if not NEAR_DUPLICATE_ENABLED:
+        return None
+    return NearDuplicateIndex(name, NEAR_DUPLICATE_THRESHOLD, NEAR_DUPLICATE_MAX_ENTRIES)
+
+
+fir_analyses = _make_index("fir_analyses")
+judgment_summaries = _make_index("judgment_summaries")
+
+
+def lookup(index, text: str, key) -> tuple:
+    """
+    (signature, match) for `text` against `index`, where match is (value,
+    similarity) or None; pass the signature to `remember` once the result is
+    known. `key` identifies the document (FIR number, case number, ...): a
+    near-identical text with different identifiers is a different document,
+    and a None key (identity unknown) never matches. Blocking (the signature
+    is CPU work); call it from a worker thread.
+    """
+    if index is None or key is None:
+        return None, None
+    sig = signature(text)
+    return sig, index.find(sig, key)
+
+
+def remember(index, sig, value, key):
+    if index is not None and key is not None:
+        index.add(sig, value, key)
+
+
+def stats() -> dict:
+    if not NEAR_DUPLICATE_ENABLED:
+        return {"enabled": False}
+    return {"enabled": True, "fir_analyses": fir_analyses.stats(), "judgment_summaries": judgment_summaries.stats()}
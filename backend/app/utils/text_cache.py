@@ -0,0 +1,157 @@
+import hashlib
+import os
+import threading
+import uuid
+import zlib
+
+from app.core.config import TEXT_CACHE_ENABLED, TEXT_CACHE_DIR, TEXT_CACHE_MAX_BYTES
+
+# --- Extracted Text Cache ---
+# Text extracted from uploaded PDF/DOCX files, shared by the analyzer and the
+# summarizer. Entries are keyed by the SHA-256 of the uploaded bytes (plus the
+# file kind), stored zlib-compressed as one file each, and, like the generated
+# outputs, use the file's mtime as their "last used" time: once the directory
+# passes TEXT_CACHE_MAX_BYTES the least recently used entries are deleted.
+#
+# Each entry records the character budget it was extracted with, so text cut
+# short for the summarizer is never served to a caller that needs all of it.
+
+_FULL = b"full"
+
+
+def file_digest(stream) -> str:
+    """SHA-256 of a binary file object's contents; leaves it rewound."""
+    stream.seek(0)
+    digest = hashlib.sha256()
+    while True:
+        block = stream.read(1024 * 1024)
+        if not block:
+            break
+        digest.update(block)
+    stream.seek(0)
+    return digest.hexdigest()
+
+
+class TextCache:
+    """Size-bounded, compressed on-disk LRU of extracted document text."""
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._bytes = None  # measured lazily, then tracked on write
+        self._stats = {"hits": 0, "misses": 0, "writes": 0, "evicted_files": 0}
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, digest: str, kind: str) -> str:
+        return os.path.join(self.directory, f"{digest}.{kind}.z")
+
+    def get(self, digest: str, kind: str, max_chars: int = None):
+        """Cached text, or None if absent or extracted with a smaller budget than `max_chars`."""
+        path = self._path(digest, kind)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            os.utime(path)
+            header, _, body = zlib.decompress(data).partition(b"\n")
+        except (OSError, zlib.error):
+            self._stats["misses"] += 1
+            return None
+        if header != _FULL and (max_chars is None or max_chars > int(header)):
+            self._stats["misses"] += 1
+            return None
+        self._stats["hits"] += 1
+        return body.decode("utf-8")
+
+    def set(self, digest: str, kind: str, text: str, max_chars: int = None):
+        header = _FULL if max_chars is None else str(max_chars).encode()
+        data = zlib.compress(header + b"\n" + text.encode("utf-8"), 6)
+        path = self._path(digest, kind)
+        tmp_path = os.path.join(self.directory, f".{uuid.uuid4().hex}.tmp")
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Could not cache extracted text: {e}")
+            return
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        self._stats["writes"] += 1
+        with self._lock:
+            if self._bytes is None:
+                self._bytes = self.disk_usage()["bytes"]
+            else:
+                self._bytes += len(data)
+            if self._bytes > self.max_bytes:
+                self._trim()
+
+    def _trim(self):
+        # Other workers write here too, so re-measure instead of trusting the counter
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".z"):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in entries)
+        # Trim to 90% so a full cache doesn't rescan on every write
+        target = self.max_bytes * 0.9
+        for _, size, path in sorted(entries):
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            self._stats["evicted_files"] += 1
+        self._bytes = total
+
+    def disk_usage(self) -> dict:
+        files = 0
+        total = 0
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".z"):
+                try:
+                    total += entry.stat().st_size
+                except FileNotFoundError:
+                    continue
+                files += 1
+        return {"files": files, "bytes": total}
+
+    def stats(self) -> dict:
+        lookups = self._stats["hits"] + self._stats["misses"]
+        return {
+            **self._stats,
+            "hit_rate": round(self._stats["hits"] / lookups, 4) if lookups else 0.0,
+            "max_bytes": self.max_bytes,
+        }
+
+
+text_cache = TextCache(TEXT_CACHE_DIR, TEXT_CACHE_MAX_BYTES) if TEXT_CACHE_ENABLED else None
+
+
+def cached_extract(stream, kind: str, extract, max_chars: int = None) -> str:
+    """
+    Returns `extract(stream)`, reusing the text from an earlier upload of the
+    same bytes when there is one. `max_chars` is the budget `extract` stops at
+    (None for the whole document). Blocking; call it from a worker thread.
+    """
+    if text_cache is None:
+        return extract(stream)
+    digest = file_digest(stream)
+    text = text_cache.get(digest, kind, max_chars)
+    if text is None:
+        text = extract(stream)
+        text_cache.set(digest, kind, text, max_chars)
+    return text
+
+
+def stats() -> dict:
+    if text_cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **text_cache.stats(), **text_cache.disk_usage()}
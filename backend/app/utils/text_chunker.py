@@ -0,0 +1,28 @@
+# --- Boundary-Aware Text Chunking ---
+# Splits long documents into chunks of at most `max_chars`, cutting at the
+# strongest boundary available in the second half of each window: a page break
+# (pdf_parser separates pages with a form feed), then a blank line, a line
+# break, and finally a space. Only text with none of these is cut mid-word.
+
+PAGE_BREAK = "\f"
+SEPARATORS = (PAGE_BREAK, "\n\n", "\n", " ")
+
+
+def split_text(text: str, max_chars: int) -> list:
+    """Splits `text` into consecutive chunks of at most `max_chars` characters; "".join(chunks) == text."""
+    chunks = []
+    start = 0
+    while len(text) - start > max_chars:
+        end = start + max_chars
+        cut = end
+        for separator in SEPARATORS:
+            # Only accept a boundary that keeps the chunk at least half full
+            index = text.rfind(separator, start + max_chars // 2, end)
+            if index != -1:
+                cut = index + len(separator)
+                break
+        chunks.append(text[start:cut])
+        start = cut
+    if start < len(text):
+        chunks.append(text[start:])
+    return chunks
@@ -0,0 +1,195 @@
+import re
+import threading
+import time
+from collections import Counter
+
+from app.core.config import TEXT_CLEANING_ENABLED
+from app.utils.text_chunker import PAGE_BREAK
+
+# --- Extracted Text Cleaning ---
+# PDF text arrives with the page furniture of the printed judgment: running
+# headers and footers on every page, page numbers, words hyphenated across
+# line ends, and ragged whitespace. None of it helps the model, and on a long
+# judgment it is a sizeable share of the prompt. clean_text() removes it:
+#
+#   * one translate() pass drops NULs and soft hyphens and expands ligatures
+#   * words split as "judg-\nment" are rejoined, but real compounds broken at
+#     the hyphen ("cross-\nexamination", "sub-\nsection") keep it; runs of
+#     spaces collapse
+#   * the first/last EDGE_LINES lines of each page are the header/footer zone.
+#     In multi-page text, "Page N" / "Page N of M" lines there are dropped, and
+#     so is a bare number at the same zone position on most pages when the
+#     values rise page by page; an FIR number or section that happens to sit
+#     on an edge line is left alone. A line found in the zone on enough pages
+#     (digits ignored, so "Page 3 of 200" matches "Page 4 of 200") is kept
+#     only where it first appears
+#
+# Page breaks (PAGE_BREAK) are preserved for text_chunker.
+
+EDGE_LINES = 3
+REPEAT_MIN_PAGES = 3  # and at least REPEAT_MIN_SHARE of all pages
+REPEAT_MIN_SHARE = 0.3
+
+_TRANSLATE = str.maketrans({
+    "\x00": None,
+    "\u00ad": None,  # soft hyphen
+    "\r": "\n",
+    "\u00a0": " ",  # no-break space
+    "\ufb00": "ff", "\ufb01": "fi", "\ufb02": "fl", "\ufb03": "ffi", "\ufb04": "ffl",
+})
+# Anchored on the "-" (the lookbehind follows it), so the scan skips ahead by literal search
+_HYPHEN_BREAK_RE = re.compile(r"-(?<=[a-z]-)[ \t]*\n[ \t]*(?=[a-z])")
+_WORD_BEFORE_RE = re.compile(r"[A-Za-z]+$")
+_WORD_AFTER_RE = re.compile(r"[a-z]+")
+
+# A line-end hyphen after these words is part of the word, whatever follows
+HYPHEN_PREFIXES = {
+    "cross", "self", "well", "non", "quasi",
+    "twenty", "thirty", "forty", "fifty", "sixty", "seventy", "eighty", "ninety",
+}
+# Words that are also common syllable breaks ("sub-\nmitted", "ex-\nplained"):
+# the hyphen is kept only before these continuations
+HYPHEN_COMPOUNDS = {
+    "anti": ("corruption",),
+    "co": ("accused", "convict", "defendant", "operat", "ordinat", "owner", "parcener", "sharer"),
+    "counter": ("affidavit", "claim", "part", "sign"),
+    "ex": ("gratia", "husband", "officio", "parte", "servicem", "wife"),
+    "ill": ("gotten", "health", "treat", "will"),
+    "in": ("law",),
+    "inter": ("se",),
+    "post": ("mortem",),
+    "pre": ("arrest", "trial"),
+    "re": ("examin", "hear", "investigat", "trial"),
+    "so": ("called",),
+    "sub": ("clause", "divisional", "inspector", "para", "registrar", "rule", "section"),
+    "under": ("trial",),
+    "vice": ("chancellor", "president", "versa"),
+    "would": ("be",),
+    **{relation: ("in",) for relation in ("father", "mother", "son", "daughter", "brother", "sister")},
+}
+
+
+def _join_hyphen_break(match) -> str:
+    text = match.string
+    before = _WORD_BEFORE_RE.search(text, max(0, match.start() - 24), match.start())
+    before = before.group(0).lower() if before else ""
+    after = _WORD_AFTER_RE.match(text, match.end()).group(0)
+    if before in HYPHEN_PREFIXES or after.startswith(HYPHEN_COMPOUNDS.get(before, ())):
+        return "-"
+    return ""
+
+_BLANK_LINES_RE = re.compile(r"\n{3,}")
+_PAGE_LABEL_RE = re.compile(r"(?i)^page\s*\d{1,4}(?:\s*(?:of|/)\s*\d{1,4})?$")
+_BARE_NUMBER_RE = re.compile(r"^[-\u2013(\[]?\s*(\d{1,4})\s*[-\u2013)\]]?$")
+_DIGITS_RE = re.compile(r"\d+")
+
+
+def _edges(lines: list) -> list:
+    """Indexes of the non-blank lines in a page's header/footer zone."""
+    content = [i for i, line in enumerate(lines) if line]
+    if len(content) <= 2 * EDGE_LINES:
+        return content
+    return content[:EDGE_LINES] + content[-EDGE_LINES:]
+
+
+def _line_key(line: str) -> str:
+    return _DIGITS_RE.sub("#", line.lower())
+
+
+def _page_numbers(pages: list) -> set:
+    """(page, line) indexes of page-number lines in multi-page text.
+
+    A bare number counts only if the same edge position (n-th line from the
+    top or bottom) holds a number on most pages and the values rise page by
+    page, so a lone "379" or "123/2023" near an edge is never taken for one.
+    """
+    if len(pages) < 2:
+        return set()
+    found = set()
+    runs = {}
+    for p, lines in enumerate(pages):
+        content = [i for i, line in enumerate(lines) if line]
+        found.update((p, i) for i in _edges(lines) if _PAGE_LABEL_RE.match(lines[i]))
+        for j in range(min(EDGE_LINES, len(content))):
+            for position, i in (("top", j), ("bottom", -1 - j)):
+                match = _BARE_NUMBER_RE.match(lines[content[i]])
+                if match:
+                    runs.setdefault((position, j), []).append((p, content[i], int(match.group(1))))
+    for run in runs.values():
+        values = [value for _, _, value in run]
+        if len(run) * 2 > len(pages) and all(a < b for a, b in zip(values, values[1:])):
+            found.update((p, i) for p, i, _ in run)
+    return found
+
+
+def clean_text(text: str) -> str:
+    """`text` without page furniture, hyphenation breaks and redundant whitespace."""
+    if not text:
+        return ""
+    text = text.replace("\r\n", "\n").translate(_TRANSLATE)
+    text = _HYPHEN_BREAK_RE.sub(_join_hyphen_break, text)
+    # str.split() collapses and trims each line's whitespace far faster than a regex
+    pages = [[" ".join(line.split()) for line in page.split("\n")] for page in text.split(PAGE_BREAK)]
+
+    # Pass 1: header/footer candidates, counted once per page
+    edge_keys = []
+    counts = Counter()
+    for lines in pages:
+        # bare numbers are left to _page_numbers(); digits-blind keys would merge them all
+        keys = {i: _line_key(lines[i]) for i in _edges(lines) if not _BARE_NUMBER_RE.match(lines[i])}
+        edge_keys.append(keys)
+        counts.update(set(keys.values()))
+    repeated = set()
+    if len(pages) >= REPEAT_MIN_PAGES:
+        min_pages = max(REPEAT_MIN_PAGES, int(len(pages) * REPEAT_MIN_SHARE))
+        repeated = {key for key, count in counts.items() if count >= min_pages}
+
+    page_numbers = _page_numbers(pages)
+
+    # Pass 2: emit
+    seen = set()
+    cleaned = []
+    for p, (lines, keys) in enumerate(zip(pages, edge_keys)):
+        kept = []
+        for i, line in enumerate(lines):
+            if (p, i) in page_numbers:
+                continue
+            key = keys.get(i)
+            if key in repeated:
+                if key in seen:
+                    continue
+                seen.add(key)
+            kept.append(line)
+        cleaned.append("\n".join(kept).strip("\n"))
+    return _BLANK_LINES_RE.sub("\n\n", PAGE_BREAK.join(cleaned)).strip()
+
+
+_stats = {"documents": 0, "chars_in": 0, "chars_out": 0, "seconds": 0.0}
+_stats_lock = threading.Lock()
+
+
+def clean(text: str) -> str:
+    """clean_text() for uploaded documents, unless TEXT_CLEANING_ENABLED is off. Blocking."""
+    if not TEXT_CLEANING_ENABLED:
+        return text
+    start = time.perf_counter()
+    cleaned = clean_text(text)
+    with _stats_lock:
+        _stats["documents"] += 1
+        _stats["chars_in"] += len(text)
+        _stats["chars_out"] += len(cleaned)
+        _stats["seconds"] += time.perf_counter() - start
+    return cleaned
+
+
+def stats() -> dict:
+    if not TEXT_CLEANING_ENABLED:
+        return {"enabled": False}
+    return {
+        "enabled": True,
+        "documents": _stats["documents"],
+        "chars_in": _stats["chars_in"],
+        "chars_out": _stats["chars_out"],
+        "reduction": round(1 - _stats["chars_out"] / _stats["chars_in"], 4) if _stats["chars_in"] else 0.0,
+        "mb_per_s": round(_stats["chars_in"] / 1e6 / _stats["seconds"], 1) if _stats["seconds"] else 0.0,
+    }
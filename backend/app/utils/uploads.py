@@ -0,0 +1,61 @@
+from fastapi import HTTPException, UploadFile
+from starlette.responses import JSONResponse
+
+# --- Upload Size Limits ---
+# Starlette's multipart parser already streams each uploaded file into a
+# SpooledTemporaryFile (in memory up to 1 MB, then on disk), so handlers work on
+# that handle directly instead of reading the whole upload into bytes. The
+# middleware below caps the request body per route while it is still arriving:
+# an oversized Content-Length is refused before any of the body is read, and a
+# body without one is cut off as soon as it passes the limit.
+
+
+def too_large_message(max_bytes: int) -> str:
+    limit = f"{max_bytes // 1024 ** 2} MB" if max_bytes >= 1024 ** 2 else f"{max_bytes // 1024} KB"
+    return f"File too large. The maximum upload size is {limit}."
+
+
+class UploadLimitMiddleware:
+    """ASGI middleware capping request bodies for the given paths ({path: max_bytes})."""
+
+    def __init__(self, app, limits: dict):
+        self.app = app
+        self.limits = limits
+
+    async def __call__(self, scope, receive, send):
+        max_bytes = self.limits.get(scope["path"]) if scope["type"] == "http" else None
+        if max_bytes is None:
+            await self.app(scope, receive, send)
+            return
+
+        content_length = dict(scope["headers"]).get(b"content-length")
+        if content_length is not None and content_length.isdigit() and int(content_length) > max_bytes:
+            response = JSONResponse({"detail": too_large_message(max_bytes)}, status_code=413)
+            await response(scope, receive, send)
+            return
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > max_bytes:
+                    # Raised inside form parsing, so it surfaces as the route's 413
+                    raise HTTPException(status_code=413, detail=too_large_message(max_bytes))
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+
+def spooled_file(file: UploadFile, max_bytes: int):
+    """
+    The upload's spooled file handle, rewound, for extractors that take a
+    binary file object. Raises 413 if the file is over `max_bytes`; behind
+    UploadLimitMiddleware such a request is normally refused before this.
+    """
+    if file.size is not None and file.size > max_bytes:
+        raise HTTPException(status_code=413, detail=too_large_message(max_bytes))
+    file.file.seek(0)
+    return file.file
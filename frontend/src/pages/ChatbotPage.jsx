@@ -1,6 +1,12 @@
 import React, { useState, useRef, useEffect } from 'react';
 import { Send, User, Bot, Loader2, Sparkles, AlertCircle } from 'lucide-react';
-import { postQuery } from '../services/chatbotService.js';
+import { streamQuery, getHistory } from '../services/chatbotService.js';
+
+// History turns arrive newest first; the chat shows them oldest first
+const turnsToMessages = (turns) => turns.slice().reverse().flatMap(turn => [
+  { sender: 'user', text: turn.message_text },
+  { sender: 'ai', text: turn.response_text, law: turn.relevant_law },
+]);
 
 function ChatbotPage() {
   const [messages, setMessages] = useState([
@@ -12,6 +18,7 @@ function ChatbotPage() {
   ]);
   const [input, setInput] = useState('');
   const [isLoading, setIsLoading] = useState(false);
+  const [historyCursor, setHistoryCursor] = useState(null); // next_cursor of the oldest loaded page
   
   // This ref is for automatically scrolling down to the latest message
   const messagesEndRef = useRef(null);
@@ -20,7 +27,31 @@ function ChatbotPage() {
     messagesEndRef.current?.scrollIntoView({ behavior: "smooth" });
   };
 
-  useEffect(scrollToBottom, [messages]); // Scroll every time messages update
+  // Scroll when the newest message changes (including each streamed token), not when older ones are loaded
+  useEffect(scrollToBottom, [messages[messages.length - 1]]);
+
+  // Restore this session's earlier turns after a reload (logged-in users only)
+  useEffect(() => {
+    let ignore = false;
+    getHistory()
+      .then(page => {
+        if (ignore) return;
+        setMessages(prev => [prev[0], ...turnsToMessages(page.items), ...prev.slice(1)]);
+        setHistoryCursor(page.next_cursor);
+      })
+      .catch(error => console.error("Failed to load chat history:", error));
+    return () => { ignore = true; };
+  }, []);
+
+  const loadOlder = async () => {
+    try {
+      const page = await getHistory(historyCursor);
+      setMessages(prev => [prev[0], ...turnsToMessages(page.items), ...prev.slice(1)]);
+      setHistoryCursor(page.next_cursor);
+    } catch (error) {
+      console.error("Failed to load chat history:", error);
+    }
+  };
 
   const handleSend = async () => {
     if (input.trim() === '' || isLoading) return;
@@ -30,10 +61,21 @@ function ChatbotPage() {
     setInput('');
     setIsLoading(true);
 
-    // Call the API service
-    const response = await postQuery(userMessage.text);
+    // Stream the answer into a new AI message as tokens arrive
+    let streaming = false;
+    const response = await streamQuery(userMessage.text, (chunk) => {
+      if (!streaming) {
+        streaming = true;
+        setMessages(prev => [...prev, { sender: 'ai', text: chunk, law: null }]);
+      } else {
+        setMessages(prev => {
+          const last = prev[prev.length - 1];
+          return [...prev.slice(0, -1), { ...last, text: last.text + chunk }];
+        });
+      }
+    });
 
-    // Create the AI's response message object
+    // Create the AI's final response message object
     const aiMessage = {
       sender: 'ai',
       text: response.ai_response,
@@ -42,7 +84,7 @@ function ChatbotPage() {
     };
 
     setIsLoading(false);
-    setMessages(prev => [...prev, aiMessage]);
+    setMessages(prev => streaming ? [...prev.slice(0, -1), aiMessage] : [...prev, aiMessage]);
   };
 
   // Allow sending with "Enter" key
@@ -57,6 +99,17 @@ function ChatbotPage() {
     <div className="flex flex-col h-[calc(100vh-10rem)] max-w-4xl mx-auto">
       {/* Message History */}
       <div className="flex-1 overflow-y-auto p-6 space-y-6 bg-white rounded-t-lg shadow-md">
+        {historyCursor && (
+          <div className="flex justify-center">
+            <button
+              onClick={loadOlder}
+              className="text-sm font-semibold text-legal-blue-primary hover:text-legal-blue-highlight"
+            >
+              Load earlier messages
+            </button>
+          </div>
+        )}
+
         {messages.map((msg, index) => (
           <div key={index} className={`flex ${msg.sender === 'user' ? 'justify-end' : 'justify-start'}`}>
             <div className={`flex items-start max-w-lg ${msg.sender === 'user' ? 'flex-row-reverse' : 'flex-row'}`}>
@@ -93,8 +146,8 @@ function ChatbotPage() {
           </div>
         ))}
         
-        {/* Loading Indicator */}
-        {isLoading && (
+        {/* Loading Indicator (until the first token arrives) */}
+        {isLoading && messages[messages.length - 1].sender === 'user' && (
           <div className="flex justify-start">
             <div className="flex items-start max-w-lg">
               <div className="flex-shrink-0 w-10 h-10 rounded-full flex items-center justify-center bg-legal-gold-primary text-white mr-3">
@@ -1,6 +1,23 @@
 // This is the URL of our running backend.
 const API_BASE_URL = "http://localhost:8000";
 
+/**
+ * Identifies the conversation for server-side history. Logged-in users get one
+ * session id per browser tab, so the backend loads earlier turns itself and
+ * each request only carries the new question. Anonymous chats stay stateless.
+ * @returns {object} - { user_id, session_id }, or {} when nobody is logged in.
+ */
+function sessionFields() {
+  const storedUser = localStorage.getItem('user');
+  if (!storedUser) return {};
+  let sessionId = sessionStorage.getItem('chatSessionId');
+  if (!sessionId) {
+    sessionId = crypto.randomUUID();
+    sessionStorage.setItem('chatSessionId', sessionId);
+  }
+  return { user_id: JSON.parse(storedUser).id, session_id: sessionId };
+}
+
 /**
  * Sends a query to the backend chatbot API.
  * @param {string} query - The user's question.
@@ -14,7 +31,7 @@ export async function postQuery(query) {
         'Content-Type': 'application/json',
       },
       // The body must match the 'ChatQuery' pydantic model in FastAPI
-      body: JSON.stringify({ query: query }),
+      body: JSON.stringify({ query: query, ...sessionFields() }),
     });
 
     if (!response.ok) {
@@ -34,4 +51,79 @@ export async function postQuery(query) {
       error: true,
     };
   }
-}
\ No newline at end of file
+}
+
+/**
+ * Streams a query to the backend chatbot API and reports tokens as they arrive.
+ * The server sends newline-delimited JSON events: { type: "token", text } and a
+ * final { type: "done", relevant_law }.
+ * @param {string} query - The user's question.
+ * @param {(text: string) => void} onToken - Called with each chunk of answer text.
+ * @returns {Promise<object>} - Resolves to { ai_response, relevant_law } once the stream ends.
+ */
+export async function streamQuery(query, onToken) {
+  let aiResponse = "";
+  let relevantLaw = "See response";
+  try {
+    const response = await fetch(`${API_BASE_URL}/api/v1/chatbot/query-stream`, {
+      method: 'POST',
+      headers: {
+        'Content-Type': 'application/json',
+      },
+      body: JSON.stringify({ query: query, ...sessionFields() }),
+    });
+
+    if (!response.ok || !response.body) {
+      throw new Error(`API error: ${response.status} ${response.statusText}`);
+    }
+
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = "";
+    while (true) {
+      const { value, done } = await reader.read();
+      if (done) break;
+      buffer += decoder.decode(value, { stream: true });
+      const lines = buffer.split("\n");
+      buffer = lines.pop();
+      for (const line of lines) {
+        if (!line.trim()) continue;
+        const event = JSON.parse(line);
+        if (event.type === "token") {
+          aiResponse += event.text;
+          onToken(event.text);
+        } else if (event.type === "done") {
+          relevantLaw = event.relevant_law;
+        } else if (event.type === "error") {
+          throw new Error(event.detail);
+        }
+      }
+    }
+    return { ai_response: aiResponse, relevant_law: relevantLaw };
+
+  } catch (error) {
+    console.error("Failed to stream query:", error);
+    return {
+      ai_response: aiResponse || "Sorry, I couldn't connect to the AI. Please check the backend server and try again.",
+      relevant_law: "Connection Error",
+      error: true,
+    };
+  }
+}
+
+/**
+ * Fetches one page of the current session's history, newest first.
+ * @param {string|null} before - The `next_cursor` from the previous page, or null for the latest page.
+ * @returns {Promise<object>} - { items: [...], next_cursor } (empty when nobody is logged in).
+ */
+export async function getHistory(before = null) {
+  const { user_id, session_id } = sessionFields();
+  if (!user_id) return { items: [], next_cursor: null };
+  const params = new URLSearchParams({ user_id, session_id });
+  if (before) params.set('before', before);
+  const response = await fetch(`${API_BASE_URL}/api/v1/chatbot/history?${params}`);
+  if (!response.ok) {
+    throw new Error(`API error: ${response.status} ${response.statusText}`);
+  }
+  return response.json();
+}
@@ -0,0 +1,221 @@
+"""
+Login-throughput benchmark for the pooled MySQL layer (app/core/database.py).
+
+Runs the login lookup (`SELECT * FROM users WHERE email = %s`) from a thread
+pool against the blocking pool (get_db_connection), two ways:
+
+  * before - a new connection per login, closed afterwards (the old pattern)
+  * after  - connections borrowed from the shared pool
+
+Password verification is left out so the numbers isolate the database layer.
+
+With --backend mysql (default) it uses DB_USER/DB_PASSWORD/DB_HOST/DB_NAME, so
+point it at a throwaway local container, e.g.
+    docker run -d -p 3306:3306 -e MARIADB_ROOT_PASSWORD=pw -e MARIADB_DATABASE=kanoon mariadb
+It creates and fills a `bench_users` table and drops it at the end.
+
+--mixed (MySQL only) instead drives the async repository used by the auth
+router and reports login p50/p99 alone and while --concurrency signups run
+at the same time; with the async pool the two should stay close.
+
+--backend sqlite is a stand-in for machines without MySQL: it compares
+sqlite3.connect per login against a queue of reused connections. SQLite has no
+network handshake, so its gap understates the MySQL one.
+
+Usage:
+    python scripts/benchmark_db_pool.py --logins 5000 --concurrency 16
+    python scripts/benchmark_db_pool.py --mixed
+    python scripts/benchmark_db_pool.py --backend sqlite
+"""
+import argparse
+import asyncio
+import os
+import queue
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend"))
+
+TABLE = "bench_users"
+SEED_USERS = 1000
+
+
+def measure(login, n, concurrency):
+    emails = [f"user{i % SEED_USERS}@example.com" for i in range(n)]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        found = sum(1 for row in executor.map(login, emails) if row)
+    elapsed = time.perf_counter() - start
+    assert found == n, f"only {found}/{n} logins found their user"
+    return n / elapsed
+
+
+# --- MySQL ---
+def run_mysql(args):
+    import mysql.connector
+    from app.core import database
+
+    config = database._db_config()
+    if not all(config.values()):
+        sys.exit("Set DB_USER, DB_PASSWORD, DB_HOST and DB_NAME (or use --backend sqlite).")
+    query = f"SELECT * FROM {TABLE} WHERE email = %s"
+
+    setup = mysql.connector.connect(**config)
+    cursor = setup.cursor()
+    cursor.execute(f"DROP TABLE IF EXISTS {TABLE}")
+    cursor.execute(
+        f"CREATE TABLE {TABLE} (id INT AUTO_INCREMENT PRIMARY KEY, "
+        "email VARCHAR(255) NOT NULL UNIQUE, hashed_password VARCHAR(255) NOT NULL)"
+    )
+    cursor.executemany(
+        f"INSERT INTO {TABLE} (email, hashed_password) VALUES (%s, %s)",
+        [(f"user{i}@example.com", "x" * 60) for i in range(SEED_USERS)],
+    )
+    setup.commit()
+
+    def login_per_connection(email):
+        conn = mysql.connector.connect(**config)
+        try:
+            cur = conn.cursor(dictionary=True)
+            cur.execute(query, (email,))
+            return cur.fetchone()
+        finally:
+            conn.close()
+
+    def login_pooled(email):
+        conn = database.get_db_connection()
+        try:
+            cur = conn.cursor(dictionary=True)
+            cur.execute(query, (email,))
+            return cur.fetchone()
+        finally:
+            conn.close()
+
+    try:
+        before = measure(login_per_connection, args.logins, args.concurrency)
+        after = measure(login_pooled, args.logins, args.concurrency)
+    finally:
+        database.close_pool()
+        cursor.execute(f"DROP TABLE IF EXISTS {TABLE}")
+        setup.close()
+    print(f"pool stats: {database.pool_stats()}")
+    return before, after
+
+
+# --- Async Repository: Logins Under Concurrent Signups ---
+async def login_latencies(repo, n, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one(i):
+        async with semaphore:
+            start = time.perf_counter()
+            assert await repo.get_by_email(f"user{i % SEED_USERS}@example.com")
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    await asyncio.gather(*(one(i) for i in range(n)))
+    latencies.sort()
+    return statistics.median(latencies), latencies[int(len(latencies) * 0.99) - 1]
+
+
+async def run_mixed(args):
+    from app.core import database
+    from app.services import user_repository
+
+    # Point the repository at the benchmark table
+    for name in ("GET_BY_EMAIL", "INSERT_USER"):
+        setattr(user_repository, name, getattr(user_repository, name).replace("users", TABLE, 1))
+
+    async with database.get_async_pool().connection() as conn:
+        await conn.execute(f"DROP TABLE IF EXISTS {TABLE}")
+        await conn.execute(
+            f"CREATE TABLE {TABLE} (id INT AUTO_INCREMENT PRIMARY KEY, name VARCHAR(255), "
+            "email VARCHAR(255) NOT NULL UNIQUE, hashed_password VARCHAR(255) NOT NULL, "
+            "gender VARCHAR(32), phone_number VARCHAR(20), profile_pic TEXT)"
+        )
+        for i in range(SEED_USERS):
+            await conn.execute(user_repository.INSERT_USER, ("n", f"user{i}@example.com", "x" * 60, None, None, None))
+
+    stop = asyncio.Event()
+    signups = 0
+
+    async def signup_writer(worker):
+        nonlocal signups
+        while not stop.is_set():
+            await user_repository.create_user("n", f"new{worker}_{signups}@example.com", "x" * 60, None, None)
+            signups += 1
+
+    try:
+        alone = await login_latencies(user_repository, args.logins, args.concurrency)
+        writers = [asyncio.create_task(signup_writer(w)) for w in range(args.concurrency)]
+        mixed = await login_latencies(user_repository, args.logins, args.concurrency)
+        stop.set()
+        await asyncio.gather(*writers)
+    finally:
+        async with database.get_async_pool().connection() as conn:
+            await conn.execute(f"DROP TABLE IF EXISTS {TABLE}")
+        await database.close_async_pool()
+
+    print(f"login alone:                 p50={alone[0]:7.2f}ms  p99={alone[1]:7.2f}ms")
+    print(f"login with concurrent signups: p50={mixed[0]:7.2f}ms  p99={mixed[1]:7.2f}ms  ({signups} signups)")
+
+
+# --- SQLite Stand-in ---
+def run_sqlite(args):
+    path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    setup = sqlite3.connect(path)
+    setup.execute(f"CREATE TABLE {TABLE} (id INTEGER PRIMARY KEY, email TEXT NOT NULL UNIQUE, hashed_password TEXT NOT NULL)")
+    setup.executemany(
+        f"INSERT INTO {TABLE} (email, hashed_password) VALUES (?, ?)",
+        [(f"user{i}@example.com", "x" * 60) for i in range(SEED_USERS)],
+    )
+    setup.commit()
+    setup.close()
+    query = f"SELECT * FROM {TABLE} WHERE email = ?"
+
+    def login_per_connection(email):
+        conn = sqlite3.connect(path)
+        try:
+            return conn.execute(query, (email,)).fetchone()
+        finally:
+            conn.close()
+
+    idle = queue.Queue()
+    for _ in range(args.concurrency):
+        idle.put(sqlite3.connect(path, check_same_thread=False))
+
+    def login_pooled(email):
+        conn = idle.get()
+        try:
+            return conn.execute(query, (email,)).fetchone()
+        finally:
+            idle.put(conn)
+
+    before = measure(login_per_connection, args.logins, args.concurrency)
+    after = measure(login_pooled, args.logins, args.concurrency)
+    while not idle.empty():
+        idle.get().close()
+    os.remove(path)
+    return before, after
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backend", choices=["mysql", "sqlite"], default="mysql")
+    parser.add_argument("--logins", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--mixed", action="store_true", help="Async repository: login latency under concurrent signups")
+    args = parser.parse_args()
+
+    if args.mixed:
+        asyncio.run(run_mixed(args))
+        sys.exit()
+
+    print(f"backend={args.backend} logins={args.logins} concurrency={args.concurrency}")
+    before, after = run_mysql(args) if args.backend == "mysql" else run_sqlite(args)
+    print(f"before (connection per login): {before:8.0f} logins/s")
+    print(f"after  (pooled connections):   {after:8.0f} logins/s")
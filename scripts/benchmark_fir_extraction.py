@@ -0,0 +1,141 @@
+"""
+Benchmark for the local FIR field extractor (app/utils/ner_extractor.py).
+
+Runs the extractor over a directory of FIR texts (.txt, .pdf, .docx) or, by
+default, a synthetic set of NCRB-form and narrative FIRs, and reports how many
+of the analyzer's 11 fields resolve locally, how much of the text would still
+be sent to the model, how often the model call is skipped entirely, and the
+extraction time per document.
+
+Usage:
+    python scripts/benchmark_fir_extraction.py
+    python scripts/benchmark_fir_extraction.py --corpus data/firs --verbose
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend"))
+
+from app.utils import docx_parser, ner_extractor, pdf_parser  # noqa: E402
+
+FORM = """FIRST INFORMATION REPORT
+(Under Section 154 Cr.P.C.)
+1. District: {district}    P.S.: {station}    Year: 2024    FIR No.: {number}/2024    Date: {filed}
+2. Acts & Sections: IPC 1860 Sections {sections}
+3. (a) Occurrence of offence: Date of occurrence: {occurred} at {time} hrs
+   (b) Information received at P.S.: Date: {filed} Time: 10:15 hrs
+5. Place of occurrence: {place}
+6. Complainant/Informant:
+   (a) Name: {complainant}
+   (b) Father's Name: {father}
+7. Details of known/suspected/unknown accused with full particulars: Accused: {accused}
+12. First Information contents:
+{narrative}
+13. Action taken: Case registered u/s {sections} IPC and investigation entrusted to SI {officer}.
+Name of I.O.: SI {officer}   Rank: Sub-Inspector
+"""
+
+LETTER = """To,
+The Station House Officer,
+Police Station {station}, {district}
+
+Sir,
+I, {complainant}, resident of {place}, submit that {narrative} Kindly register an FIR and take action.
+
+{complainant}
+Date: {filed}
+
+FIR No. {number}/2024 dated {filed} registered under Sections {bns} BNS.
+"""
+
+NAMES = ["Ramesh Kumar", "Sunita Devi", "Amit Sharma", "Vikas Yadav", "Pooja Singh", "Mohan Lal", "Rakesh Singh", "Anil Gupta"]
+PLACES = ["Near Sahu Cinema, Hazratganj", "Civil Lines, near the water tank", "Gandhi Market, shop no. 14", "Village Rampur, near the temple"]
+STATIONS = ["Hazratganj", "Kotwali", "Civil Lines", "Aminabad", "Gomti Nagar"]
+NARRATIVES = [
+    "on the night of the incident my motorcycle parked outside my house was stolen by unknown persons.",
+    "the accused entered my house, beat me with sticks and threatened to kill me. My son saw the incident.",
+    "the accused took Rs. 50,000 from me promising a government job and has not returned the money.",
+    "while I was returning from the market two men on a motorcycle snatched my chain.",
+]
+
+
+def synthetic_firs(count: int, seed: int = 0) -> list:
+    rng = random.Random(seed)
+    documents = []
+    for i in range(count):
+        values = {
+            "district": rng.choice(["Lucknow", "Kanpur", "Agra"]),
+            "station": rng.choice(STATIONS),
+            "number": f"{rng.randrange(1, 999):04d}",
+            "filed": f"{rng.randrange(1, 28):02d}/0{rng.randrange(1, 9)}/2024",
+            "occurred": f"{rng.randrange(1, 28):02d}/0{rng.randrange(1, 9)}/2024",
+            "time": f"{rng.randrange(0, 24):02d}:{rng.randrange(0, 60):02d}",
+            "sections": rng.choice(["379, 411", "323, 504, 506", "420, 406", "392"]),
+            "bns": rng.choice(["303(2), 317(2)", "115(2), 351(2), 3(5)", "318(4), 316(2)", "304"]),
+            "place": rng.choice(PLACES),
+            "complainant": rng.choice(NAMES),
+            "father": rng.choice(NAMES),
+            "accused": rng.choice(NAMES + ["Unknown persons"]),
+            "officer": rng.choice(NAMES),
+            "narrative": " ".join(rng.choice(NARRATIVES) for _ in range(rng.randrange(2, 12))),
+        }
+        documents.append((f"synthetic-{i}", (FORM if i % 2 == 0 else LETTER).format(**values)))
+    return documents
+
+
+def read_corpus(corpus: str) -> list:
+    documents = []
+    for root, _, files in os.walk(corpus):
+        for name in sorted(files):
+            path = os.path.join(root, name)
+            extension = os.path.splitext(name)[1].lower()
+            if extension == ".pdf":
+                text = pdf_parser.extract_text(path, parallel=False)
+            elif extension == ".docx":
+                text = docx_parser.extract_text(path)
+            elif extension == ".txt":
+                with open(path, encoding="utf-8", errors="replace") as f:
+                    text = f.read()
+            else:
+                continue
+            documents.append((os.path.relpath(path, corpus), text))
+    return documents
+
+
+def main(args):
+    documents = read_corpus(args.corpus) if args.corpus else synthetic_firs(args.documents)
+    resolved_counts = []
+    latencies = []
+    chars_in = chars_sent = skipped = 0
+    per_field = {field: 0 for field in ner_extractor.FIELDS}
+    for name, text in documents:
+        start = time.perf_counter()
+        resolved, missing, prompt_text = ner_extractor.prepare(text)
+        latencies.append((time.perf_counter() - start) * 1000)
+        resolved_counts.append(len(resolved))
+        chars_in += len(text)
+        chars_sent += len(prompt_text)
+        skipped += not missing
+        for field in resolved:
+            per_field[field] += 1
+        if args.verbose:
+            print(f"{name}: {len(resolved)}/11 local, {len(prompt_text)}/{len(text)} chars sent, missing {missing}")
+
+    print(f"documents={len(documents)}  fields resolved locally: mean {statistics.mean(resolved_counts):.1f}/11")
+    print(f"model calls skipped: {skipped}/{len(documents)}  prompt chars sent: {chars_sent}/{chars_in} "
+          f"({1 - chars_sent / max(1, chars_in):.1%} fewer)")
+    print(f"extraction p50={statistics.median(latencies):.3f}ms max={max(latencies):.3f}ms")
+    for field, count in per_field.items():
+        print(f"  {field:<26} {count / len(documents):6.1%}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", help="Directory of FIR documents (default: synthetic FIRs)")
+    parser.add_argument("--documents", type=int, default=200, help="Synthetic FIRs to generate")
+    parser.add_argument("--verbose", action="store_true", help="Print a line per document")
+    main(parser.parse_args())
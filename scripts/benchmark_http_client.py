@@ -0,0 +1,140 @@
+"""
+Latency benchmark for the shared Gemini HTTP client (app/core/http_client.py).
+
+Runs a local fake Gemini `generateContent` endpoint (keep-alive HTTP/1.1, or
+HTTPS when --certfile/--keyfile are given) and measures p50/p99 latency of
+chatbot_service.get_chatbot_response two ways:
+
+  * before - a new httpx.AsyncClient per request (the old pattern)
+  * after  - the app-lifetime pooled client
+
+Usage:
+    python scripts/benchmark_http_client.py --requests 500 --concurrency 20
+    python scripts/benchmark_http_client.py --certfile cert.pem --keyfile key.pem
+"""
+import argparse
+import asyncio
+import os
+import ssl
+import statistics
+import sys
+import threading
+import time
+
+import httpx
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend"))
+
+from app.core import http_client  # noqa: E402
+from app.services import chatbot_service  # noqa: E402
+
+FAKE_BODY = b'{"candidates": [{"content": {"parts": [{"text": "Relevant Law: IPC Section 420"}]}}]}'
+
+
+# --- Fake Gemini Endpoint ---
+def start_fake_gemini(latency: float, ssl_context=None) -> int:
+    """Serves canned generateContent responses on its own thread; returns the port."""
+    ready = threading.Event()
+    state = {}
+
+    async def handle(reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                length = 0
+                while True:
+                    header = await reader.readline()
+                    if header in (b"\r\n", b""):
+                        break
+                    name, _, value = header.decode().partition(":")
+                    if name.lower() == "content-length":
+                        length = int(value)
+                await reader.readexactly(length)
+                await asyncio.sleep(latency)
+                writer.write(
+                    b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+                    b"Content-Length: " + str(len(FAKE_BODY)).encode() + b"\r\n\r\n" + FAKE_BODY
+                )
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve():
+        server = await asyncio.start_server(handle, "127.0.0.1", 0, ssl=ssl_context, backlog=1024)
+        state["port"] = server.sockets[0].getsockname()[1]
+        ready.set()
+        async with server:
+            await server.serve_forever()
+
+    threading.Thread(target=lambda: asyncio.run(serve()), daemon=True).start()
+    ready.wait()
+    return state["port"]
+
+
+# --- Request Patterns ---
+async def call_per_request_client(url, payload, verify):
+    async with httpx.AsyncClient(timeout=30.0, verify=verify) as client:
+        response = await client.post(url, json=payload)
+        response.raise_for_status()
+        return response.json()
+
+
+async def measure(call, n, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one():
+        async with semaphore:
+            start = time.perf_counter()
+            await call()
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    await asyncio.gather(*(one() for _ in range(n)))
+    latencies.sort()
+    return statistics.median(latencies), latencies[int(len(latencies) * 0.99) - 1]
+
+
+async def main(args):
+    server_ctx = None
+    verify = True
+    scheme = "http"
+    if args.certfile and args.keyfile:
+        server_ctx = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+        server_ctx.load_cert_chain(args.certfile, args.keyfile)
+        verify = False
+        scheme = "https"
+
+    port = start_fake_gemini(args.latency, server_ctx)
+    url = f"{scheme}://127.0.0.1:{port}/v1beta/models/fake:generateContent"
+    chatbot_service.GEMINI_API_URL = url
+    chatbot_service.GENAI_API_KEY = chatbot_service.GENAI_API_KEY or "bench"
+    payload = {"contents": [{"role": "user", "parts": [{"text": "What is Section 420?"}]}]}
+
+    # The shared client is created exactly as the lifespan hook does it.
+    await http_client.start_http_client()
+    if not verify:
+        await http_client.close_http_client()
+        http_client._client = httpx.AsyncClient(verify=False, limits=httpx.Limits(max_keepalive_connections=args.concurrency))
+
+    print(f"fake endpoint={url} latency={args.latency * 1000:.0f}ms "
+          f"requests={args.requests} concurrency={args.concurrency}")
+    before = await measure(lambda: call_per_request_client(f"{url}?key=bench", payload, verify), args.requests, args.concurrency)
+    after = await measure(lambda: chatbot_service.get_chatbot_response("What is Section 420?", []), args.requests, args.concurrency)
+    await http_client.close_http_client()
+
+    print(f"before (client per request): p50={before[0]:7.2f}ms  p99={before[1]:7.2f}ms")
+    print(f"after  (shared pooled client): p50={after[0]:7.2f}ms  p99={after[1]:7.2f}ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.005, help="Fake model latency in seconds")
+    parser.add_argument("--certfile", help="PEM certificate to serve HTTPS (measures TLS handshakes)")
+    parser.add_argument("--keyfile", help="PEM private key for --certfile")
+    asyncio.run(main(parser.parse_args()))
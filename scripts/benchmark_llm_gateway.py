@@ -0,0 +1,114 @@
+"""
+Load benchmark for the shared LLM gateway (app/core/llm_gateway.py).
+
+Starts a local stub "model server" that answers every request after a fixed
+delay, then fires N concurrent chat requests two ways:
+
+  * blocking  - the old pattern: `chat_session.send_message(...)` called straight
+                from an async handler (serialises on the event loop)
+  * gateway   - `await llm_gateway.send_message(...)` (native async, bounded)
+
+Usage:
+    python scripts/benchmark_llm_gateway.py --requests 50 --latency 0.5
+"""
+import argparse
+import asyncio
+import os
+import sys
+import threading
+import time
+import urllib.request
+
+import httpx
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend"))
+
+from app.core import llm_gateway  # noqa: E402
+
+
+# --- Stub Model Server ---
+def start_stub_server(latency: float) -> int:
+    """Runs a tiny HTTP server on its own thread/loop; returns its port."""
+    ready = threading.Event()
+    state = {}
+
+    async def handle(reader, writer):
+        while (await reader.readline()) not in (b"\r\n", b""):
+            pass
+        await asyncio.sleep(latency)
+        body = b'{"text": "ok"}'
+        writer.write(
+            b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+            b"Content-Length: " + str(len(body)).encode() + b"\r\nConnection: close\r\n\r\n" + body
+        )
+        await writer.drain()
+        writer.close()
+
+    async def serve():
+        server = await asyncio.start_server(handle, "127.0.0.1", 0, backlog=1024)
+        state["port"] = server.sockets[0].getsockname()[1]
+        ready.set()
+        async with server:
+            await server.serve_forever()
+
+    threading.Thread(target=lambda: asyncio.run(serve()), daemon=True).start()
+    ready.wait()
+    return state["port"]
+
+
+# --- Stub Model (same surface as genai.GenerativeModel) ---
+class StubChatSession:
+    def __init__(self, url, client):
+        self.url = url
+        self.client = client
+
+    def send_message(self, content):
+        with urllib.request.urlopen(self.url) as resp:
+            return resp.read()
+
+    async def send_message_async(self, content):
+        resp = await self.client.get(self.url)
+        return resp.content
+
+
+class StubModel:
+    def __init__(self, url, client):
+        self.url = url
+        self.client = client
+
+    def start_chat(self, history=None):
+        return StubChatSession(self.url, self.client)
+
+
+# --- Scenarios ---
+async def run_blocking(model, n):
+    async def handler():
+        chat_session = model.start_chat()
+        return chat_session.send_message("query")
+    await asyncio.gather(*(handler() for _ in range(n)))
+
+
+async def run_gateway(model, n):
+    await asyncio.gather(*(llm_gateway.send_message(model, "query") for _ in range(n)))
+
+
+async def main(args):
+    port = start_stub_server(args.latency)
+    url = f"http://127.0.0.1:{port}/generate"
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+    async with httpx.AsyncClient(limits=limits, timeout=60.0) as client:
+        model = StubModel(url, client)
+        print(f"stub latency={args.latency}s requests={args.requests} "
+              f"gateway concurrency={llm_gateway.LLM_MAX_CONCURRENCY}")
+        for name, scenario in (("blocking", run_blocking), ("gateway", run_gateway)):
+            start = time.perf_counter()
+            await scenario(model, args.requests)
+            elapsed = time.perf_counter() - start
+            print(f"{name:>9}: {elapsed:7.2f}s total  {args.requests / elapsed:8.1f} req/s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.5, help="Stub model latency in seconds")
+    asyncio.run(main(parser.parse_args()))
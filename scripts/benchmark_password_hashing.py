@@ -0,0 +1,87 @@
+"""
+Sustained-login benchmark for the bcrypt hashing pool (app/core/security.py).
+
+Keeps --concurrency logins in flight for --duration seconds and reports
+logins/s and logins/s per core two ways:
+
+  * before - bcrypt.checkpw inline on the request threadpool (the old sync handlers)
+  * after  - verify_password_async, i.e. the dedicated process pool
+
+While the storm runs, a probe submits a trivial job to the same threadpool
+every 50 ms, standing in for a sync document route; its latency shows how
+much the logins starve the rest of the app.
+
+Usage:
+    python scripts/benchmark_password_hashing.py --rounds 12 --concurrency 64 --duration 10
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+import bcrypt
+from starlette.concurrency import run_in_threadpool
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend"))
+
+
+async def probe(stop: asyncio.Event, latencies: list):
+    while not stop.is_set():
+        start = time.perf_counter()
+        await run_in_threadpool(lambda: None)
+        latencies.append((time.perf_counter() - start) * 1000)
+        await asyncio.sleep(0.05)
+
+
+async def storm(verify, concurrency, duration):
+    stop = asyncio.Event()
+    probe_latencies = []
+    done = 0
+
+    async def worker():
+        nonlocal done
+        while not stop.is_set():
+            assert await verify()
+            done += 1
+
+    probe_task = asyncio.create_task(probe(stop, probe_latencies))
+    workers = [asyncio.create_task(worker()) for _ in range(concurrency)]
+    start = time.perf_counter()
+    await asyncio.sleep(duration)
+    stop.set()
+    await asyncio.gather(*workers, probe_task)
+    elapsed = time.perf_counter() - start
+    probe_latencies.sort()
+    return done / elapsed, statistics.median(probe_latencies), probe_latencies[int(len(probe_latencies) * 0.99) - 1]
+
+
+async def main(args):
+    os.environ["BCRYPT_ROUNDS"] = str(args.rounds)
+    from app.core import security
+
+    cores = min(security.BCRYPT_WORKERS, os.cpu_count() or 1)
+    password = "correct horse battery staple"
+    hashed = bcrypt.hashpw(password.encode(), bcrypt.gensalt(args.rounds)).decode()
+
+    # Start the workers before timing so spawn cost is not counted
+    await security.verify_password_async(password, hashed)
+
+    print(f"rounds={args.rounds} concurrency={args.concurrency} duration={args.duration}s "
+          f"hash_workers={security.BCRYPT_WORKERS} cores={os.cpu_count()}")
+    before = await storm(lambda: run_in_threadpool(security.verify_password, password, hashed), args.concurrency, args.duration)
+    after = await storm(lambda: security.verify_password_async(password, hashed), args.concurrency, args.duration)
+    security.shutdown_hash_pool()
+
+    for label, (rate, p50, p99) in (("before (inline on threadpool)", before), ("after  (hashing process pool)", after)):
+        print(f"{label}: {rate:7.1f} logins/s  {rate / cores:6.1f} logins/s/core  "
+              f"threadpool probe p50={p50:7.2f}ms p99={p99:7.2f}ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rounds", type=int, default=12)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--duration", type=float, default=10)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,116 @@
+"""
+Throughput benchmark for PDF text extraction (app/utils/pdf_parser.py).
+
+Builds a synthetic judgment-sized PDF (no extra dependencies; the file is
+written by hand) and times three ways of reading it:
+
+  * before   - pypdf page loop with `text += page.extract_text()` (the old route helpers)
+  * parallel - pdf_parser.extract_text, page runs spread over PDF_PARSE_WORKERS processes
+  * budget   - the same with the summarizer's 400,000 character budget
+
+Pass --pdf to time a real document instead of the synthetic one.
+
+Usage:
+    python scripts/benchmark_pdf_parser.py --pages 500 --repeat 3
+    PDF_PARSE_WORKERS=8 python scripts/benchmark_pdf_parser.py --pdf judgment.pdf
+"""
+import argparse
+import io
+import os
+import statistics
+import sys
+import time
+
+import pypdf
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend"))
+
+LINE = "The appellant contends that the High Court erred in law under Section 482 CrPC read with Article 226."
+
+
+def build_pdf(pages: int, lines_per_page: int) -> bytes:
+    """A minimal valid PDF with `pages` pages of Helvetica text."""
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,  # page tree, filled in once the page ids are known
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    page_ids = []
+    for number in range(pages):
+        lines = [f"({LINE} Page {number + 1}, para {i + 1}.) Tj T*" for i in range(lines_per_page)]
+        stream = ("BT /F1 9 Tf 11 TL 36 800 Td " + " ".join(lines) + " ET").encode()
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % len(objects)
+        )
+        page_ids.append(len(objects))
+    kids = " ".join(f"{page_id} 0 R" for page_id in page_ids)
+    objects[1] = f"<< /Type /Pages /Kids [{kids}] /Count {pages} >>".encode()
+
+    out = io.BytesIO()
+    out.write(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(out.tell())
+        out.write(b"%d 0 obj\n" % number + body + b"\nendobj\n")
+    xref = out.tell()
+    out.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+    for offset in offsets:
+        out.write(b"%010d 00000 n \n" % offset)
+    out.write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref))
+    return out.getvalue()
+
+
+def extract_before(data: bytes) -> str:
+    reader = pypdf.PdfReader(io.BytesIO(data))
+    text = ""
+    for page in reader.pages:
+        text += page.extract_text() or ""
+    return text
+
+
+def timed(fn, repeat: int):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        text = fn()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times), len(text)
+
+
+def main(args):
+    from app.core.config import PDF_PARSE_WORKERS
+    from app.utils import pdf_parser
+
+    if args.pdf:
+        with open(args.pdf, "rb") as f:
+            data = f.read()
+    else:
+        data = build_pdf(args.pages, args.lines)
+    page_count = len(pypdf.PdfReader(io.BytesIO(data)).pages)
+    size_mb = len(data) / (1024 * 1024)
+
+    # Start the workers before timing so spawn cost is not counted
+    pdf_parser.extract_text(data)
+
+    print(f"pages={page_count} size={size_mb:.1f}MB workers={PDF_PARSE_WORKERS} cores={os.cpu_count()} repeat={args.repeat}")
+    runs = (
+        ("before   (sequential +=)", lambda: extract_before(data)),
+        ("parallel (pdf_parser)   ", lambda: pdf_parser.extract_text(data)),
+        ("budget   (400k chars)   ", lambda: pdf_parser.extract_text(data, max_chars=400000)),
+    )
+    for label, fn in runs:
+        seconds, chars = timed(fn, args.repeat)
+        print(f"{label}: {seconds * 1000:8.1f}ms  {page_count / seconds:7.1f} pages/s  "
+              f"{size_mb / seconds:6.2f} MB/s  chars={chars}")
+    pdf_parser.shutdown_pool()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=500)
+    parser.add_argument("--lines", type=int, default=60, help="Text lines per synthetic page")
+    parser.add_argument("--pdf", help="Benchmark this PDF instead of a synthetic one")
+    parser.add_argument("--repeat", type=int, default=3)
+    main(parser.parse_args())
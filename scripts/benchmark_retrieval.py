@@ -0,0 +1,105 @@
+"""
+Recall/latency benchmark for the local retrieval index (app/utils/embeddings.py).
+
+Builds an index over a synthetic corpus (topic-clustered passages, so the IVF
+clusters are meaningful) or opens an existing one with --index, then issues
+queries made of words sampled from random passages and reports, per nprobe:
+
+  * recall@k - overlap of the IVF top-k with the exact (full scan) top-k
+  * hit@k    - how often the passage the query was drawn from is in the top-k
+  * p50/p99 search latency, against the exact scan as the baseline
+
+Usage:
+    python scripts/benchmark_retrieval.py --passages 100000 --queries 500
+    python scripts/benchmark_retrieval.py --index backend/data/embeddings
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend"))
+
+from app.utils import embeddings  # noqa: E402
+
+
+def synthetic_passages(count: int, topics: int, seed: int = 0) -> list:
+    rng = random.Random(seed)
+    common = [f"w{i}" for i in range(2000)]
+    topic_words = [[f"t{t}x{i}" for i in range(60)] for t in range(topics)]
+    passages = []
+    for i in range(count):
+        topic = rng.randrange(topics)
+        words = rng.choices(common, k=120) + rng.choices(topic_words[topic], k=60)
+        rng.shuffle(words)
+        passages.append({"source": f"synthetic/{topic}", "title": f"Passage {i}", "text": " ".join(words)})
+    return passages
+
+
+def percentile(values: list, fraction: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def main(args):
+    if args.index:
+        index = embeddings.VectorIndex(args.index)
+    else:
+        directory = tempfile.mkdtemp(prefix="retrieval-bench-")
+        passages = synthetic_passages(args.passages, args.topics)
+        start = time.perf_counter()
+        embeddings.build_index(directory, passages, dim=args.dim)
+        print(f"built {len(passages)} passages in {time.perf_counter() - start:.1f}s -> {directory}")
+        index = embeddings.VectorIndex(directory)
+
+    rng = random.Random(1)
+    queries = []
+    for _ in range(args.queries):
+        row = rng.randrange(len(index))
+        words = index.passage(row)["text"].split()
+        queries.append((row, " ".join(rng.sample(words, min(args.query_words, len(words))))))
+    vectors = [index.embed_query(text) for _, text in queries]
+
+    print(f"passages={len(index)} dim={index.meta['dim']} lists={len(index.centroids)} k={args.k} queries={len(queries)}")
+
+    exact = []
+    latencies = []
+    for vector in vectors:
+        start = time.perf_counter()
+        rows, _ = index.search_vector(vector, args.k)
+        latencies.append((time.perf_counter() - start) * 1000)
+        exact.append(set(rows.tolist()))
+    hits = sum(row in found for (row, _), found in zip(queries, exact))
+    print(f"exact       recall@{args.k}=1.000  hit@{args.k}={hits / len(queries):.3f}  "
+          f"p50={statistics.median(latencies):7.3f}ms  p99={percentile(latencies, 0.99):7.3f}ms")
+
+    for nprobe in args.nprobe:
+        recall = 0.0
+        hits = 0
+        latencies = []
+        for (row, _), vector, truth in zip(queries, vectors, exact):
+            start = time.perf_counter()
+            rows, _ = index.search_vector(vector, args.k, nprobe)
+            latencies.append((time.perf_counter() - start) * 1000)
+            found = set(rows.tolist())
+            recall += len(found & truth) / max(1, len(truth))
+            hits += row in found
+        print(f"nprobe={nprobe:<4} recall@{args.k}={recall / len(queries):.3f}  hit@{args.k}={hits / len(queries):.3f}  "
+              f"p50={statistics.median(latencies):7.3f}ms  p99={percentile(latencies, 0.99):7.3f}ms")
+    index.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--index", help="Benchmark an existing index directory instead of a synthetic corpus")
+    parser.add_argument("--passages", type=int, default=50000)
+    parser.add_argument("--topics", type=int, default=200)
+    parser.add_argument("--dim", type=int, default=embeddings.DEFAULT_DIM)
+    parser.add_argument("--queries", type=int, default=300)
+    parser.add_argument("--query-words", type=int, default=12)
+    parser.add_argument("--k", type=int, default=4)
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[1, 4, 8, 16, 32])
+    main(parser.parse_args())
@@ -0,0 +1,93 @@
+"""
+Benchmark for the near-duplicate checker (app/utils/similarity_checker.py).
+
+Fills a NearDuplicateIndex with synthetic FIR-sized documents, then looks up
+edited copies of some of them (a fraction of their words replaced, as a
+re-scan or a changed stamp would) and unrelated documents, and reports:
+
+  * signature throughput (MB/s of text) and time per document
+  * lookup p50/p99 latency once the signature is known
+  * the detection rate of copies at or above the threshold, and false matches
+
+Usage:
+    python scripts/benchmark_similarity.py --documents 10000 --words 1500
+    python scripts/benchmark_similarity.py --edit 0.02 --threshold 0.9
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend"))
+
+from app.utils import similarity_checker  # noqa: E402
+
+
+def synthetic_document(rng: random.Random, vocabulary: list, words: int) -> list:
+    return rng.choices(vocabulary, k=words)
+
+
+def edited(rng: random.Random, words: list, vocabulary: list, fraction: float) -> list:
+    copy = list(words)
+    for position in rng.sample(range(len(copy)), int(len(copy) * fraction)):
+        copy[position] = rng.choice(vocabulary)
+    return copy
+
+
+def percentile(values: list, fraction: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def main(args):
+    rng = random.Random(0)
+    vocabulary = [f"w{i}" for i in range(args.vocabulary)]
+    index = similarity_checker.NearDuplicateIndex("benchmark", args.threshold, args.documents)
+
+    documents = [synthetic_document(rng, vocabulary, args.words) for _ in range(args.documents)]
+    texts = [" ".join(words) for words in documents]
+    start = time.perf_counter()
+    signatures = [similarity_checker.signature(text) for text in texts]
+    elapsed = time.perf_counter() - start
+    megabytes = sum(len(text) for text in texts) / 1e6
+    print(f"signatures: {len(texts)} documents of {args.words} words in {elapsed:.2f}s "
+          f"({megabytes / elapsed:.1f} MB/s, {elapsed / len(texts) * 1000:.3f} ms/document)")
+    for i, sig in enumerate(signatures):
+        index.add(sig, i)
+
+    copies = []
+    for _ in range(args.queries):
+        original = rng.randrange(len(documents))
+        copies.append((original, similarity_checker.signature(" ".join(edited(rng, documents[original], vocabulary, args.edit)))))
+    unrelated = [similarity_checker.signature(" ".join(synthetic_document(rng, vocabulary, args.words))) for _ in range(args.queries)]
+
+    latencies = []
+    found = 0
+    for original, sig in copies:
+        start = time.perf_counter()
+        match = index.find(sig)
+        latencies.append((time.perf_counter() - start) * 1000)
+        found += match is not None and match[0] == original
+    false_matches = 0
+    for sig in unrelated:
+        start = time.perf_counter()
+        false_matches += index.find(sig) is not None
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    print(f"index: {len(index)} documents, threshold={args.threshold}, copies edited {args.edit:.1%}")
+    print(f"copies found {found}/{len(copies)}, false matches {false_matches}/{len(unrelated)}")
+    print(f"lookup p50={statistics.median(latencies):.4f}ms p99={percentile(latencies, 0.99):.4f}ms "
+          f"({index.stats()['avg_candidates']} candidates on average)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--documents", type=int, default=10000)
+    parser.add_argument("--words", type=int, default=1500, help="Words per document")
+    parser.add_argument("--vocabulary", type=int, default=20000)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--edit", type=float, default=0.002, help="Fraction of words changed in the copies")
+    parser.add_argument("--threshold", type=float, default=0.95)
+    main(parser.parse_args())
@@ -0,0 +1,110 @@
+"""
+Token reduction and throughput of the upload text cleaner (app/utils/text_cleaner.py).
+
+Cleans a synthetic judgment (running header and footer on every page, page
+numbers, words hyphenated across line ends, ragged spacing) or the documents
+in --corpus (.pdf, .docx, .txt) and reports, per document and in total:
+
+  * characters and estimated prompt tokens before and after cleaning
+  * cleaning throughput in MB/s of input text
+
+Usage:
+    python scripts/benchmark_text_cleaner.py --pages 200
+    python scripts/benchmark_text_cleaner.py --corpus data/judgments
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend"))
+
+from app.services.conversation_context import estimate_tokens  # noqa: E402
+from app.utils import docx_parser, pdf_parser  # noqa: E402
+from app.utils.text_cleaner import clean_text  # noqa: E402
+from app.utils.text_chunker import PAGE_BREAK  # noqa: E402
+
+WORDS = (
+    "the appellant contends that learned trial court erred in appreciating evidence prosecution "
+    "witness deposed accused recovery panchnama section conviction sentence acquittal hon'ble "
+    "respondent submitted judgment impugned order investigation cross-examination circumstantial"
+).split()
+
+
+def synthetic_judgment(pages: int, lines_per_page: int = 30, seed: int = 0) -> str:
+    """Text shaped like pypdf output of a printed High Court judgment."""
+    rng = random.Random(seed)
+    header = ["IN THE HIGH COURT OF JUDICATURE AT ALLAHABAD", "CRIMINAL APPEAL No. 1234 of 2019"]
+    out = []
+    for number in range(1, pages + 1):
+        lines = list(header) + [f"  {number}  "]
+        carry = []
+        for _ in range(lines_per_page):
+            words = carry + rng.choices(WORDS, k=rng.randrange(10, 16))
+            carry = []
+            if rng.random() < 0.15:
+                # A word broken across the line end
+                words.append("judg-")
+                carry = ["ment"]
+            lines.append("  ".join(words) if rng.random() < 0.2 else " ".join(words))
+        lines += [f"Indian Kanoon - http://indiankanoon.org/doc/123456789/ {number}", f"Page {number} of {pages}"]
+        out.append("\n".join(lines))
+    return PAGE_BREAK.join(out)
+
+
+def read_corpus(corpus: str) -> list:
+    documents = []
+    for root, _, files in os.walk(corpus):
+        for name in sorted(files):
+            path = os.path.join(root, name)
+            extension = os.path.splitext(name)[1].lower()
+            if extension == ".pdf":
+                text = pdf_parser.extract_text(path, parallel=False)
+            elif extension == ".docx":
+                text = docx_parser.extract_text(path)
+            elif extension == ".txt":
+                with open(path, encoding="utf-8", errors="replace") as f:
+                    text = f.read()
+            else:
+                continue
+            documents.append((os.path.relpath(path, corpus), text))
+    return documents
+
+
+def main(args):
+    if args.corpus:
+        documents = read_corpus(args.corpus)
+    else:
+        documents = [(f"synthetic judgment, {args.pages} pages", synthetic_judgment(args.pages))]
+
+    totals = {"chars": 0, "clean_chars": 0, "tokens": 0, "clean_tokens": 0, "seconds": 0.0}
+    for name, text in documents:
+        timings = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            cleaned = clean_text(text)
+            timings.append(time.perf_counter() - start)
+        seconds = statistics.median(timings)
+        tokens, clean_tokens = estimate_tokens(text), estimate_tokens(cleaned)
+        totals["chars"] += len(text)
+        totals["clean_chars"] += len(cleaned)
+        totals["tokens"] += tokens
+        totals["clean_tokens"] += clean_tokens
+        totals["seconds"] += seconds
+        print(f"{name}: {len(text)} -> {len(cleaned)} chars, ~{tokens} -> ~{clean_tokens} tokens "
+              f"({1 - clean_tokens / max(1, tokens):.1%} fewer), {len(text) / 1e6 / seconds:.1f} MB/s")
+
+    if len(documents) > 1:
+        print(f"total: {totals['chars']} -> {totals['clean_chars']} chars, ~{totals['tokens']} -> "
+              f"~{totals['clean_tokens']} tokens ({1 - totals['clean_tokens'] / max(1, totals['tokens']):.1%} fewer), "
+              f"{totals['chars'] / 1e6 / totals['seconds']:.1f} MB/s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", help="Directory of documents to clean (default: a synthetic judgment)")
+    parser.add_argument("--pages", type=int, default=200, help="Pages of the synthetic judgment")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per document (median reported)")
+    main(parser.parse_args())
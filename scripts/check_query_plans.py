@@ -0,0 +1,84 @@
+"""
+EXPLAIN-based regression check for the hot user and chat-history lookups.
+
+Runs EXPLAIN for each query against the database in DB_USER/DB_PASSWORD/
+DB_HOST/DB_NAME and fails (exit code 1) if any of them would scan the table
+or sort in memory instead of using its index. Index lookups stay O(log n) as
+`users` grows into the millions, so this catches a dropped index or a query
+rewritten into an unindexable shape before it reaches production.
+
+Usage:
+    python scripts/check_query_plans.py            # check the current schema
+    python scripts/check_query_plans.py --migrate  # apply migrations first
+"""
+import argparse
+import os
+import sys
+
+import mysql.connector
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend"))
+
+from app.core.database import _db_config  # noqa: E402
+from app.core.migrations import migrate  # noqa: E402
+from app.services import chat_history, user_repository  # noqa: E402
+
+# (label, query, sample params, index the plan must use)
+CHECKS = [
+    ("login by email", user_repository.GET_LOGIN_BY_EMAIL, ("someone@example.com",), "email"),
+    ("profile by email", user_repository.GET_BY_EMAIL, ("someone@example.com",), "email"),
+    ("reset by token", user_repository.GET_BY_RESET_TOKEN, ("token",), "idx_users_reset_token"),
+    ("user by phone", "SELECT id FROM users WHERE phone_number = %s", ("9999999999",), "idx_users_phone_number"),
+    ("chat context window", chat_history.LATEST_TURNS, (1, "session", 10), "idx_chat_history_user_session_created"),
+    (
+        "chat history page",
+        chat_history.TURNS_BEFORE,
+        (1, "session", "2030-01-01 00:00:00", 2**31 - 1, 20),
+        "idx_chat_history_user_session_created",
+    ),
+]
+
+# Extra notes MySQL prints when a unique-index probe already found no row
+NO_ROW_NOTES = ("no matching row in const table", "Impossible WHERE noticed after reading const tables")
+
+
+def check(cursor, label, query, params, expected_index) -> list:
+    cursor.execute("EXPLAIN " + query, params)
+    problems = []
+    for row in cursor.fetchall():
+        extra = row.get("Extra") or ""
+        if any(note in extra for note in NO_ROW_NOTES):
+            continue
+        if row.get("type") == "ALL":
+            problems.append(f"full table scan on {row.get('table')}")
+        if row.get("key") != expected_index:
+            problems.append(f"uses index {row.get('key')!r}, expected {expected_index!r}")
+        if "Using filesort" in extra:
+            problems.append("sorts rows in memory (Using filesort)")
+        print(f"  {label:<18} type={row.get('type')!s:<6} key={row.get('key')!s:<40} rows={row.get('rows')} {extra}")
+    return problems
+
+
+def main(args) -> int:
+    connection = mysql.connector.connect(**_db_config())
+    try:
+        if args.migrate:
+            migrate(connection)
+        cursor = connection.cursor(dictionary=True)
+        failures = 0
+        for label, query, params, expected_index in CHECKS:
+            problems = check(cursor, label, query, params, expected_index)
+            for problem in problems:
+                print(f"FAIL {label}: {problem}")
+            failures += bool(problems)
+        cursor.close()
+    finally:
+        connection.close()
+    print("All query plans use their indexes." if not failures else f"{failures} query plan(s) regressed.")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--migrate", action="store_true", help="Apply pending migrations before checking")
+    sys.exit(main(parser.parse_args()))
@@ -0,0 +1,185 @@
+"""
+Builds the local retrieval index the chatbot grounds its answers in.
+
+Walks a corpus directory of bare acts and judgments (.txt, .md, .pdf, .docx),
+splits each document into passages on page/paragraph boundaries and embeds
+them with the hashing vectorizer in app/utils/embeddings.py.
+
+The build is incremental. A manifest in <index dir>/build records each
+document's content hash, so a run only embeds new or changed documents
+(spread over a process pool) and appends them to a new shard. Each shard is
+committed once it is fully written, so an interrupted run resumes after its
+last complete shard. The live rows of all shards are then merged into a fresh
+memory-mapped IVF index, published under EMBEDDINGS_INDEX_DIR (or --out); a
+running server switches to it within RETRIEVAL_RELOAD_INTERVAL seconds.
+
+Usage:
+    python scripts/generate_embeddings.py --corpus data/corpus
+    python scripts/generate_embeddings.py --corpus data/corpus --workers 8 --shard-size 20000
+    python scripts/generate_embeddings.py --corpus data/corpus --no-merge   # embed now, merge later
+    python scripts/generate_embeddings.py --merge-only
+    python scripts/generate_embeddings.py --corpus data/corpus --rebuild --dim 2048
+"""
+import argparse
+import hashlib
+import multiprocessing
+import os
+import shutil
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend"))
+
+# Pool workers re-import this module, so nothing here may load app settings
+from app.utils import docx_parser, embeddings, pdf_parser  # noqa: E402
+from app.utils.text_chunker import split_text  # noqa: E402
+
+EXTENSIONS = (".txt", ".md", ".pdf", ".docx")
+
+
+def read_document(path: str) -> str:
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".pdf":
+        # Already inside a pool worker; don't start pdf_parser's own pool
+        return pdf_parser.extract_text(path, parallel=False)
+    if extension == ".docx":
+        return docx_parser.extract_text(path)
+    with open(path, encoding="utf-8", errors="replace") as f:
+        return f.read()
+
+
+def iter_documents(corpus: str):
+    for root, dirs, files in os.walk(corpus):
+        dirs.sort()
+        for name in sorted(files):
+            if name.lower().endswith(EXTENSIONS) and not name.startswith("."):
+                yield os.path.join(root, name)
+
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def embed_document(path: str, source: str, chunk_chars: int, dim: int) -> tuple:
+    """Runs in a pool worker: the document's passages and their unweighted term vectors."""
+    title = os.path.splitext(os.path.basename(path))[0].replace("_", " ")
+    passages = [
+        {"source": source, "title": title, "text": chunk.strip()}
+        for chunk in split_text(read_document(path), chunk_chars)
+        if chunk.strip()
+    ]
+    return passages, embeddings.hash_texts([passage["text"] for passage in passages], dim)
+
+
+def changed_documents(store, corpus: str) -> tuple:
+    """(documents to embed as (path, source, info), sources that left the corpus, unchanged count)."""
+    pending = []
+    seen = set()
+    unchanged = 0
+    for path in iter_documents(corpus):
+        source = os.path.relpath(path, corpus)
+        seen.add(source)
+        stat = os.stat(path)
+        info = {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size}
+        entry = store.document(source)
+        # Same size and mtime: skip without reading the file
+        if entry and entry["mtime_ns"] == info["mtime_ns"] and entry["size"] == info["size"]:
+            unchanged += 1
+            continue
+        info["sha256"] = file_sha256(path)
+        if entry and entry["sha256"] == info["sha256"]:
+            # Touched but identical; just record the new mtime
+            entry.update(info)
+            unchanged += 1
+            continue
+        pending.append((path, source, info))
+    removed = [source for source in store.manifest["documents"] if source not in seen]
+    return pending, removed, unchanged
+
+
+def embed_incrementally(store, pending: list, args) -> int:
+    """Embeds `pending` across a process pool, writing a shard every --shard-size passages."""
+    executor = ProcessPoolExecutor(max_workers=args.workers, mp_context=multiprocessing.get_context("spawn"))
+    futures = {}
+    shard = []
+    shard_rows = 0
+    written = 0
+    next_document = 0
+    try:
+        while next_document < len(pending) or futures:
+            # Bounded lookahead: finished documents wait in memory only until their shard is written
+            while next_document < len(pending) and len(futures) < args.workers * 4:
+                path, source, info = pending[next_document]
+                future = executor.submit(embed_document, path, source, store.manifest["chunk_chars"], store.dim)
+                futures[future] = pending[next_document]
+                next_document += 1
+            done, _ = wait(futures, return_when=FIRST_COMPLETED)
+            for future in done:
+                path, source, info = futures.pop(future)
+                try:
+                    passages, counts = future.result()
+                except Exception as e:
+                    print(f"Skipping {path}: {e}")
+                    continue
+                shard.append((source, info, passages, counts))
+                shard_rows += len(passages)
+            if shard and (shard_rows >= args.shard_size or (next_document == len(pending) and not futures)):
+                name = store.write_shard(shard)
+                written += len(shard)
+                print(f"  {name}: {len(shard)} documents, {shard_rows} passages ({written}/{len(pending)} documents)")
+                shard = []
+                shard_rows = 0
+    finally:
+        executor.shutdown(cancel_futures=True)
+    return written
+
+
+def main(args):
+    from app.core.config import EMBEDDINGS_INDEX_DIR
+
+    out = args.out or EMBEDDINGS_INDEX_DIR
+    build_dir = os.path.join(out, "build")
+    if args.rebuild and os.path.exists(build_dir):
+        shutil.rmtree(build_dir)
+    store = embeddings.ShardStore(build_dir, args.dim, args.chunk_chars)
+
+    if not args.merge_only:
+        start = time.perf_counter()
+        pending, removed, unchanged = changed_documents(store, args.corpus)
+        print(f"{len(pending)} new or changed, {len(removed)} removed, {unchanged} unchanged documents")
+        # Also saves the refreshed mtimes of touched-but-identical documents
+        store.remove_documents(removed)
+        if pending:
+            embedded = embed_incrementally(store, pending, args)
+            print(f"Embedded {embedded} documents in {time.perf_counter() - start:.1f}s")
+
+    if args.no_merge:
+        print(f"Build state: {store.stats()} (merge later with --merge-only)")
+        return
+
+    start = time.perf_counter()
+    version = store.merge(out, nlist=args.nlist)
+    print(f"Published {version} to {out} in {time.perf_counter() - start:.1f}s: {store.stats()}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", help="Directory of source documents")
+    parser.add_argument("--out", help="Index directory (default: EMBEDDINGS_INDEX_DIR)")
+    parser.add_argument("--dim", type=int, help="Hashed embedding dimensions (default: the existing build's, else 1024)")
+    parser.add_argument("--chunk-chars", type=int, help="Maximum passage length (default: the existing build's, else 1500)")
+    parser.add_argument("--nlist", type=int, help="IVF clusters (default: about sqrt(passages))")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Embedding processes")
+    parser.add_argument("--shard-size", type=int, default=20000, help="Passages per shard")
+    parser.add_argument("--no-merge", action="store_true", help="Only embed; don't publish a new index")
+    parser.add_argument("--merge-only", action="store_true", help="Publish an index from the existing shards")
+    parser.add_argument("--rebuild", action="store_true", help="Discard the build state and embed everything")
+    parsed = parser.parse_args()
+    if not parsed.corpus and not parsed.merge_only:
+        parser.error("--corpus is required unless --merge-only is given")
+    main(parsed)